@@ -0,0 +1,206 @@
+"""
+Benchmark cases. Each case is a context manager that does its setup, yields
+the zero-argument callable to time, and tears down afterwards; register new
+ones with @case so they show up in `python -m benchmarks.run --list`.
+"""
+import os
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+import chromadb
+
+from config import MMAP_INDEX_DTYPE, POLICY_EMBED_BATCH_SIZE, POLICY_INDEX_DIR
+from benchmarks.synthetic import (
+    POLICY_QUERIES,
+    WORKFLOW_CONVERSATIONS,
+    FakeToolContext,
+    synthetic_messages,
+    synthetic_policy_chunks,
+)
+from flows.registry import WORKFLOWS_BY_ISSUE
+from order_support_agent.session_state import DamageInfo, Issue, OrderStatus, SessionState, Severity
+from order_support_agent.tools.damage_item_tools import classify_damage, search_damage_policy_sync
+from order_support_agent.tools.extract_information import detect_issue_type, extract_order_id
+from order_support_agent.tools.handle_workflows import handle_workflows
+from order_support_agent.tools.intent_matcher import analyze_messages
+from rag import retrieval, vectorstore
+from rag.cache import normalize_query
+from rag.chunking import batched
+from rag.lexical import BM25Index
+from rag.mmap_index import MmapVectorIndex
+
+CASES: dict[str, Callable] = {}
+
+CORPUS_SIZES = (10, 1_000, 10_000)
+
+
+def case(name: str):
+    def register(factory):
+        CASES[name] = contextmanager(factory)
+        return factory
+    return register
+
+
+# --- deterministic tools -------------------------------------------------
+
+@case("tools.extract_order_id")
+def _extract_order_id() -> Iterator[Callable]:
+    context = FakeToolContext()
+    yield lambda: extract_order_id(context, "Hi, where is my order ORDER-240240? It never came")
+
+
+@case("tools.detect_issue_type")
+def _detect_issue_type() -> Iterator[Callable]:
+    context = FakeToolContext({"order_id": "240240"})
+    yield lambda: detect_issue_type(context, "The parcel says delivered but it never came")
+
+
+@case("tools.classify_damage")
+def _classify_damage() -> Iterator[Callable]:
+    context = FakeToolContext({"order_id": "240240"})
+    SessionState(context.state).update(damage=DamageInfo(image_severity=Severity.MAJOR))
+    yield lambda: classify_damage(context, "The box looks a bit odd")   # falls back to the image severity
+
+
+@case("tools.search_damage_policy")
+def _search_damage_policy() -> Iterator[Callable]:
+    # Real policy corpus; the result cache is cleared so every call does the retrieval.
+    context = FakeToolContext({"order_id": "240240"})
+
+    def run():
+        retrieval.result_cache.clear()
+        search_damage_policy_sync("The screen is cracked, can I get a replacement?", context, "major screen damage")
+    yield run
+
+
+# --- intent batches -------------------------------------------------------
+
+@case("intents.analyze_messages[10k]")
+def _intent_batch() -> Iterator[Callable]:
+    messages = synthetic_messages(10_000)
+    yield lambda: analyze_messages(messages)
+
+
+# --- scripted workflow conversations --------------------------------------
+
+def _conversation_case(issue_type: str):
+    def factory() -> Iterator[Callable]:
+        workflow = WORKFLOWS_BY_ISSUE[issue_type]
+        script = WORKFLOW_CONVERSATIONS[issue_type]
+
+        def run():
+            context = FakeToolContext({"order_id": "240240"})
+            SessionState(context.state).update(
+                issue=Issue.parse(issue_type), status=OrderStatus.parse(workflow.requires_status or "delivered"),
+            )
+            handle_workflows(context, "start")
+            for message in script:
+                handle_workflows(context, message)
+        yield run
+    return factory
+
+
+for _issue_type in WORKFLOW_CONVERSATIONS:
+    case(f"workflows.conversation[{_issue_type.replace(' ', '_')}]")(_conversation_case(_issue_type))
+
+
+# --- retrieval over synthetic corpora --------------------------------------
+
+def _synthetic_chroma(n_chunks: int):
+    client = vectorstore.client or chromadb.PersistentClient(path=POLICY_INDEX_DIR)
+    collection = client.get_or_create_collection(
+        name=f"bench_synthetic_{n_chunks}", embedding_function=vectorstore.embedding_fn,
+    )
+    if collection.count() != n_chunks:
+        client.delete_collection(collection.name)
+        collection = client.create_collection(
+            name=f"bench_synthetic_{n_chunks}", embedding_function=vectorstore.embedding_fn,
+        )
+        for batch in batched(synthetic_policy_chunks(n_chunks), POLICY_EMBED_BATCH_SIZE):
+            collection.add(
+                ids=[chunk.id for chunk in batch],
+                documents=[chunk.text for chunk in batch],
+                metadatas=[chunk.metadata for chunk in batch],
+            )
+    return collection
+
+
+def _synthetic_mmap(n_chunks: int) -> MmapVectorIndex:
+    index = MmapVectorIndex(os.path.join(POLICY_INDEX_DIR, f"bench_mmap_{n_chunks}"), dtype=MMAP_INDEX_DTYPE)
+    if index.count() != n_chunks:
+        chunks = synthetic_policy_chunks(n_chunks)
+        vectors = [
+            vector for batch in batched(chunks, POLICY_EMBED_BATCH_SIZE)
+            for vector in vectorstore.embedding_fn([chunk.text for chunk in batch])
+        ]
+        index.write([c.id for c in chunks], [c.text for c in chunks], [c.metadata for c in chunks], vectors, files={})
+    return index
+
+
+@contextmanager
+def synthetic_index(n_chunks: int, backend: str = "chroma"):
+    """
+    Points rag.vectorstore at a collection (or memory-mapped index) holding
+    n_chunks synthetic chunks, embedded with the configured provider, for the
+    duration of the block.
+    """
+    collection = _synthetic_mmap(n_chunks) if backend == "mmap" else _synthetic_chroma(n_chunks)
+
+    saved = vectorstore.collection, vectorstore.index_version
+    vectorstore.collection, vectorstore.index_version = collection, f"bench-{backend}-{n_chunks}"
+    try:
+        yield collection
+    finally:
+        vectorstore.collection, vectorstore.index_version = saved
+        retrieval.result_cache.clear()
+
+
+def _hybrid_case(n_chunks: int, warm: bool):
+    def factory() -> Iterator[Callable]:
+        with synthetic_index(n_chunks):
+            retrieval.get_lexical_index()   # build BM25 outside the timed region
+
+            def run():
+                if not warm:
+                    retrieval.result_cache.clear()
+                    retrieval.embedding_cache.clear()
+                for query in POLICY_QUERIES:
+                    retrieval.hybrid_search([query], top_k=3)
+            yield run
+    return factory
+
+
+def _vector_query_case(n_chunks: int, backend: str):
+    def factory() -> Iterator[Callable]:
+        with synthetic_index(n_chunks, backend):
+            for query in POLICY_QUERIES:
+                retrieval.embed_query(normalize_query(query))   # embeddings stay cached; only the index lookup is timed
+
+            def run():
+                retrieval.result_cache.clear()
+                for query in POLICY_QUERIES:
+                    retrieval.query_policy(query, n_results=10)
+            yield run
+    return factory
+
+
+def _bm25_case(n_chunks: int):
+    def factory() -> Iterator[Callable]:
+        chunks = synthetic_policy_chunks(n_chunks)
+        index = BM25Index([c.id for c in chunks], [c.text for c in chunks], [c.metadata for c in chunks])
+        yield lambda: [index.search(query, n_results=10) for query in POLICY_QUERIES]
+    return factory
+
+
+for _size in CORPUS_SIZES:
+    case(f"retrieval.hybrid_search.cold[{_size}]")(_hybrid_case(_size, warm=False))
+    case(f"retrieval.hybrid_search.warm[{_size}]")(_hybrid_case(_size, warm=True))
+    case(f"retrieval.bm25_search[{_size}]")(_bm25_case(_size))
+    for _backend in ("chroma", "mmap"):
+        case(f"retrieval.vector_query.{_backend}[{_size}]")(_vector_query_case(_size, _backend))
+
+
+@case("retrieval.embed_chunks[1k]")
+def _embed_chunks() -> Iterator[Callable]:
+    documents = [chunk.text for chunk in synthetic_policy_chunks(1_000)]
+    yield lambda: vectorstore.embedding_fn(documents)
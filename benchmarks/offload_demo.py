@@ -0,0 +1,113 @@
+"""
+Shows that one slow policy lookup no longer holds up other sessions.
+
+One session's search_damage_policy call is made slow (a blocking sleep inside
+the retrieval, standing in for a stalled embedding request); shortly after
+it starts, --sessions other sessions run ordinary, cached lookups on the same
+event loop. Both modes are run:
+
+    inline   - the blocking search_damage_policy_sync called on the loop (the old tool)
+    offload  - the async search_damage_policy, whose retrieval runs on the I/O pool
+
+and the latency of the other sessions' lookups is reported. Inline, each of
+them waits for the slow one; offloaded, they finish in their own time. The
+script exits with status 1 when the offloaded p95 of the other sessions is
+not below --max-ratio of the slow lookup, so it can gate CI.
+
+    python -m benchmarks.offload_demo
+    python -m benchmarks.offload_demo --sessions 50 --slow-seconds 2
+"""
+import argparse
+import asyncio
+import functools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Must be set before rag.vectorstore is imported (it builds the index at import time)
+os.environ.setdefault("EMBEDDING_PROVIDER", "local")
+os.environ.setdefault("POLICY_INDEX_DIR", os.path.join(tempfile.gettempdir(), "order_support_bench_index"))
+
+from benchmarks.synthetic import FakeToolContext
+from order_support_agent.tools import damage_item_tools
+from rag import retrieval
+
+SLOW_QUERY = "my parcel arrived crushed and soaking wet"
+QUERIES = [
+    "The screen is cracked, can I get a replacement?",
+    "the item arrived broken",
+    "there is a dent on the side",
+    "can I get a refund for the damaged box",
+]
+
+
+def _slowed(search, slow_seconds: float):
+    @functools.wraps(search)
+    def hybrid_search(texts: list[str], top_k: int = 3) -> list[dict]:
+        if SLOW_QUERY in texts:
+            time.sleep(slow_seconds)
+        return search(texts, top_k)
+    return hybrid_search
+
+
+async def _lookup(mode: str, query: str, started: float, delay_s: float) -> float:
+    """One session's policy lookup, arriving `delay_s` after `started`; returns its latency from arrival."""
+    await asyncio.sleep(delay_s)   # wakes late when the loop is blocked, which counts against the latency
+    arrived = started + delay_s
+    context = FakeToolContext({"order_id": "240240"})
+    if mode == "inline":
+        damage_item_tools.search_damage_policy_sync(query, context)
+    else:
+        await damage_item_tools.search_damage_policy(query, context)
+    return time.perf_counter() - arrived
+
+
+async def run_mode(mode: str, sessions: int, arrival_s: float) -> dict:
+    started = time.perf_counter()
+    slow = asyncio.create_task(_lookup(mode, SLOW_QUERY, started, 0.0))
+    others = await asyncio.gather(*(
+        _lookup(mode, QUERIES[i % len(QUERIES)], started, arrival_s) for i in range(sessions)
+    ))
+    others_ms = sorted(seconds * 1000 for seconds in others)
+    return {
+        "mode": mode,
+        "slow_lookup_ms": round(await slow * 1000, 1),
+        "others_p50_ms": round(statistics.median(others_ms), 1),
+        "others_p95_ms": round(others_ms[int(0.95 * (len(others_ms) - 1))], 1),
+        "others_max_ms": round(others_ms[-1], 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20, help="other sessions looking up policy meanwhile")
+    parser.add_argument("--slow-seconds", type=float, default=1.0, help="how long the slow lookup blocks")
+    parser.add_argument("--arrival-ms", type=float, default=10.0, help="when the other sessions arrive")
+    parser.add_argument("--max-ratio", type=float, default=0.25,
+                        help="fail unless offloaded others' p95 stays below this fraction of the slow lookup")
+    args = parser.parse_args()
+
+    for query in QUERIES:   # the other sessions' lookups are cache hits, so only waiting shows up
+        retrieval.hybrid_search([query], top_k=3)
+    damage_item_tools.hybrid_search = _slowed(retrieval.hybrid_search, args.slow_seconds)
+
+    report = [
+        asyncio.run(run_mode(mode, args.sessions, args.arrival_ms / 1000))
+        for mode in ("inline", "offload")
+    ]
+    print(json.dumps(report, indent=2))
+
+    offload = report[-1]
+    limit_ms = args.max_ratio * offload["slow_lookup_ms"]
+    if offload["others_p95_ms"] >= limit_ms:
+        print(f"FAIL: with offloading, other sessions' p95 ({offload['others_p95_ms']} ms) is not below "
+              f"{args.max_ratio:.0%} of the slow lookup ({limit_ms:.1f} ms); other sessions are waiting behind the slow lookup")
+        sys.exit(1)
+    print(f"OK: other sessions' p95 {offload['others_p95_ms']} ms < {limit_ms:.1f} ms while the slow lookup ran")
+
+
+if __name__ == "__main__":
+    main()
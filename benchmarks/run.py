@@ -0,0 +1,164 @@
+"""
+Runs the benchmark cases, saves results as a named baseline and compares
+runs against each other.
+
+Timing uses timeit (best of --repeat rounds, each at least ~0.2 s); memory
+uses tracemalloc on a separate pass so it does not distort the timings.
+Everything runs offline against the local embedding provider and a
+throwaway policy index:
+
+    python -m benchmarks.run --save main
+    python -m benchmarks.run --filter retrieval --compare main
+    python -m benchmarks.run --report main feature-x
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+# Must be set before rag.vectorstore is imported (it builds the index at import time)
+os.environ.setdefault("EMBEDDING_PROVIDER", "local")
+os.environ.setdefault("POLICY_INDEX_DIR", os.path.join(tempfile.gettempdir(), "order_support_bench_index"))
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".baselines")
+
+
+def measure(fn, repeat: int = 5, memory_calls: int = 3) -> dict:
+    """
+    Returns ops/sec from the best timeit round plus tracemalloc figures:
+    peak_bytes (highest traced memory above the starting point during one
+    call) and retained_bytes (memory still held per call afterwards).
+    """
+    fn()   # warm caches, imports and lazily built indexes
+    timer = timeit.Timer(fn)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+
+    tracemalloc.start()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        for _ in range(memory_calls):
+            fn()
+        after, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ops_per_sec": round(1.0 / best, 3) if best else float("inf"),
+        "seconds_per_op": best,
+        "peak_bytes": peak - before,
+        "retained_bytes": (after - before) // memory_calls,
+        "rounds": repeat,
+        "calls_per_round": number,
+    }
+
+
+def run_cases(names: list[str], repeat: int) -> dict:
+    from benchmarks.cases import CASES
+
+    results = {}
+    for name in names:
+        with CASES[name]() as fn:
+            results[name] = measure(fn, repeat=repeat)
+        r = results[name]
+        print(f"{name:<45} {r['ops_per_sec']:>12,.1f} ops/s  peak {r['peak_bytes'] / 1024:>9,.1f} KiB", flush=True)
+    return results
+
+
+def baseline_path(name: str) -> str:
+    return name if name.endswith(".json") else os.path.join(BASELINE_DIR, f"{name}.json")
+
+
+def save_baseline(name: str, results: dict) -> str:
+    os.makedirs(BASELINE_DIR, exist_ok=True)
+    path = baseline_path(name)
+    payload = {
+        "created": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "machine": platform.platform(),
+        "results": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, sort_keys=True)
+    return path
+
+
+def load_baseline(name: str) -> dict:
+    with open(baseline_path(name), "r", encoding="utf-8") as f:
+        return json.load(f)["results"]
+
+
+def _pct(new: float, old: float) -> str:
+    return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+
+def compare(base: dict, head: dict, threshold: float) -> tuple[str, list[str]]:
+    """
+    Renders a table of ops/sec and allocation deltas for the cases present in
+    both runs, and returns it with the names that got slower than `threshold`
+    (a fraction, e.g. 0.1 for 10%).
+    """
+    header = f"{'case':<45} {'base ops/s':>12} {'head ops/s':>12} {'Δ ops/s':>9} {'Δ peak KiB':>11} {'Δ retained B':>13}"
+    lines = [header, "-" * len(header)]
+    regressions = []
+    for name in sorted(set(base) & set(head)):
+        old, new = base[name], head[name]
+        flag = ""
+        if new["ops_per_sec"] < old["ops_per_sec"] * (1 - threshold):
+            flag = "  << slower"
+            regressions.append(name)
+        lines.append(
+            f"{name:<45} {old['ops_per_sec']:>12,.1f} {new['ops_per_sec']:>12,.1f} "
+            f"{_pct(new['ops_per_sec'], old['ops_per_sec']):>9} "
+            f"{(new['peak_bytes'] - old['peak_bytes']) / 1024:>+11,.1f} "
+            f"{new['retained_bytes'] - old['retained_bytes']:>+13,}{flag}"
+        )
+    for name in sorted(set(base) ^ set(head)):
+        lines.append(f"{name:<45} only in {'base' if name in base else 'head'}")
+    return "\n".join(lines), regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this text")
+    parser.add_argument("--list", action="store_true", help="List the cases and exit")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing rounds per case (best is kept)")
+    parser.add_argument("--save", metavar="NAME", help="Save results as benchmarks/.baselines/NAME.json")
+    parser.add_argument("--compare", metavar="NAME", help="Compare this run against a saved baseline")
+    parser.add_argument("--report", nargs=2, metavar=("BASE", "HEAD"), help="Compare two saved baselines without running")
+    parser.add_argument("--threshold", type=float, default=0.10, help="Slowdown fraction reported as a regression")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 when a case regresses")
+    args = parser.parse_args()
+
+    if args.report:
+        base, head = (load_baseline(name) for name in args.report)
+    else:
+        from benchmarks.cases import CASES
+
+        names = [name for name in CASES if args.filter in name]
+        if args.list:
+            print("\n".join(names))
+            return
+        head = run_cases(names, repeat=args.repeat)
+        if args.save:
+            print(f"\nSaved baseline to {save_baseline(args.save, head)}")
+        if not args.compare:
+            return
+        base = load_baseline(args.compare)
+
+    table, regressions = compare(base, head, args.threshold)
+    print("\n" + table)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) slower than {args.threshold:.0%}: {', '.join(regressions)}")
+        if args.fail_on_regression:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Fakes and synthetic data for the benchmarks: a ToolContext stand-in, customer
+message batches, scripted workflow conversations and policy corpora of any size.
+Everything is seeded, so two runs on the same commit see identical inputs.
+"""
+import random
+
+from rag.chunking import PolicyChunk
+
+
+class FakeToolContext:
+    """The parts of ADK's ToolContext the deterministic tools touch: a plain dict as state."""
+
+    def __init__(self, state: dict | None = None):
+        self.state = dict(state or {})
+        self.user_content = None
+        self.function_call_id = "bench"
+        self.invocation_id = "bench"
+
+
+ORDER_ID_FORMS = ["ORDER-{id}", "#{id}", "OR{id}", "{id}", "order {id}"]
+ISSUE_PHRASES = [
+    "my parcel never came", "it says delivered but I didn't receive it", "the package is missing",
+    "the delivery is late", "still waiting for my order", "the item arrived broken",
+    "the screen is cracked", "it's not working at all", "you sent the wrong item",
+    "this is not what i ordered", "I want my money back", "can I get a refund",
+]
+REPLIES = ["yes", "no, not yet", "yeah I checked", "I have", "nope", "refund please", "a replacement would be great"]
+FILLER = [
+    "hi", "hello there", "thanks", "please help", "this is frustrating", "I ordered last week",
+    "it was a gift", "can you check", "as soon as possible", "for my daughter",
+]
+
+
+def synthetic_messages(n: int, seed: int = 7) -> list[str]:
+    """Customer messages mixing order ids, issue phrases, short replies and filler."""
+    rng = random.Random(seed)
+    messages = []
+    for _ in range(n):
+        parts = [rng.choice(FILLER)]
+        roll = rng.random()
+        if roll < 0.4:
+            parts.append(rng.choice(ORDER_ID_FORMS).format(id=rng.randint(1000, 99999999)))
+        if roll < 0.75:
+            parts.append(rng.choice(ISSUE_PHRASES))
+        else:
+            parts.append(rng.choice(REPLIES))
+        rng.shuffle(parts)
+        messages.append(", ".join(parts))
+    return messages
+
+
+# One customer script per workflow, in the order the customer would type it.
+WORKFLOW_CONVERSATIONS = {
+    "not delivered": ["It never arrived", "No, not yet", "I looked everywhere, nothing", "Yes please", "Refund please"],
+    "damaged item": ["The screen is cracked", "Here is the photo", "I'd like a replacement"],
+    "wrong item": ["You sent the wrong item", "I got a blue mug instead of a kettle", "Refund"],
+}
+
+POLICY_VOCABULARY = [
+    "damaged", "broken", "cracked", "scratched", "dent", "screen", "packaging", "courier", "carrier",
+    "refund", "replacement", "exchange", "return", "label", "photo", "evidence", "days", "window",
+    "warranty", "inspection", "minor", "major", "cosmetic", "functional", "defect", "shipping",
+    "fee", "waived", "store", "credit", "original", "payment", "method", "approval", "claim",
+    "customer", "support", "within", "receipt", "delivery", "missing", "investigation", "eligible",
+]
+POLICY_SECTIONS = ["Eligibility", "Minor Damage", "Major Damage", "Evidence", "Refunds", "Replacements", "Exclusions"]
+
+
+def synthetic_policy_chunks(n: int, seed: int = 11, words_per_chunk: int = 60) -> list[PolicyChunk]:
+    """n policy-like chunks spread over n // 20 + 1 synthetic policy documents."""
+    rng = random.Random(seed)
+    chunks = []
+    for i in range(n):
+        source = f"synthetic_policy_{i // 20:04d}.txt"
+        section = rng.choice(POLICY_SECTIONS)
+        body = " ".join(rng.choice(POLICY_VOCABULARY) for _ in range(words_per_chunk))
+        chunks.append(PolicyChunk(
+            id=f"{source}#{i % 20}",
+            text=f"Synthetic Policy {i // 20} / {section}\n{body}",
+            source=source,
+            section=section,
+            revision_year=2020 + i % 6,
+        ))
+    return chunks
+
+
+POLICY_QUERIES = [
+    "screen cracked on arrival", "major broken item refund", "minor scratch cosmetic damage",
+    "packaging damaged by courier", "how many days to return a damaged item", "photo evidence for a claim",
+]
@@ -4,3 +4,96 @@ from dotenv import load_dotenv
 load_dotenv()
 
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+
+# Directory where the Chroma policy index and its content-hash manifest are persisted.
+POLICY_INDEX_DIR = os.getenv("POLICY_INDEX_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "chroma_db"))
+
+# Policy ingestion: upper bound on a chunk's body and on documents per embedding request.
+POLICY_CHUNK_MAX_CHARS = int(os.getenv("POLICY_CHUNK_MAX_CHARS", "800"))
+POLICY_EMBED_BATCH_SIZE = int(os.getenv("POLICY_EMBED_BATCH_SIZE", "64"))
+
+# Embedding backend for the policy index: "google" (text-embedding-004) or "local" (hashed n-gram vectors, no network).
+EMBEDDING_PROVIDER = os.getenv("EMBEDDING_PROVIDER", "google")
+LOCAL_EMBEDDING_DIM = int(os.getenv("LOCAL_EMBEDDING_DIM", "1024"))
+
+# Policy search caches (query embeddings and top-k results); TTL in seconds.
+POLICY_CACHE_SIZE = int(os.getenv("POLICY_CACHE_SIZE", "2048"))
+POLICY_CACHE_TTL_SECONDS = float(os.getenv("POLICY_CACHE_TTL_SECONDS", "3600"))
+
+# Hybrid policy retrieval: candidates taken from each retriever and the reciprocal-rank-fusion constant.
+POLICY_CANDIDATES = int(os.getenv("POLICY_CANDIDATES", "10"))
+POLICY_RRF_K = int(os.getenv("POLICY_RRF_K", "60"))
+
+# Policy vector store: "chroma", or "mmap" for a read-only memory-mapped matrix shared by all worker processes.
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma").lower()
+# Storage type of the mmap index: "int8" (per-row scaled, a quarter of float32) or "float16".
+MMAP_INDEX_DTYPE = os.getenv("MMAP_INDEX_DTYPE", "int8").lower()
+
+# Answer unambiguous turns (bare order id, single clear issue) from templates before calling the LLM.
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() == "true"
+
+# Stream model output token by token (SSE) and announce tool progress in main.py's chat loop.
+STREAMING_ENABLED = os.getenv("STREAMING_ENABLED", "true").lower() == "true"
+
+# Session store: SQLite url, connection pool size, busy timeout and an optional cap on events loaded per session (0 = all).
+SESSION_DB_URL = os.getenv("SESSION_DB_URL", "sqlite:///my_agent_data.db")
+SESSION_POOL_SIZE = int(os.getenv("SESSION_POOL_SIZE", "5"))
+SQLITE_BUSY_TIMEOUT_MS = int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000"))
+SESSION_MAX_EVENTS = int(os.getenv("SESSION_MAX_EVENTS", "0"))
+
+# Upper bound on the serialized session state (order records, current order id); older orders are evicted first.
+SESSION_STATE_BUDGET_BYTES = int(os.getenv("SESSION_STATE_BUDGET_BYTES", "4096"))
+
+# Sharded serving: worker processes (sessions are consistent-hashed onto them) and turns in flight per worker.
+SERVING_WORKERS = int(os.getenv("SERVING_WORKERS", str(os.cpu_count() or 1)))
+SERVING_WORKER_CONCURRENCY = int(os.getenv("SERVING_WORKER_CONCURRENCY", "32"))
+
+# Per-turn guard: model steps, tool executions and wall time one turn may use; memoize identical tool calls within a turn.
+TURN_MAX_MODEL_CALLS = int(os.getenv("TURN_MAX_MODEL_CALLS", "8"))
+TURN_MAX_TOOL_CALLS = int(os.getenv("TURN_MAX_TOOL_CALLS", "12"))
+TURN_DEADLINE_SECONDS = float(os.getenv("TURN_DEADLINE_SECONDS", "60"))
+TOOL_MEMOIZATION_ENABLED = os.getenv("TOOL_MEMOIZATION_ENABLED", "true").lower() == "true"
+
+# Bulk ticket triage: tool worker processes, tickets per work unit and agent escalations in flight.
+TRIAGE_WORKERS = int(os.getenv("TRIAGE_WORKERS", str(os.cpu_count() or 1)))
+TRIAGE_CHUNK_SIZE = int(os.getenv("TRIAGE_CHUNK_SIZE", "200"))
+TRIAGE_ESCALATION_CONCURRENCY = int(os.getenv("TRIAGE_ESCALATION_CONCURRENCY", "16"))
+
+# Order lookups: "local" (SQLite stand-in seeded from order_support_agent/data/orders.json) or "http" (ORDER_API_URL).
+ORDER_BACKEND = os.getenv("ORDER_BACKEND", "local")
+ORDER_API_URL = os.getenv("ORDER_API_URL", "http://localhost:8080")
+ORDER_DB_PATH = os.getenv("ORDER_DB_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "orders.db"))
+ORDER_POOL_SIZE = int(os.getenv("ORDER_POOL_SIZE", "4"))
+# Demo only: status the local backend reports for order ids it does not have (unset: they are not found).
+ORDER_DEFAULT_STATUS = os.getenv("ORDER_DEFAULT_STATUS") or None
+ORDER_STATUS_TTL_SECONDS = float(os.getenv("ORDER_STATUS_TTL_SECONDS", "60"))
+ORDER_BATCH_WINDOW_MS = float(os.getenv("ORDER_BATCH_WINDOW_MS", "5"))
+
+# Threads that run blocking I/O (policy search, order lookups) off the event loop; further calls queue.
+TOOL_IO_THREADS = int(os.getenv("TOOL_IO_THREADS", "16"))
+
+# Image damage analysis: images analyzed concurrently per tool call and result cache lifetime (keyed by image hash).
+DAMAGE_ANALYSIS_CONCURRENCY = int(os.getenv("DAMAGE_ANALYSIS_CONCURRENCY", "4"))
+DAMAGE_ANALYSIS_CACHE_TTL_SECONDS = float(os.getenv("DAMAGE_ANALYSIS_CACHE_TTL_SECONDS", "86400"))
+
+# Instrumentation: per-turn JSONL log, Prometheus textfile snapshot and /metrics port (empty / 0 = disabled).
+METRICS_TURN_LOG = os.getenv("METRICS_TURN_LOG", "")
+METRICS_PROM_FILE = os.getenv("METRICS_PROM_FILE", "")
+METRICS_PORT = int(os.getenv("METRICS_PORT", "0"))
+
+# Model response cache: "off", "cache" (read-through), "record" (always call and store) or "replay" (fail on a miss).
+LLM_CACHE_MODE = os.getenv("LLM_CACHE_MODE", "off").lower()
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", "llm_cache.db")
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL_SECONDS", "86400"))
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# In replay mode, sleep for the latency recorded with each response.
+LLM_CACHE_REPLAY_LATENCY = os.getenv("LLM_CACHE_REPLAY_LATENCY", "false").lower() == "true"
+
+# Shared Gemini quota for all agents and the embedding client, adaptive concurrency bounds and retry backoff.
+GEMINI_RPM = float(os.getenv("GEMINI_RPM", "1000"))
+GEMINI_TPM = float(os.getenv("GEMINI_TPM", "4000000"))
+GEMINI_MIN_CONCURRENCY = int(os.getenv("GEMINI_MIN_CONCURRENCY", "4"))
+GEMINI_MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "64"))
+LLM_RETRY_DEADLINE_SECONDS = float(os.getenv("LLM_RETRY_DEADLINE_SECONDS", "60"))
+LLM_RETRY_BASE_DELAY_SECONDS = float(os.getenv("LLM_RETRY_BASE_DELAY_SECONDS", "1"))
+LLM_RETRY_MAX_DELAY_SECONDS = float(os.getenv("LLM_RETRY_MAX_DELAY_SECONDS", "20"))
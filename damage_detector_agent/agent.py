@@ -1,20 +1,31 @@
+from typing import Literal
+
 from google.adk.agents import LlmAgent
 from google.adk.apps import App, ResumabilityConfig
 from google.adk.models import Gemini
 from google.genai import types
+from pydantic import BaseModel, Field
+
 from config import GOOGLE_API_KEY
 
-retry_config = types.HttpRetryOptions(
-    attempts=5,  # Maximum retry attempts
-    exp_base=7,  # Delay multiplier
-    initial_delay=1,
-    http_status_codes=[429, 500, 503, 504],  # Retry on these HTTP errors
-)
+# Retries are coordinated process-wide by runtime.rate_limit (jittered backoff with a deadline),
+# so the SDK makes a single attempt instead of retrying each request on its own.
+retry_config = types.HttpRetryOptions(attempts=1)
+
+
+class DamageAnalysis(BaseModel):
+    """Structured result of analyzing one product image."""
+    damage_type: str = Field(description="Main damage type, e.g. scratch, crack, dent, shattered, water damage, none")
+    severity: Literal["none", "minor", "major", "critical"] = Field(description="Overall damage severity")
+    affected_area: str = Field(description="Part of the product that is damaged, e.g. screen, corner, packaging")
+    confidence: float = Field(ge=0.0, le=1.0, description="Confidence in the assessment between 0 and 1")
+    summary: str = Field(description="One short sentence describing the damage")
+
 
 # Create image damage analysis agent
 image_damage_analysis_agent = LlmAgent(
     name="image_damage_analysis_agent",
-    model=Gemini(model="gemini-2.5-flash-lite"),
+    model=Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config),
     instruction="""You are a specialized image damage analysis agent. Your primary function is to analyze uploaded images to assess damage in products or items.
 
     Your capabilities:
@@ -24,7 +35,10 @@ image_damage_analysis_agent = LlmAgent(
     4. Generate a short summary describing the damage with relevant details. 
 
     Always provide clear, actionable feedback to users about the damage detected.
+    Respond only with the structured fields: damage_type, severity (none, minor, major or critical),
+    affected_area, confidence (0-1) and a one-sentence summary.
     """,
+    output_schema=DamageAnalysis,
     # tools=[FunctionTool(func=analyze_damage_image)],
 )
 
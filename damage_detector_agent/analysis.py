@@ -0,0 +1,92 @@
+import asyncio
+import hashlib
+import uuid
+
+from google.adk.runners import InMemoryRunner
+from google.genai import types
+
+from config import DAMAGE_ANALYSIS_CACHE_TTL_SECONDS, DAMAGE_ANALYSIS_CONCURRENCY
+from damage_detector_agent.agent import DamageAnalysis, image_damage_analysis_agent
+from rag.cache import TTLCache
+from runtime.instrumentation import metrics_plugin
+
+SEVERITY_RANK = {"none": 0, "minor": 1, "major": 2, "critical": 3}
+
+# The same photo is often re-sent within a conversation; results are keyed by content hash.
+analysis_cache = TTLCache(maxsize=2048, ttl=DAMAGE_ANALYSIS_CACHE_TTL_SECONDS)
+
+_runner: InMemoryRunner | None = None
+_semaphore: asyncio.Semaphore | None = None
+_semaphore_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _get_runner() -> InMemoryRunner:
+    global _runner
+    if _runner is None:
+        _runner = InMemoryRunner(agent=image_damage_analysis_agent, app_name="damage_detector", plugins=[metrics_plugin])
+    return _runner
+
+
+def _get_semaphore() -> asyncio.Semaphore:
+    # One semaphore per event loop, shared by every tool call on that loop.
+    global _semaphore, _semaphore_loop
+    loop = asyncio.get_running_loop()
+    if _semaphore is None or _semaphore_loop is not loop:
+        _semaphore, _semaphore_loop = asyncio.Semaphore(DAMAGE_ANALYSIS_CONCURRENCY), loop
+    return _semaphore
+
+
+def _cache_key(image: types.Part) -> str | None:
+    """Content hash of inline bytes, or the URI of a file reference; None (not cached) for anything else."""
+    if image.inline_data and image.inline_data.data:
+        return hashlib.sha256(image.inline_data.data).hexdigest()
+    if image.file_data and image.file_data.file_uri:
+        return f"uri:{image.file_data.file_uri}"
+    return None
+
+
+async def analyze_image(image: types.Part) -> DamageAnalysis:
+    """Runs the damage detector agent on one image part and returns its structured output."""
+    key = _cache_key(image)
+    cached = analysis_cache.get(key) if key else None
+    if cached is not None:
+        return cached
+
+    runner = _get_runner()
+    user_id, session_id = "damage_detector", uuid.uuid4().hex
+    async with _get_semaphore():
+        await runner.session_service.create_session(app_name=runner.app_name, user_id=user_id, session_id=session_id)
+        try:
+            message = types.Content(role="user", parts=[image, types.Part(text="Analyze the damage in this image.")])
+            text = ""
+            async for event in runner.run_async(user_id=user_id, session_id=session_id, new_message=message):
+                if event.is_final_response() and event.content and event.content.parts:
+                    text = "".join(part.text or "" for part in event.content.parts)
+        finally:
+            await runner.session_service.delete_session(app_name=runner.app_name, user_id=user_id, session_id=session_id)
+
+    result = DamageAnalysis.model_validate_json(text)
+    if key:
+        analysis_cache.put(key, result)
+    return result
+
+
+async def analyze_images(images: list[types.Part]) -> list[DamageAnalysis | Exception]:
+    """
+    Analyzes several images concurrently (at most DAMAGE_ANALYSIS_CONCURRENCY at
+    a time), so a multi-photo claim costs about one model round trip.
+    Failures are returned in place of the result instead of failing the batch.
+    """
+    return await asyncio.gather(*(analyze_image(image) for image in images), return_exceptions=True)
+
+
+def aggregate(results: list[DamageAnalysis]) -> dict:
+    """Compact per-order view: worst severity across photos plus one line per photo."""
+    worst = max(results, key=lambda r: (SEVERITY_RANK[r.severity], r.confidence))
+    return {
+        "severity": worst.severity,
+        "damage_type": worst.damage_type,
+        "affected_area": worst.affected_area,
+        "confidence": round(worst.confidence, 2),
+        "summary": "; ".join(f"{r.severity} {r.damage_type} on {r.affected_area}" for r in results),
+    }
@@ -1,51 +1,45 @@
-from google.adk.tools import ToolContext
-
-
-def damaged_item_workflow(tool_context: ToolContext, user_query: str):
-    # Step 1: Check if severity already known
-    severity = tool_context.state.get("damage:severity")
-
-    # Ask user for description only once
-    if not severity:
-        tool_context.state["workflow"] = "in progress"
-        tool_context.state["substep"] = "check_severity"
-        return {
-            "action": "ask_user",
-            "message": "I'm sorry to hear the item arrived damaged. Could you describe the damage?"
-        }
-    else:
-        tool_context.state["substep"] = "check_image"
-
-
-    # Step 2: Infer severity using classify_damage tool
-    if severity is None and tool_context.state.get("substep") == "check_severity":
-        tool_context.state["substep"] = "check_image"
-        return {
+# Workflow for items that arrived damaged: describe -> photo -> policy lookup -> resolution.
+DAMAGED_ITEM_WORKFLOW = {
+    "name": "damaged_item",
+    "issue_type": "damaged item",
+    "initial": "describe_damage",
+    "steps": {
+        # Step 1 - severity from the customer's description (same keywords as classify_damage)
+        "describe_damage": {
+            "message": "I'm sorry to hear the item arrived damaged. Could you describe the damage?",
+            "transitions": [
+                {"on": "damage:minor", "to": "request_photo", "set": {"severity": "minor", "description": "$message"}},
+                {"on": "damage:major", "to": "request_photo", "set": {"severity": "major", "description": "$message"}},
+                {"on": "any", "to": "request_photo", "set": {"severity": "unsure", "description": "$message"}},
+            ],
+        },
+        # Step 2 - photo evidence is required by the damaged product policy
+        "request_photo": {
+            "message": "Thank you. Could you upload a photo of the damage? Photos are required for all damage claims.",
+            "transitions": [
+                {"on": "any", "to": "policy_retrieval"},
+            ],
+        },
+        # Step 3 - RAG retrieval based on severity
+        "policy_retrieval": {
             "action": "tool_call",
-            "tool": "classify_damage",
-            "args": {"user_query": user_query}
-        }
-
-    if tool_context.state.get("substep")== "check_image":
-        tool_context.state["substep"] = "policy_retrieval"
-        return {
-            "action" : "tool_call",
-            "tool" : "image_detector_tool",
-            "args" : {"user_query" : user_query}
-        }
-
-    # Step 3: RAG retrieval based on severity
-    if (tool_context.state["damage:severity"] == "minor" or tool_context.state["damage:severity"] == "major") and tool_context.state.get("substep")=="policy_retrieval":
-        tool_context.state["user_confirmation"] = True
-        return {
-            "next_step": "tool_call",
-            "tool" : "search_damage_policy",
-            "args": {"user_query": user_query, "damage_analysis" : tool_context.state.get("damage_analysis_results")}
-        }
-    #
-    if tool_context.state.get("user_confirmation"):
-        return {
-            "next_step" : "tool_call",
-            "instruction" : "user_confirmed_resolution",
-            "args": {"user_query" : user_query}
-        }
+            "tool": "search_damage_policy",
+            "args": {"query": "{severity} damage: {description}", "damage_analysis": "{damage_summary}"},
+            "message": "Look up the damaged product policy for this {severity} damage, explain the options, "
+                       "and ask whether the customer prefers a replacement or a refund.",
+            "reprompt": "Based on our policy, would you prefer a replacement or a refund?",
+            "transitions": [
+                {"on": "resolution:refund", "to": "refund_confirmed", "set": {"resolution": "refund"}},
+                {"on": "resolution:replacement", "to": "replacement_confirmed", "set": {"resolution": "replacement"}},
+            ],
+        },
+        "refund_confirmed": {
+            "terminal": True,
+            "message": "Understood — I'll process a refund for the damaged item according to the policy.",
+        },
+        "replacement_confirmed": {
+            "terminal": True,
+            "message": "Great — I'll arrange a replacement for the damaged item. You'll receive updates shortly.",
+        },
+    },
+}
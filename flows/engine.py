@@ -0,0 +1,220 @@
+import re
+from collections import deque
+from dataclasses import dataclass, field, replace
+
+from order_support_agent.session_state import OrderState, SessionState, WorkflowStatus
+from order_support_agent.tools.intent_matcher import KEYWORD_TABLES, analyze_message
+
+# Transition value that is replaced by the customer's message when the transition fires.
+MESSAGE_PLACEHOLDER = "$message"
+
+
+@dataclass(frozen=True)
+class Transition:
+    on: str                     # "any", a matcher label such as "confirmation:yes", or a workflow intent
+    to: str
+    set: dict = field(default_factory=dict)
+    message: str | None = None  # overrides the target step's message for this transition
+
+
+@dataclass(frozen=True)
+class Step:
+    name: str
+    message: str = ""
+    action: str = "ask_user"    # "ask_user" | "tool_call" | "workflow_completed"
+    tool: str | None = None
+    args: dict = field(default_factory=dict)
+    reprompt: str | None = None
+    transitions: tuple[Transition, ...] = ()
+    terminal: bool = False
+
+
+class Workflow:
+    """
+    A workflow state machine defined as data.
+
+    Steps are looked up by name and each step only evaluates its own, usually
+    two or three, transitions, so a turn costs one matcher pass plus a dict
+    lookup. Progress (step, workflow status, variables) lives in the order's
+    record in session state together with the name of the workflow that
+    wrote it. Several workflows share step names (choose_resolution,
+    refund_confirmed, ...), so a workflow only resumes progress it owns;
+    after a switch of order or issue type it starts from its initial step.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        issue_type: str,
+        initial: str,
+        steps: list[Step],
+        intents: dict[str, list[str]] | None = None,
+        requires_status: str | None = None,
+    ):
+        self.name = name
+        self.issue_type = issue_type
+        self.initial = initial
+        self.requires_status = requires_status
+        self.steps = {step.name: step for step in steps}
+        self.intents = {
+            intent: re.compile(
+                r"(?<!\w)(?:" + "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True)) + r")(?!\w)",
+                re.IGNORECASE,
+            )
+            for intent, keywords in (intents or {}).items()
+        }
+        self.validate()
+
+    @classmethod
+    def from_dict(cls, spec: dict) -> "Workflow":
+        steps = [
+            Step(
+                name=name,
+                message=step.get("message", ""),
+                action=step.get("action", "workflow_completed" if step.get("terminal") else "ask_user"),
+                tool=step.get("tool"),
+                args=step.get("args", {}),
+                reprompt=step.get("reprompt"),
+                transitions=tuple(Transition(**t) for t in step.get("transitions", [])),
+                terminal=step.get("terminal", False),
+            )
+            for name, step in spec["steps"].items()
+        ]
+        return cls(
+            name=spec["name"],
+            issue_type=spec["issue_type"],
+            initial=spec["initial"],
+            steps=steps,
+            intents=spec.get("intents"),
+            requires_status=spec.get("requires_status"),
+        )
+
+    def _is_known_intent(self, intent: str) -> bool:
+        if intent == "any" or intent in self.intents:
+            return True
+        kind, _, label = intent.partition(":")
+        return label in KEYWORD_TABLES.get(kind, {})
+
+    def validate(self) -> None:
+        """Raises ValueError for unknown targets/intents, unreachable steps and dead ends."""
+        problems = []
+        if self.initial not in self.steps:
+            problems.append(f"initial step '{self.initial}' is not defined")
+        for step in self.steps.values():
+            if not step.terminal and not step.transitions:
+                problems.append(f"step '{step.name}' is not terminal but has no transitions")
+            if step.action == "tool_call" and not step.tool:
+                problems.append(f"step '{step.name}' is a tool_call without a tool")
+            for transition in step.transitions:
+                if transition.to not in self.steps:
+                    problems.append(f"step '{step.name}' transitions to unknown step '{transition.to}'")
+                if not self._is_known_intent(transition.on):
+                    problems.append(f"step '{step.name}' uses unknown intent '{transition.on}'")
+        if problems:
+            raise ValueError(f"Invalid workflow '{self.name}': " + "; ".join(problems))
+
+        reachable, queue = {self.initial}, deque([self.initial])
+        while queue:
+            for transition in self.steps[queue.popleft()].transitions:
+                if transition.to not in reachable:
+                    reachable.add(transition.to)
+                    queue.append(transition.to)
+        problems += [f"step '{name}' is unreachable" for name in self.steps if name not in reachable]
+
+        # Dead ends: steps from which no terminal step can be reached.
+        can_finish = {name for name, step in self.steps.items() if step.terminal}
+        changed = True
+        while changed:
+            changed = False
+            for name, step in self.steps.items():
+                if name not in can_finish and any(t.to in can_finish for t in step.transitions):
+                    can_finish.add(name)
+                    changed = True
+        problems += [f"step '{name}' can never reach a terminal step" for name in self.steps if name not in can_finish]
+        if problems:
+            raise ValueError(f"Invalid workflow '{self.name}': " + "; ".join(problems))
+
+    def _matches(self, transition: Transition, labels: set[str], user_message: str) -> bool:
+        if transition.on == "any" or transition.on in labels:
+            return True
+        pattern = self.intents.get(transition.on)
+        return bool(pattern and pattern.search(user_message))
+
+    def _owns(self, order: OrderState) -> bool:
+        if order.flow is not None:
+            return order.flow == self.name
+        # Records written before the workflow name was stored: the issue picked this workflow
+        return order.issue is not None and order.issue.label == self.issue_type
+
+    def _enter(
+        self, session: SessionState, order_id: str, order: OrderState, step: Step, user_message: str,
+        message: str | None = None,
+    ) -> dict:
+        order = session.save(order_id, replace(
+            order, substep=step.name, flow=self.name,
+            workflow=WorkflowStatus.COMPLETED if step.terminal else WorkflowStatus.IN_PROGRESS,
+        ))
+        context = {key: value for key, value in order.template_variables().items() if value is not None}
+        context.update(user_message=user_message, order_id=order_id)
+        response = {
+            "action": step.action,
+            "requires_user_response": not step.terminal,
+            "message": (message or step.message).format_map(_Defaults(context)),
+        }
+        if step.tool:
+            response["tool"] = step.tool
+            response["args"] = {k: str(v).format_map(_Defaults(context)) for k, v in step.args.items()}
+        return response
+
+    def run(self, state, order_id: str, user_message: str) -> dict:
+        """
+        Advances the workflow for one customer message.
+
+        Args:
+            state: Session state (tool_context.state).
+            order_id: Order the workflow runs for; its record holds the progress.
+            user_message: The customer's latest message.
+
+        Returns:
+            dict with "action", "requires_user_response", "message" and, for
+            tool_call steps, "tool" and "args".
+        """
+        session = SessionState(state)
+        order = session.order(order_id)
+        current = self.steps.get(order.substep) if self._owns(order) else None
+        if current is None:
+            status = order.status.label if order.status else None
+            if self.requires_status and status != self.requires_status:
+                return {
+                    "status": "error",
+                    "message": f"The {self.name} workflow only applies to orders with status '{self.requires_status}'.",
+                }
+            # Another workflow's variables (resolution, ...) must not leak into this one's messages
+            return self._enter(session, order_id, replace(order, vars={}), self.steps[self.initial], user_message)
+        if current.terminal:
+            return self._enter(session, order_id, order, current, user_message)
+
+        analysis = analyze_message(user_message)
+        labels = {f"{kind}:{analysis.best(kind)[0]}" for kind in KEYWORD_TABLES if analysis.labels(kind)}
+        for transition in current.transitions:
+            if self._matches(transition, labels, user_message):
+                variables = dict(order.vars)
+                for name, value in transition.set.items():
+                    variables[name] = user_message if value == MESSAGE_PLACEHOLDER else value
+                return self._enter(
+                    session, order_id, replace(order, vars=variables), self.steps[transition.to], user_message,
+                    transition.message,
+                )
+
+        return {
+            "action": "ask_user",
+            "requires_user_response": True,
+            "message": current.reprompt or current.message,
+        }
+
+
+class _Defaults(dict):
+    """format_map helper: unknown placeholders render as empty strings instead of raising."""
+
+    def __missing__(self, key):
+        return ""
@@ -0,0 +1,10 @@
+from flows.damaged_item_workflow import DAMAGED_ITEM_WORKFLOW
+from flows.engine import Workflow
+from flows.not_delivered_workflow import NOT_DELIVERED_WORKFLOW
+from flows.wrong_item_workflow import WRONG_ITEM_WORKFLOW
+
+# Adding a workflow: write a spec module next to these and list it here.
+# Every spec is validated when this module is imported.
+WORKFLOW_SPECS = [NOT_DELIVERED_WORKFLOW, DAMAGED_ITEM_WORKFLOW, WRONG_ITEM_WORKFLOW]
+
+WORKFLOWS_BY_ISSUE = {workflow.issue_type: workflow for workflow in map(Workflow.from_dict, WORKFLOW_SPECS)}
@@ -0,0 +1,32 @@
+# Workflow for customers who received a different item than they ordered.
+WRONG_ITEM_WORKFLOW = {
+    "name": "wrong_item",
+    "issue_type": "wrong item",
+    "requires_status": "delivered",
+    "initial": "describe_item",
+    "steps": {
+        "describe_item": {
+            "message": "I'm sorry you received the wrong item. Could you tell me what you received instead?",
+            "transitions": [
+                {"on": "any", "to": "choose_resolution", "set": {"received_item": "$message"}},
+            ],
+        },
+        "choose_resolution": {
+            "message": "Thanks. Return shipping for the wrong item is free. "
+                       "Would you prefer a replacement with the correct item or a refund?",
+            "reprompt": "Would you prefer a replacement with the correct item or a refund?",
+            "transitions": [
+                {"on": "resolution:refund", "to": "refund_confirmed", "set": {"resolution": "refund"}},
+                {"on": "resolution:replacement", "to": "replacement_confirmed", "set": {"resolution": "replacement"}},
+            ],
+        },
+        "refund_confirmed": {
+            "terminal": True,
+            "message": "Understood — I'll send you a free return label and refund the order once the item is back.",
+        },
+        "replacement_confirmed": {
+            "terminal": True,
+            "message": "Great — I'll ship the correct item and send you a free return label for the wrong one.",
+        },
+    },
+}
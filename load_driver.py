@@ -0,0 +1,198 @@
+"""
+Replays scripted conversations across many concurrent sessions and reports
+throughput and per-turn latency percentiles.
+
+By default every agent runs on StubLlm and the policy index uses the local
+embedding provider, so no network calls are made:
+
+    python load_driver.py --sessions 200 --concurrency 50
+    python load_driver.py --conversations conversations.jsonl --db-url sqlite:///load_test.db
+    python load_driver.py --workers 4 --db-url sqlite:///load_test.db --sessions 400
+"""
+import argparse
+import asyncio
+import functools
+import itertools
+import json
+import math
+import os
+import time
+
+os.environ.setdefault("EMBEDDING_PROVIDER", "local")
+
+from google.adk.runners import Runner
+from google.adk.sessions import InMemorySessionService
+from google.genai import types
+
+from damage_detector_agent.agent import image_damage_analysis_agent
+from order_support_agent.agent import order_support_app
+from order_support_agent.fast_path import try_fast_path
+from runtime.serving import ShardedTurnRouter
+from runtime.session_store import create_session_service
+from runtime.stub_llm import use_stub_models
+
+DEFAULT_CONVERSATIONS = [
+    ["Where is my order ORDER-240240", "It never came", "Yes please", "Yes, I checked with neighbours", "Yes", "Refund please"],
+    ["Hi, my order #123456 arrived broken", "The screen is cracked", "I'd like a replacement"],
+    ["My parcel never came", "ORDER-98765", "No, not yet", "Replacement"],
+    ["Can you help me with order 55501?", "It's the wrong item", "I want a refund"],
+]
+
+
+def load_conversations(path: str | None) -> list[list[str]]:
+    """
+    Reads one conversation per JSONL line: {"turns": [...]} for scripted
+    multi-turn conversations, or {"text": ...} / {"body": ...} for single-turn
+    messages (the shape of ticket and request exports).
+    """
+    if not path:
+        return DEFAULT_CONVERSATIONS
+    conversations = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            turns = record.get("turns") or [record.get("text") or record.get("body")]
+            conversations.append([turn for turn in turns if turn])
+    return [c for c in conversations if c]
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def run_conversation(runner: Runner, user_id: str, session_id: str, turns: list[str], fast_path: bool) -> list[dict]:
+    session_service = runner.session_service
+    await session_service.create_session(app_name=runner.app_name, user_id=user_id, session_id=session_id)
+    timings = []
+    for text in turns:
+        started = time.perf_counter()
+        route = "llm"
+        try:
+            routed = await try_fast_path(
+                session_service, runner.app_name, user_id, session_id, text, author=runner.agent.name,
+            ) if fast_path else None
+            if routed:
+                route = "fast_path"
+            else:
+                message = types.Content(role="user", parts=[types.Part(text=text)])
+                async for _ in runner.run_async(user_id=user_id, session_id=session_id, new_message=message):
+                    pass
+            error = None
+        except Exception as e:   # keep the run going; failures are reported in the summary
+            error = f"{type(e).__name__}: {e}"
+        timings.append({"latency": time.perf_counter() - started, "route": route, "error": error})
+    return timings
+
+
+async def run_sharded_conversation(
+    router: ShardedTurnRouter, user_id: str, session_id: str, turns: list[str], fast_path: bool,
+) -> list[dict]:
+    timings = []
+    for text in turns:
+        started = time.perf_counter()
+        try:
+            await router.submit(user_id, session_id, text, fast_path=fast_path)
+            error = None
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        timings.append({"latency": time.perf_counter() - started, "route": "sharded", "error": error})
+    return timings
+
+
+async def run_load(
+    runner: Runner | ShardedTurnRouter,
+    conversations: list[list[str]],
+    sessions: int,
+    concurrency: int,
+    users: int,
+    fast_path: bool,
+) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    run_id = time.strftime("%Y%m%d%H%M%S")
+    scripts = itertools.cycle(conversations)
+
+    conversation = run_sharded_conversation if isinstance(runner, ShardedTurnRouter) else run_conversation
+
+    async def one(index: int, turns: list[str]):
+        async with semaphore:
+            return await conversation(
+                runner, f"load-user-{index % users}", f"load-{run_id}-{index}", turns, fast_path,
+            )
+
+    started = time.perf_counter()
+    results = await asyncio.gather(*(one(i, next(scripts)) for i in range(sessions)))
+    elapsed = time.perf_counter() - started
+
+    turns = [t for session in results for t in session]
+    latencies = sorted(t["latency"] for t in turns)
+    errors = [t["error"] for t in turns if t["error"]]
+    return {
+        "sessions": sessions,
+        "concurrency": concurrency,
+        "turns": len(turns),
+        "fast_path_turns": sum(t["route"] == "fast_path" for t in turns),
+        "errors": len(errors),
+        "first_errors": errors[:5],
+        "elapsed_s": round(elapsed, 3),
+        "turns_per_s": round(len(turns) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "p50": round(percentile(latencies, 50) * 1000, 2),
+            "p95": round(percentile(latencies, 95) * 1000, 2),
+            "p99": round(percentile(latencies, 99) * 1000, 2),
+            "max": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        },
+    }
+
+
+def _stub_app(app, **stub_kwargs):
+    # Module-level so sharded workers can unpickle it
+    use_stub_models(app.root_agent, **stub_kwargs)
+    use_stub_models(image_damage_analysis_agent, **stub_kwargs)   # run by image_detector_tool, not an AgentTool
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conversations", help="JSONL file of scripted conversations")
+    parser.add_argument("--sessions", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--users", type=int, default=50, help="distinct user ids to spread sessions over")
+    parser.add_argument("--db-url", default="memory", help="'memory' or a session store url, e.g. sqlite:///load_test.db")
+    parser.add_argument("--stub-latency-ms", type=float, default=50.0)
+    parser.add_argument("--real-llm", action="store_true", help="call Gemini instead of the stub model")
+    parser.add_argument("--no-fast-path", action="store_true")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="serve through N session-sharded worker processes (needs a persistent --db-url)")
+    args = parser.parse_args()
+
+    stub = None if args.real_llm else functools.partial(
+        _stub_app, latency_s=args.stub_latency_ms / 1000, jitter_s=args.stub_latency_ms / 4000,
+    )
+    if args.workers:
+        runner = ShardedTurnRouter(workers=args.workers, db_url=args.db_url, setup=stub)
+    else:
+        if stub:
+            stub(order_support_app)
+        session_service = InMemorySessionService() if args.db_url == "memory" else create_session_service(db_url=args.db_url)
+        runner = Runner(app=order_support_app, session_service=session_service)
+
+    report = asyncio.run(run_load(
+        runner,
+        load_conversations(args.conversations),
+        sessions=args.sessions,
+        concurrency=args.concurrency,
+        users=args.users,
+        fast_path=not args.no_fast_path,
+    ))
+    if args.workers:
+        runner.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
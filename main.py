@@ -1,14 +1,19 @@
 import asyncio
 from google.adk.runners import Runner
-from google.adk.sessions import DatabaseSessionService
 from google.genai import types
 
 from order_support_agent.agent import order_support_app
-import sqlite3
-from config import GOOGLE_API_KEY
+from order_support_agent.fast_path import try_fast_path
+from runtime.instrumentation import InstrumentedSessionService
+from runtime.metrics import metrics, start_http_server
+from runtime.serving import session_locks
+from runtime.session_store import create_session_service
+from runtime.streaming import stream_turn
+from config import GOOGLE_API_KEY, FAST_PATH_ENABLED, SESSION_DB_URL, METRICS_PORT, STREAMING_ENABLED
 
-db_url = "sqlite:///my_agent_data.db"
-session_service=DatabaseSessionService(db_url=db_url)
+db_url = SESSION_DB_URL
+# Session reads/writes are timed alongside tools and model calls
+session_service=InstrumentedSessionService(create_session_service(db_url=db_url))
 # Create runner with the resumable app
 runner = Runner(
         app=order_support_app,  # Pass the app instead of the agent
@@ -20,6 +25,9 @@ async def run_session(
     runner_instance: Runner,
     user_queries: list[str] | str = None,
     session_name: str = "default",
+    fast_path: bool = FAST_PATH_ENABLED,
+    user_id: str = USER_ID,
+    stream: bool = STREAMING_ENABLED,
 ):
     print(f"\n ### Session: {session_name}")
 
@@ -28,14 +36,14 @@ async def run_session(
 
     # Attempt to create a new session or retrieve an existing one
     existing = await session_service.get_session(
-        app_name=app_name, user_id=USER_ID, session_id=session_name
+        app_name=app_name, user_id=user_id, session_id=session_name
     )
 
     if existing:
         session = existing
     else:
         session = await session_service.create_session(
-            app_name=app_name, user_id=USER_ID, session_id=session_name
+            app_name=app_name, user_id=user_id, session_id=session_name
         )
 
     # Process queries if provided
@@ -48,39 +56,59 @@ async def run_session(
         for query in user_queries:
             print(f"\nUser > {query}")
 
-            # Convert the query string to the ADK Content format
-            query = types.Content(role="user", parts=[types.Part(text=query)])
+            # Print text deltas and tool progress as they arrive instead of whole events
+            if stream:
+                print("{model}> ", end="", flush=True)
+                async for chunk in stream_turn(runner_instance, user_id, session.id, query, fast_path=fast_path):
+                    if chunk.kind == "text":
+                        print(chunk.text, end="", flush=True)
+                    elif chunk.kind == "tool_progress":
+                        print(f"\n  [{chunk.text}]", flush=True)
+                    elif chunk.kind == "done":
+                        if chunk.extra.get("route"):
+                            metrics.inc("fast_path_turns_total", help="Turns answered without a model call",
+                                        route=chunk.extra["route"])
+                        print("" if chunk.text else "model dint respond")
+                continue
 
-            # Stream the agent's response asynchronously
-            async for event in runner_instance.run_async(
-                user_id=USER_ID, session_id=session.id, new_message=query
-            ):
-                # Check if the event contains valid content
-                if event.content and event.content.parts:
-                    # Filter out empty or "None" responses before printing
-                    if (
-                        event.content.parts[0].text != "None"
-                        and event.content.parts[0].text
-                    ):
-                        print("{model}>", event.content.parts[0].text)
-                        # return event.content.parts[0].text
-                    else:
-                        print("model dint respond")
+            # One turn at a time per session; concurrent callers queue here
+            async with session_locks.hold(app_name, user_id, session.id):
+                # Simple, unambiguous turns are answered from templates without a model call
+                if fast_path:
+                    routed = await try_fast_path(
+                        session_service, app_name, user_id, session.id, query,
+                        author=runner_instance.agent.name,
+                    )
+                    if routed:
+                        metrics.inc("fast_path_turns_total", help="Turns answered without a model call", route=routed.route)
+                        print("{model}>", routed.reply)
+                        continue
+
+                # Convert the query string to the ADK Content format
+                query = types.Content(role="user", parts=[types.Part(text=query)])
+
+                # Stream the agent's response asynchronously
+                async for event in runner_instance.run_async(
+                    user_id=user_id, session_id=session.id, new_message=query
+                ):
+                    # Check if the event contains valid content
+                    if event.content and event.content.parts:
+                        # Filter out empty or "None" responses before printing
+                        if (
+                            event.content.parts[0].text != "None"
+                            and event.content.parts[0].text
+                        ):
+                            print("{model}>", event.content.parts[0].text)
+                            # return event.content.parts[0].text
+                        else:
+                            print("model dint respond")
 
     else:
         print("No queries!")
 
-# Execute the async function
-asyncio.run(run_session(runner_instance=runner, user_queries=["Where is my order ORDER-240240"],session_name="session1"))
-
-def check_data_in_db():
-    with sqlite3.connect("my_agent_data.db") as connection:
-        cursor = connection.cursor()
-        result = cursor.execute(
-            "select app_name, session_id, author, content from events"
-        )
-        print([_[0] for _ in result.description])
-        for each in result.fetchall():
-            print(each)
 
-# check_data_in_db()
\ No newline at end of file
+if __name__ == "__main__":
+    if METRICS_PORT:
+        start_http_server(metrics, METRICS_PORT)
+    # Execute the async function
+    asyncio.run(run_session(runner_instance=runner, user_queries=["Where is my order ORDER-240240"],session_name="session1"))
@@ -0,0 +1,151 @@
+import uuid
+from dataclasses import dataclass
+
+from google.adk.events import Event, EventActions
+from google.adk.sessions import BaseSessionService
+from google.genai import types
+
+from order_support_agent.session_state import SessionState, WorkflowStatus
+from order_support_agent.tools.extract_information import extract_order_id, detect_issue_type
+from order_support_agent.tools.intent_matcher import analyze_message
+from order_support_agent.tools.order_details import map_issue_to_valid_status
+
+# Messages longer than this usually carry more than one request; leave them to the model.
+MAX_FAST_PATH_WORDS = 20
+
+ISSUE_PHRASES = {
+    "not delivered": "your order hasn't arrived",
+    "late delivery": "your order is running late",
+    "damaged item": "your item arrived damaged",
+    "wrong item": "you received the wrong item",
+    "refund": "you'd like a refund",
+}
+
+TEMPLATES = {
+    "ask_issue": "Thanks! I've noted order {order_id}. Could you tell me what issue you're facing with it?",
+    "ask_order_id": "I'm sorry to hear {issue_phrase}. Could you please share your order ID so I can look into it?",
+    "confirm_issue": (
+        "I'm sorry to hear {issue_phrase}. I've checked order {order_id} and our system shows it as {status}. "
+        "Would you like me to start resolving this for you?"
+    ),
+}
+
+
+class _StateContext:
+    """Minimal stand-in for ToolContext: the deterministic tools only read and write `.state`."""
+
+    def __init__(self, state: dict):
+        self.state = dict(state)
+
+
+@dataclass
+class FastPathResult:
+    reply: str
+    route: str
+    state_delta: dict
+
+
+async def route_message(state: dict, user_message: str) -> FastPathResult | None:
+    """
+    Answers a turn without the model when the message is unambiguous.
+
+    Handled turns: a bare order id before the issue is known, a single clear
+    issue description when the order id is known (or still missing), and a
+    message carrying both. Anything else - an in-progress workflow, several order
+    ids or issue types, confirmations, long messages - returns None so the
+    caller falls back to the LLM agent.
+
+    Args:
+        state: Current session state.
+        user_message: The customer's text.
+
+    Returns:
+        FastPathResult with the reply and the state changes to persist, or None.
+    """
+    if len(user_message.split()) > MAX_FAST_PATH_WORDS:
+        return None
+    if SessionState(state).order().workflow is WorkflowStatus.IN_PROGRESS:
+        return None
+
+    analysis = analyze_message(user_message)
+    kinds = {m.kind for m in analysis.matches}
+    if kinds - {"order_id", "issue", "damage"} or ("damage" in kinds and "issue" not in kinds):
+        return None
+    order_id, order_confidence = analysis.best("order_id")
+    issue_type, issue_confidence = analysis.best("issue")
+    if (order_id and order_confidence < 1.0) or (issue_type and issue_confidence < 1.0):
+        return None
+
+    known_order_id = SessionState(state).current_order_id
+    if order_id and known_order_id and order_id != known_order_id:
+        return None   # switching orders mid-conversation needs the model's judgement
+    if not order_id and not issue_type:
+        return None
+
+    context = _StateContext(state)
+    session = SessionState(context.state)
+    if order_id:
+        extract_order_id(context, user_message)
+    current_order = session.current_order_id
+    if issue_type:
+        if current_order and session.order(current_order).issue:
+            return None   # issue already recorded; a new one is a change of topic
+        detect_issue_type(context, user_message)
+
+    order = session.order(current_order)
+    issue = order.issue.label if order.issue else None
+    if not current_order:
+        route, reply = "ask_order_id", TEMPLATES["ask_order_id"].format(issue_phrase=ISSUE_PHRASES[issue_type])
+    elif not issue:
+        route, reply = "ask_issue", TEMPLATES["ask_issue"].format(order_id=current_order)
+    elif order.status:
+        return None   # everything is known already; the next step belongs to the workflows
+    else:
+        result = await map_issue_to_valid_status(context, issue)
+        if result.get("status") != "success":
+            return None
+        route = "confirm_issue"
+        reply = TEMPLATES["confirm_issue"].format(
+            issue_phrase=ISSUE_PHRASES.get(issue, "about the problem"),
+            order_id=current_order,
+            status=result["valid_statuses"],
+        )
+
+    delta = {key: value for key, value in context.state.items() if state.get(key) != value or key not in state}
+    return FastPathResult(reply=reply, route=route, state_delta=delta)
+
+
+async def try_fast_path(
+    session_service: BaseSessionService,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    user_message: str,
+    author: str,
+) -> FastPathResult | None:
+    """
+    Routes one turn through route_message and, when it applies, records the
+    user message and the templated reply as session events so the LLM sees
+    the same history and state on the next turn.
+    """
+    session = await session_service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+    if session is None:
+        return None
+    result = await route_message(session.state, user_message)
+    if result is None:
+        return None
+
+    invocation_id = f"fastpath-{uuid.uuid4().hex}"
+    await session_service.append_event(session, Event(
+        invocation_id=invocation_id,
+        author="user",
+        content=types.Content(role="user", parts=[types.Part(text=user_message)]),
+    ))
+    await session_service.append_event(session, Event(
+        invocation_id=invocation_id,
+        author=author,
+        content=types.Content(role="model", parts=[types.Part(text=result.reply)]),
+        actions=EventActions(state_delta=result.state_delta),
+        turn_complete=True,
+    ))
+    return result
@@ -0,0 +1,217 @@
+import asyncio
+import json
+import os
+import queue
+import sqlite3
+from abc import ABC, abstractmethod
+from dataclasses import dataclass
+
+from config import (
+    ORDER_API_URL,
+    ORDER_BACKEND,
+    ORDER_BATCH_WINDOW_MS,
+    ORDER_DB_PATH,
+    ORDER_DEFAULT_STATUS,
+    ORDER_POOL_SIZE,
+    ORDER_STATUS_TTL_SECONDS,
+)
+from rag.cache import TTLCache
+from runtime.offload import run_blocking
+
+SEED_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "orders.json")
+
+
+@dataclass(frozen=True)
+class OrderRecord:
+    order_id: str
+    status: str
+    updated_at: str | None = None
+
+
+class OrderRepository(ABC):
+    """Source of truth for orders. Implementations must support batched lookups."""
+
+    @abstractmethod
+    async def get_orders(self, order_ids: list[str]) -> dict[str, OrderRecord]:
+        """Returns the records that exist, keyed by order id; unknown ids are simply absent."""
+
+    async def get_order(self, order_id: str) -> OrderRecord | None:
+        return (await self.get_orders([order_id])).get(order_id)
+
+    async def close(self) -> None:
+        pass
+
+
+class SQLiteOrderRepository(OrderRepository):
+    """
+    Local stand-in for the order system, backed by a SQLite file seeded from
+    data/orders.json. Queries run on the shared I/O thread pool
+    (runtime.offload) over a small connection pool so they never block the
+    event loop.
+
+    Orders missing from the table are absent from get_orders, like on the
+    real backend. For demos, `default_status` (e.g. "delivered") reports it
+    for any unknown id instead.
+    """
+
+    def __init__(self, path: str, pool_size: int = 4, default_status: str | None = None):
+        self.path = path
+        self.default_status = default_status
+        self._pool: queue.Queue[sqlite3.Connection] = queue.Queue()
+        for _ in range(pool_size):
+            connection = sqlite3.connect(path, check_same_thread=False, timeout=5)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._pool.put(connection)
+        self._seed()
+
+    def _seed(self) -> None:
+        connection = self._pool.get()
+        try:
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS orders ("
+                    "order_id TEXT PRIMARY KEY, status TEXT NOT NULL, updated_at TEXT)"
+                )
+                if os.path.exists(SEED_FILE):
+                    with open(SEED_FILE, "r", encoding="utf-8") as f:
+                        rows = [(o["order_id"], o["status"], o.get("updated_at")) for o in json.load(f)]
+                    connection.executemany("INSERT OR IGNORE INTO orders VALUES (?, ?, ?)", rows)
+        finally:
+            self._pool.put(connection)
+
+    def _query(self, order_ids: list[str]) -> dict[str, OrderRecord]:
+        connection = self._pool.get()
+        try:
+            placeholders = ", ".join("?" * len(order_ids))
+            rows = connection.execute(
+                f"SELECT order_id, status, updated_at FROM orders WHERE order_id IN ({placeholders})",
+                order_ids,
+            ).fetchall()
+        finally:
+            self._pool.put(connection)
+        records = {row[0]: OrderRecord(*row) for row in rows}
+        if self.default_status:
+            for order_id in order_ids:
+                records.setdefault(order_id, OrderRecord(order_id, self.default_status))
+        return records
+
+    async def get_orders(self, order_ids: list[str]) -> dict[str, OrderRecord]:
+        if not order_ids:
+            return {}
+        return await run_blocking(self._query, order_ids)
+
+    async def close(self) -> None:
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+
+class HttpOrderRepository(OrderRepository):
+    """
+    Client for the order service: GET {base_url}/orders?ids=a,b returning
+    [{"order_id", "status", "updated_at"}]. One pooled httpx client is shared
+    by all lookups.
+    """
+
+    def __init__(self, base_url: str, pool_size: int = 10, timeout_s: float = 2.0):
+        import httpx
+        self._client = httpx.AsyncClient(
+            base_url=base_url.rstrip("/"),
+            timeout=timeout_s,
+            limits=httpx.Limits(max_connections=pool_size, max_keepalive_connections=pool_size),
+        )
+
+    async def get_orders(self, order_ids: list[str]) -> dict[str, OrderRecord]:
+        if not order_ids:
+            return {}
+        response = await self._client.get("/orders", params={"ids": ",".join(order_ids)})
+        response.raise_for_status()
+        return {
+            str(o["order_id"]): OrderRecord(str(o["order_id"]), o["status"], o.get("updated_at"))
+            for o in response.json()
+        }
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+
+class OrderStatusService:
+    """
+    Cached, coalescing front for an OrderRepository.
+
+    - Statuses are cached per order id for `ttl` seconds.
+    - Concurrent lookups of the same order share one in-flight future.
+    - Lookups arriving within `batch_window_s` of each other are sent to the
+      repository as a single batched call.
+    """
+
+    def __init__(self, repository: OrderRepository, ttl: float = 60.0, batch_window_s: float = 0.005):
+        self.repository = repository
+        self.batch_window_s = batch_window_s
+        self.cache = TTLCache(maxsize=10000, ttl=ttl)
+        self.fetches = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._in_flight: dict[str, asyncio.Future] = {}
+        self._pending: list[str] = []
+
+    def _bind_loop(self) -> None:
+        # Futures belong to one loop; start clean if called from a new one (e.g. a second asyncio.run).
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop, self._in_flight, self._pending = loop, {}, []
+
+    async def _flush(self) -> None:
+        await asyncio.sleep(self.batch_window_s)
+        order_ids, self._pending = self._pending, []
+        self.fetches += 1
+        try:
+            records = await self.repository.get_orders(order_ids)
+        except Exception as e:
+            for order_id in order_ids:
+                future = self._in_flight.pop(order_id)
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for order_id in order_ids:
+            record = records.get(order_id)
+            if record is not None:
+                self.cache.put(order_id, record)
+            future = self._in_flight.pop(order_id)
+            if not future.done():
+                future.set_result(record)
+
+    async def get_order(self, order_id: str) -> OrderRecord | None:
+        record = self.cache.get(order_id)
+        if record is not None:
+            return record
+        self._bind_loop()
+        future = self._in_flight.get(order_id)
+        if future is None:
+            future = self._loop.create_future()
+            self._in_flight[order_id] = future
+            self._pending.append(order_id)
+            if len(self._pending) == 1:
+                self._loop.create_task(self._flush())
+        return await asyncio.shield(future)
+
+    async def get_status(self, order_id: str) -> str | None:
+        record = await self.get_order(order_id)
+        return record.status if record else None
+
+    def invalidate(self, order_id: str | None = None) -> None:
+        if order_id is None:
+            self.cache.clear()
+        else:
+            self.cache.delete(order_id)
+
+
+def create_order_repository() -> OrderRepository:
+    if ORDER_BACKEND == "http":
+        return HttpOrderRepository(ORDER_API_URL, pool_size=ORDER_POOL_SIZE)
+    return SQLiteOrderRepository(ORDER_DB_PATH, pool_size=ORDER_POOL_SIZE, default_status=ORDER_DEFAULT_STATUS)
+
+
+order_status_service = OrderStatusService(
+    create_order_repository(),
+    ttl=ORDER_STATUS_TTL_SECONDS,
+    batch_window_s=ORDER_BATCH_WINDOW_MS / 1000,
+)
@@ -0,0 +1,272 @@
+"""
+Typed, compact session state.
+
+Everything the tools and workflows know about an order lives in one record
+under "order:<order_id>", stored with short keys and enum codes:
+
+    {"order_id": "240240",
+     "order:240240": {"i": "di", "s": "dl", "w": "ip", "st": "policy_retrieval", "f": "damaged_item",
+                      "d": {"is": "ma", "t": "crack", "a": "screen"},
+                      "p": ["damaged_product_policy.txt#3"], "v": {"resolution": "refund"}, "u": 1718000000}}
+
+Policy clauses are referenced by chunk id, never copied into state. Each
+write re-checks the session against SESSION_STATE_BUDGET_BYTES and evicts
+the least recently updated other orders, then trims free text, to stay under it.
+"""
+import json
+import time
+from dataclasses import dataclass, field, replace
+from enum import Enum
+
+from config import SESSION_STATE_BUDGET_BYTES
+from runtime.metrics import metrics
+
+CURRENT_ORDER_KEY = "order_id"
+PENDING_ISSUE_KEY = "pending_issue"
+ORDER_KEY_PREFIX = "order:"
+# ADK keeps these scopes outside the session row, so they do not count against the budget.
+UNBUDGETED_PREFIXES = ("app:", "user:", "temp:")
+MAX_TEXT_CHARS = 160
+
+
+class CodedEnum(str, Enum):
+    """Stored as a short code, presented (to tools, templates and the model) as its label."""
+
+    def __new__(cls, code: str, label: str):
+        member = str.__new__(cls, code)
+        member._value_ = code
+        member.label = label
+        return member
+
+    @classmethod
+    def parse(cls, value):
+        """Accepts a member, its code or its label; anything else returns None."""
+        if value is None or isinstance(value, cls):
+            return value
+        for member in cls:
+            if value == member.value or value == member.label:
+                return member
+        return None
+
+
+class Issue(CodedEnum):
+    NOT_DELIVERED = ("nd", "not delivered")
+    LATE_DELIVERY = ("ld", "late delivery")
+    DAMAGED_ITEM = ("di", "damaged item")
+    WRONG_ITEM = ("wi", "wrong item")
+    REFUND = ("rf", "refund")
+    GENERAL_INQUIRY = ("gi", "general inquiry")
+
+
+class OrderStatus(CodedEnum):
+    DELIVERED = ("dl", "delivered")
+    IN_TRANSIT = ("it", "in_transit")
+    PROCESSING = ("pr", "processing")
+    CANCELLED = ("cx", "cancelled")
+
+
+class WorkflowStatus(CodedEnum):
+    IN_PROGRESS = ("ip", "in_progress")
+    COMPLETED = ("ok", "completed")
+
+
+class Severity(CodedEnum):
+    NONE = ("n", "none")
+    MINOR = ("mi", "minor")
+    MAJOR = ("ma", "major")
+    CRITICAL = ("cr", "critical")
+    UNSURE = ("un", "unsure")
+
+
+def _label(member: CodedEnum | None) -> str | None:
+    return member.label if member is not None else None
+
+
+def _drop_empty(record: dict) -> dict:
+    return {key: value for key, value in record.items() if value not in (None, "", (), [], {})}
+
+
+@dataclass(frozen=True)
+class DamageInfo:
+    image_severity: Severity | None = None    # from the image analysis
+    policy_severity: Severity | None = None   # minor / major / unsure, as classify_damage decided
+    damage_type: str | None = None
+    affected_area: str | None = None
+    detail: str | None = None                 # damage term from the customer's description
+    summary: str | None = None                # one line per analysed photo
+
+    def to_compact(self) -> dict:
+        return _drop_empty({
+            "is": self.image_severity.value if self.image_severity else None,
+            "ps": self.policy_severity.value if self.policy_severity else None,
+            "t": self.damage_type, "a": self.affected_area, "x": self.detail, "s": self.summary,
+        })
+
+    @classmethod
+    def from_compact(cls, data: dict | None) -> "DamageInfo":
+        data = data or {}
+        return cls(
+            image_severity=Severity.parse(data.get("is")), policy_severity=Severity.parse(data.get("ps")),
+            damage_type=data.get("t"), affected_area=data.get("a"), detail=data.get("x"), summary=data.get("s"),
+        )
+
+
+@dataclass(frozen=True)
+class OrderState:
+    issue: Issue | None = None
+    status: OrderStatus | None = None
+    workflow: WorkflowStatus | None = None
+    substep: str | None = None
+    flow: str | None = None                   # name of the workflow that substep and vars belong to
+    damage: DamageInfo = field(default_factory=DamageInfo)
+    policy_refs: tuple[str, ...] = ()
+    vars: dict = field(default_factory=dict)  # workflow variables set by transitions
+    updated: int = 0
+
+    def to_compact(self) -> dict:
+        return _drop_empty({
+            "i": self.issue.value if self.issue else None,
+            "s": self.status.value if self.status else None,
+            "w": self.workflow.value if self.workflow else None,
+            "st": self.substep,
+            "f": self.flow,
+            "d": self.damage.to_compact(),
+            "p": list(self.policy_refs),
+            "v": _drop_empty(self.vars),
+            "u": self.updated,
+        })
+
+    @classmethod
+    def from_compact(cls, data: dict | None) -> "OrderState":
+        data = data or {}
+        return cls(
+            issue=Issue.parse(data.get("i")),
+            status=OrderStatus.parse(data.get("s")),
+            workflow=WorkflowStatus.parse(data.get("w")),
+            substep=data.get("st"),
+            flow=data.get("f"),
+            damage=DamageInfo.from_compact(data.get("d")),
+            policy_refs=tuple(data.get("p", ())),
+            vars=dict(data.get("v", {})),
+            updated=data.get("u", 0),
+        )
+
+    def template_variables(self) -> dict:
+        """Readable values for workflow message and tool-argument templates."""
+        return {
+            **self.vars,
+            "issue_type": _label(self.issue),
+            "order_status": _label(self.status),
+            "workflow": _label(self.workflow),
+            "substep": self.substep,
+            "damage_severity": _label(self.damage.image_severity),
+            "damage_type": self.damage.damage_type,
+            "affected_area": self.damage.affected_area,
+            "damage_summary": self.damage.summary,
+        }
+
+
+def _as_dict(state) -> dict:
+    # ADK's State exposes to_dict(); plain dicts are accepted for offline use.
+    return state.to_dict() if hasattr(state, "to_dict") else dict(state)
+
+
+def order_key(order_id: str) -> str:
+    return f"{ORDER_KEY_PREFIX}{order_id}"
+
+
+def state_size(state) -> int:
+    """Serialized size in bytes of the session-scoped state."""
+    values = {
+        key: value for key, value in _as_dict(state).items()
+        if value is not None and not key.startswith(UNBUDGETED_PREFIXES)
+    }
+    return len(json.dumps(values, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+
+
+class SessionState:
+    """
+    Typed view over tool_context.state (or any dict).
+
+    Records are immutable; change one with update() or save() so the new
+    value is assigned to its key and lands in the event's state delta.
+    """
+
+    def __init__(self, state, budget_bytes: int = SESSION_STATE_BUDGET_BYTES):
+        self.state = state
+        self.budget_bytes = budget_bytes
+
+    @property
+    def current_order_id(self) -> str | None:
+        return self.state.get(CURRENT_ORDER_KEY)
+
+    @current_order_id.setter
+    def current_order_id(self, order_id: str | None) -> None:
+        self.state[CURRENT_ORDER_KEY] = order_id
+
+    @property
+    def pending_issue(self) -> Issue | None:
+        """Issue reported before the order id was known."""
+        return Issue.parse(self.state.get(PENDING_ISSUE_KEY))
+
+    @pending_issue.setter
+    def pending_issue(self, issue: Issue | None) -> None:
+        self.state[PENDING_ISSUE_KEY] = issue.value if issue else None
+
+    def order(self, order_id: str | None = None) -> OrderState:
+        """The record for order_id (default: the current order); an empty record if there is none."""
+        order_id = order_id or self.current_order_id
+        if not order_id:
+            return OrderState()
+        return OrderState.from_compact(self.state.get(order_key(order_id)))
+
+    def orders(self) -> dict[str, OrderState]:
+        return {
+            key[len(ORDER_KEY_PREFIX):]: OrderState.from_compact(value)
+            for key, value in _as_dict(self.state).items()
+            if key.startswith(ORDER_KEY_PREFIX) and isinstance(value, dict)
+        }
+
+    def save(self, order_id: str, order: OrderState) -> OrderState:
+        order = replace(order, updated=int(time.time()))
+        self.state[order_key(order_id)] = order.to_compact()
+        self.enforce_budget()
+        return order
+
+    def update(self, order_id: str | None = None, **changes) -> OrderState:
+        """Applies field changes to an order's record; a no-op without an order id."""
+        order_id = order_id or self.current_order_id
+        if not order_id:
+            return OrderState()
+        order = self.order(order_id)
+        if "issue" in changes and Issue.parse(changes["issue"]) is not order.issue:
+            # A different issue is handled by a different workflow; the old one's progress must not carry over
+            changes = {"workflow": None, "substep": None, "flow": None, "vars": {}, **changes}
+        return self.save(order_id, replace(order, **changes))
+
+    def enforce_budget(self) -> None:
+        if state_size(self.state) <= self.budget_bytes:
+            return
+        current = self.current_order_id
+        others = sorted(
+            ((order_id, order) for order_id, order in self.orders().items() if order_id != current),
+            key=lambda item: item[1].updated,
+        )
+        for order_id, _ in others:
+            # ADK state deltas cannot delete keys; None is dropped from the budget and the model's view.
+            self.state[order_key(order_id)] = None
+            metrics.inc("session_state_evictions_total", help="Order records evicted to fit the state budget")
+            if state_size(self.state) <= self.budget_bytes:
+                return
+
+        if current:
+            order = self.order(current)
+            trimmed = replace(
+                order,
+                damage=replace(order.damage, summary=None),
+                policy_refs=order.policy_refs[:3],
+                vars={k: v[:MAX_TEXT_CHARS] if isinstance(v, str) else v for k, v in order.vars.items()},
+            )
+            self.state[order_key(current)] = trimmed.to_compact()
+        if state_size(self.state) > self.budget_bytes:
+            metrics.inc("session_state_over_budget_total", help="Writes that left a session over the state budget")
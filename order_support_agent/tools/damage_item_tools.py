@@ -1,6 +1,16 @@
+from dataclasses import replace
+from typing import Optional
+
 from google.adk.tools import ToolContext
 
-from rag.vectorstore import collection
+from damage_detector_agent.analysis import aggregate, analyze_images
+from order_support_agent.session_state import SessionState, Severity
+from order_support_agent.tools.intent_matcher import analyze_message
+from rag.retrieval import hybrid_search
+from runtime.offload import run_blocking
+
+# Image severities mapped onto the two levels the damaged product policy defines
+POLICY_SEVERITY = {Severity.MINOR: Severity.MINOR, Severity.MAJOR: Severity.MAJOR, Severity.CRITICAL: Severity.MAJOR}
 
 
 def classify_damage(tool_context: ToolContext, user_query: str) -> dict:
@@ -8,33 +18,82 @@ def classify_damage(tool_context: ToolContext, user_query: str) -> dict:
     Classifies the severity of a damaged item based on user description.
     Returns: { severity: minor | major | unsure }
     """
-    text = user_query.lower()
-
-    if any(x in text for x in ["cracked", "chip", "scratched", "small dent"]):
-        severity = "minor"
-        damage = next((x for x in ["cracked", "chip", "scratched", "small dent"] if x in text), None)
-    elif any(x in text for x in ["broken", "shattered", "completely damaged", "not working", "dead"]):
-        severity = "major"
-        damage = next((x for x in ["broken", "shattered", "completely damaged", "not working", "dead"] if x in text), None)
-    else:
-        severity = "unsure"
-        damage = None
-    tool_context.state["damage:severity"] = severity
-    tool_context.state["damage"] = damage
-    return {"severity": severity}
-
-
-
-def search_damage_policy(query: str, tool_context: ToolContext, damage_analysis:str="") -> dict:
-    results = collection.query(query_texts=[query, damage_analysis], n_results=3)
-    matches = results["documents"][0]
-    tool_context.state["policy_info"] = " ".join(matches)
+    # Damage terms live in intent_matcher.DAMAGE_KEYWORDS; minor terms take precedence
+    analysis = analyze_message(user_query)
+    severity = analysis.damage_severity or "unsure"
+    damage = analysis.first_text("damage", severity)
+    source = "description"
+
+    # Fall back to the structured image analysis when the description is not conclusive
+    session = SessionState(tool_context.state)
+    order = session.order()
+    if severity == "unsure" and order.damage.image_severity in POLICY_SEVERITY:
+        severity = POLICY_SEVERITY[order.damage.image_severity].label
+        damage = order.damage.damage_type
+        source = "image"
+
+    session.update(damage=replace(order.damage, policy_severity=Severity.parse(severity), detail=damage))
+    return {"severity": severity, "source": source}
+
+
+
+def _image_analysis_text(session: SessionState) -> str:
+    """The structured image analysis fields, searched when no analysis text was passed."""
+    damage = session.order().damage
+    return " ".join(
+        value for value in (
+            damage.image_severity.label if damage.image_severity else None, damage.damage_type, damage.affected_area,
+        ) if value
+    )
+
+
+def _policy_result(session: SessionState, hits: list[dict]) -> dict:
+    matches = [
+        {
+            "id": hit["id"],
+            "source": hit["metadata"].get("source"),
+            "section": hit["metadata"].get("section"),
+            "text": hit["document"],
+            "score": hit["score"],
+        }
+        for hit in hits
+    ]
+    # Only the chunk ids are kept in state; the text goes to the model in this response
+    session.update(policy_refs=tuple(hit["id"] for hit in hits))
     return {
         "matches": matches,
-        "policy_summary": "\n".join(matches)
+        "policy_summary": "\n".join(hit["document"] for hit in hits)
     }
 
 
+async def search_damage_policy(query: str, tool_context: ToolContext, damage_analysis:str="") -> dict:
+    """
+    Retrieves the policy clauses relevant to the customer's damage complaint.
+
+    Args:
+        query: The customer's question or description of the damage.
+        damage_analysis: Optional damage analysis text, searched together with the query.
+
+    Returns:
+        dict: {"matches": [{"id", "source", "section", "text", "score"}], "policy_summary": str}
+    """
+    session = SessionState(tool_context.state)
+    damage_analysis = damage_analysis or _image_analysis_text(session)
+    # Both texts are searched with vector + keyword retrieval and fused into a
+    # single ranked, deduplicated list; blank texts are skipped. The vector
+    # query may embed over the network, so it runs on the I/O pool; state is
+    # only touched here on the event loop.
+    hits = await run_blocking(hybrid_search, [query, damage_analysis], top_k=3)
+    return _policy_result(session, hits)
+
+
+def search_damage_policy_sync(query: str, tool_context: ToolContext, damage_analysis: str = "") -> dict:
+    """Blocking variant of search_damage_policy for callers without an event loop (bulk triage, benchmarks)."""
+    session = SessionState(tool_context.state)
+    hits = hybrid_search([query, damage_analysis or _image_analysis_text(session)], top_k=3)
+    return _policy_result(session, hits)
+
+
 def user_confirmed_resolution(tool_context: ToolContext, query: str) -> dict:
     text = query.lower()
     solution = ""
@@ -50,17 +109,49 @@ def user_confirmed_resolution(tool_context: ToolContext, query: str) -> dict:
             "possible_solution" : tool_context.state.get()
         }
 
-def image_detector_tool(image: bytes, tool_context: ToolContext) -> dict:
+# Optional[...] rather than `| None`: ADK's function-declaration parser rejects union syntax for list parameters
+async def image_detector_tool(tool_context: ToolContext, artifact_names: Optional[list[str]] = None) -> dict:
     """
-    A tool to detect objects present in an uploaded image.
+    Analyzes the damage shown in the images the customer uploaded.
+    Call it once per message, even when several photos were uploaded: all images
+    in the user's message (and any named artifacts) are analyzed together.
 
     Args:
-        image: The raw bytes of the image to analyze.
+        artifact_names: Optional names of previously saved image artifacts to include.
 
     Returns:
-        A dictionary containing the detected objects.
+        A dictionary with the overall severity, damage type, affected area and
+        confidence, plus a compact per-image list.
     """
-    from damage_detector_agent.agent import image_damage_analysis_agent
-    ai_gen_response = image_damage_analysis_agent.run(image)
-    tool_context.state["damage_analysis_results"].append(ai_gen_response)
-    return {"issue_summary_from_uploaded_image": ai_gen_response}
\ No newline at end of file
+    images = [
+        part for part in (tool_context.user_content.parts if tool_context.user_content else None) or []
+        if part.inline_data and (part.inline_data.mime_type or "").startswith("image/")
+    ]
+    for name in artifact_names or []:
+        part = await tool_context.load_artifact(name)
+        if part is not None:
+            images.append(part)
+    if not images:
+        return {"status": "error", "message": "No image was found. Ask the customer to upload a photo of the damage."}
+
+    results = await analyze_images(images)
+    analyses = [r for r in results if not isinstance(r, Exception)]
+    if not analyses:
+        return {"status": "error", "message": "The images could not be analyzed. Ask the customer to try another photo."}
+
+    overall = aggregate(analyses)
+    session = SessionState(tool_context.state)
+    session.update(damage=replace(
+        session.order().damage,
+        image_severity=Severity.parse(overall["severity"]),
+        damage_type=overall["damage_type"],
+        affected_area=overall["affected_area"],
+        summary=overall["summary"],
+    ))
+    return {
+        "status": "success",
+        "images_analyzed": len(analyses),
+        "images_failed": len(results) - len(analyses),
+        **overall,
+        "per_image": [a.model_dump(exclude={"summary"}) for a in analyses],
+    }
@@ -1,14 +1,9 @@
-import re
 from typing import Any, Dict
 
 from google.adk.tools import ToolContext
 
-ISSUE_KEYWORDS = {
-    "not delivered": ["not received", "didn't arrive", "never came", "never got it"],
-    "late delivery": ["late", "delayed", "taking too long", "waiting long"],
-    "damaged item": ["broken", "damaged", "cracked", "defective"],
-    "wrong item": ["wrong", "different item", "not what I ordered"],
-    "refund": ["refund", "return money", "need my money back"]}
+from order_support_agent.session_state import Issue, SessionState
+from order_support_agent.tools.intent_matcher import analyze_message
 
 
 def extract_order_id(tool_context: ToolContext, user_query:str) -> dict:
@@ -31,14 +26,14 @@ def extract_order_id(tool_context: ToolContext, user_query:str) -> dict:
         }
     """
 
-    # Example patterns: OR12345, ORDER-1234, #12345, 123-456
-    match = re.search(r"(?:OR|ORDER[- ]?|#?)(\d{4,12})", user_query, re.IGNORECASE)
-    if match:
-        tool_context.state["order_id"] = match.group(1)
-        if  tool_context.state.get("pending_issues"):
-            tool_context.state[f"order:{tool_context.state.get('order_id')}:issue_type"] = tool_context.state.get("pending_issues")
-            tool_context.state["pending_issues"] = None
-        return {"order_id": match.group(1), "is_valid" : True}
+    order_id = analyze_message(user_query).order_id
+    if order_id:
+        session = SessionState(tool_context.state)
+        session.current_order_id = order_id
+        if session.pending_issue:
+            session.update(order_id, issue=session.pending_issue)
+            session.pending_issue = None
+        return {"order_id": order_id, "is_valid" : True}
     return {"order_id": None, "is_valid":False, "message": "Could you please provide a valid order ID?"}
 
 
@@ -53,7 +48,7 @@ def detect_issue_type(
     facing with their order — for example: "not delivered", "late delivery",
     "damaged item", "wrong item", "refund", or a general inquiry.
 
-    Use extract_order_id to identify the Order ID. If a recognized issue type is found, it is saved in `session.state["order_issue"]`.
+    Use extract_order_id to identify the Order ID. If a recognized issue type is found, it is saved on the order's record in session state.
     If no known issue type is detected, the state value remains unset and the tool
     returns an indication that the issue is unknown.
 
@@ -65,31 +60,17 @@ def detect_issue_type(
             - "issue_type": detected issue type or None
             - "status": "success" (issue detected) or "unknown" (no match found)
     """
-    # Mapping of keywords to issue types
-    issue_keywords = {
-        "not delivered": ["didn't arrive", "not delivered", "never came", "didn't receive", "missing"],
-        "late delivery": ["late", "delayed", "still waiting"],
-        "damaged item": ["broken", "damaged", "cracked", "defective", "not working"],
-        "wrong item": ["wrong item", "different item", "incorrect item"],
-        "refund": ["refund", "return my money", "money back", "cancel order", "return request"],
-    }
-
-    detected_issue = None
-    lower_query = user_query.lower()
-
-    # Look for matching keywords
-    for issue_type, keywords in issue_keywords.items():
-        if any(keyword in lower_query for keyword in keywords):
-            detected_issue = issue_type
-            break
+    # Keywords live in intent_matcher.ISSUE_KEYWORDS; the first issue type listed there wins
+    detected_issue, confidence = analyze_message(user_query).best("issue")
 
     # Update session state only if issue detected
     if detected_issue:
-        if not tool_context.state.get("order_id"):
-            tool_context.state["pending_issues"] = detected_issue
+        session = SessionState(tool_context.state)
+        if not session.current_order_id:
+            session.pending_issue = Issue.parse(detected_issue)
             return {"status": "error", "message": "Order ID is missing. Please ask for the Order ID", "issue_type":None}
-        tool_context.state[f"order:{tool_context.state.get('order_id')}:issue_type"] = detected_issue
-        return {"status": "success", "issue_type": detected_issue}
+        session.update(issue=Issue.parse(detected_issue))
+        return {"status": "success", "issue_type": detected_issue, "confidence": confidence}
 
     return {"status": "error", "message":"I have saved your order ID. Could you tell me what issue you are facing?"}
 
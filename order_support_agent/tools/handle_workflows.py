@@ -1,7 +1,7 @@
 from google.adk.tools import ToolContext
 
-from flows.damaged_item_workflow import damaged_item_workflow
-from flows.not_delivered_workflow import handle_not_delivered_workflow_for_agent
+from flows.registry import WORKFLOWS_BY_ISSUE
+from order_support_agent.session_state import SessionState
 
 
 def handle_workflows(tool_context : ToolContext, user_message:str) -> dict:
@@ -13,9 +13,11 @@ def handle_workflows(tool_context : ToolContext, user_message:str) -> dict:
     :return:
     based on the issue type identified, assigned workflow will be invoked to resolve the issue.
     """
-    order_id = tool_context.state.get("order_id")
-    issue_type = tool_context.state.get(f"order:{order_id}:issue_type")
-    status = tool_context.state.get(f"order:{order_id}:order_status")
+    session = SessionState(tool_context.state)
+    order_id = session.current_order_id
+    order = session.order(order_id)
+    issue_type = order.issue.label if order.issue else None
+    status = order.status.label if order.status else None
 
     # Check missing information
     if not order_id or not issue_type or not status:
@@ -24,8 +26,11 @@ def handle_workflows(tool_context : ToolContext, user_message:str) -> dict:
             "message": "All required information to process the request is still not complete"
         }
 
-    if issue_type == "not delivered":
-        # Call workflow programmatically
-        return handle_not_delivered_workflow_for_agent(tool_context, order_id, status, user_message)
-    elif issue_type == "damaged item":
-        return damaged_item_workflow(tool_context, user_message)
\ No newline at end of file
+    workflow = WORKFLOWS_BY_ISSUE.get(issue_type)
+    if workflow is None:
+        return {
+            "status": "error",
+            "message": f"There is no automated workflow for '{issue_type}'. Help the customer directly."
+        }
+    # Workflow progress is stored per order, so each order resumes at its own step
+    return workflow.run(tool_context.state, order_id, user_message)
@@ -0,0 +1,160 @@
+import re
+from dataclasses import dataclass, field
+from typing import Iterable
+
+# Keyword tables, in priority order: when a message matches several labels of
+# the same kind, the one listed first wins (e.g. "not delivered" over "refund").
+ISSUE_KEYWORDS = {
+    "not delivered": ["didn't arrive", "not delivered", "never came", "didn't receive", "missing",
+                      "not received", "never got it"],
+    "late delivery": ["late", "delayed", "still waiting", "taking too long"],
+    "damaged item": ["broken", "damaged", "cracked", "defective", "not working"],
+    "wrong item": ["wrong item", "different item", "incorrect item", "not what i ordered"],
+    "refund": ["refund", "refunded", "return my money", "money back", "cancel order", "return request"],
+}
+
+DAMAGE_KEYWORDS = {
+    "minor": ["cracked", "chip", "chipped", "scratched", "small dent"],
+    "major": ["broken", "shattered", "completely damaged", "not working", "dead"],
+}
+
+# Negations come first: "no, I haven't checked" must not read as a "checked". They are
+# matched in a pass of their own (see NEGATION_PATTERN), so an affirmative that starts
+# earlier ("I did" in "I did not check") cannot swallow them.
+CONFIRMATION_KEYWORDS = {
+    "no": ["no", "not yet", "haven't", "haven’t", "have not", "did not", "not checked", "nope"],
+    "yes": ["yes", "yeah", "yep", "checked", "i did", "i have", "already checked", "please do", "start"],
+}
+
+RESOLUTION_KEYWORDS = {
+    "refund": ["refund", "refunded", "refunds"],
+    "replacement": ["replacement", "replace", "replaced", "replacing"],
+}
+
+KEYWORD_TABLES = {
+    "issue": ISSUE_KEYWORDS,
+    "damage": DAMAGE_KEYWORDS,
+    "confirmation": CONFIRMATION_KEYWORDS,
+    "resolution": RESOLUTION_KEYWORDS,
+}
+
+# Example order ids: OR12345, ORDER-1234, #12345, 240240
+ORDER_ID_PATTERN = r"(?:ORDER[- ]?|OR|\#)?(?<!\d)(?P<order_id>\d{4,12})(?!\d)"
+
+
+def _keyword_alternation(keywords) -> str:
+    return "|".join(re.escape(k) for k in sorted(keywords, key=len, reverse=True))
+
+
+def _build_lookup() -> tuple[dict[str, list[tuple[str, str]]], re.Pattern]:
+    lookup: dict[str, list[tuple[str, str]]] = {}
+    for kind, table in KEYWORD_TABLES.items():
+        for label, keywords in table.items():
+            if (kind, label) == NEGATION:
+                continue   # matched by NEGATION_PATTERN
+            for keyword in keywords:
+                lookup.setdefault(keyword.lower(), []).append((kind, label))
+    # Longest first so "not delivered" wins over "no" at the same position.
+    pattern = re.compile(
+        rf"{ORDER_ID_PATTERN}|(?<!\w)(?P<keyword>{_keyword_alternation(lookup)})(?!\w)",
+        re.IGNORECASE,
+    )
+    return lookup, pattern
+
+
+NEGATION = ("confirmation", "no")
+KEYWORD_LOOKUP, MESSAGE_PATTERN = _build_lookup()
+NEGATION_PATTERN = re.compile(
+    rf"(?<!\w)(?:{_keyword_alternation(k.lower() for k in CONFIRMATION_KEYWORDS['no'])})(?!\w)", re.IGNORECASE,
+)
+
+
+@dataclass(frozen=True)
+class Match:
+    kind: str          # "order_id" | "issue" | "damage" | "confirmation" | "resolution"
+    label: str         # order id digits, issue type, severity, "yes"/"no", resolution
+    text: str
+    span: tuple[int, int]
+
+
+@dataclass
+class MessageAnalysis:
+    matches: list[Match] = field(default_factory=list)
+
+    def labels(self, kind: str) -> list[str]:
+        return [m.label for m in self.matches if m.kind == kind]
+
+    def best(self, kind: str) -> tuple[str | None, float]:
+        """
+        Highest-priority label of one kind and a confidence in [0, 1].
+
+        Confidence is the share of that kind's matches agreeing with the
+        chosen label: 1.0 when the message is unambiguous.
+        """
+        hits = [m for m in self.matches if m.kind == kind]
+        if not hits:
+            return None, 0.0
+        if kind == "order_id":
+            return hits[0].label, 1.0 / len({m.label for m in hits})
+        table = KEYWORD_TABLES[kind]
+        order = {label: i for i, label in enumerate(table)}
+        label = min((m.label for m in hits), key=order.__getitem__)
+        return label, sum(m.label == label for m in hits) / len(hits)
+
+    @property
+    def order_id(self) -> str | None:
+        return self.best("order_id")[0]
+
+    @property
+    def issue_type(self) -> str | None:
+        return self.best("issue")[0]
+
+    @property
+    def damage_severity(self) -> str | None:
+        return self.best("damage")[0]
+
+    def first_text(self, kind: str, label: str) -> str | None:
+        return next((m.text.lower() for m in self.matches if m.kind == kind and m.label == label), None)
+
+    def to_dict(self) -> dict:
+        return {
+            kind: {"label": label, "confidence": round(confidence, 3)}
+            for kind in ("order_id", *KEYWORD_TABLES)
+            for label, confidence in [self.best(kind)]
+            if label is not None
+        } | {"matches": [{"kind": m.kind, "label": m.label, "span": m.span} for m in self.matches]}
+
+
+def _negated(text: str, start: int, end: int, negations: list[Match]) -> bool:
+    """An affirmative overlapping a negation ("I have" in "I have not") or right after one ("not checked")."""
+    return any(
+        (n.span[0] < end and start < n.span[1]) or (start >= n.span[1] and not text[n.span[1]:start].strip())
+        for n in negations
+    )
+
+
+def analyze_message(text: str | None) -> MessageAnalysis:
+    """Extracts order ids, issue types, damage terms, confirmations and resolutions in one regex pass."""
+    analysis = MessageAnalysis()
+    if not text:
+        return analysis
+    negations = [Match(*NEGATION, found.group(0), found.span()) for found in NEGATION_PATTERN.finditer(text)]
+    for found in MESSAGE_PATTERN.finditer(text):
+        order_id = found.group("order_id")
+        if order_id is not None:
+            analysis.matches.append(Match("order_id", order_id, found.group(0), found.span()))
+            continue
+        keyword = found.group("keyword")
+        start, end = found.span("keyword")
+        for kind, label in KEYWORD_LOOKUP[keyword.lower()]:
+            if kind == "confirmation" and _negated(text, start, end, negations):
+                continue
+            analysis.matches.append(Match(kind, label, keyword, (start, end)))
+    analysis.matches.extend(negations)
+    analysis.matches.sort(key=lambda match: match.span)
+    return analysis
+
+
+def analyze_messages(texts: Iterable[str]) -> list[MessageAnalysis]:
+    """Batch form of analyze_message for pre-filtering many messages at once."""
+    return [analyze_message(text) for text in texts]
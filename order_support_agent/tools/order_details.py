@@ -1,7 +1,13 @@
 from google.adk.tools import ToolContext
 
+from order_support_agent.order_repository import order_status_service
+from order_support_agent.session_state import OrderStatus, SessionState
+
 ORDER_STATUS_TO_ISSUES = {
     "delivered": ["not delivered","general inquiry", "damaged item", "wrong item", "refund"],
+    "in_transit": ["late delivery", "general inquiry", "refund"],
+    "processing": ["late delivery", "general inquiry", "refund"],
+    "cancelled": ["general inquiry", "refund"],
 }
 
 ISSUE_TO_ORDER_STATUS = {
@@ -14,16 +20,17 @@ ISSUE_TO_ORDER_STATUS = {
 }
 
 
-def map_issue_to_valid_status(tool_context: ToolContext, issue_type: str) -> dict:
+async def map_issue_to_valid_status(tool_context: ToolContext, issue_type: str) -> dict:
     """
     Tool to identify the issue and map it against the corresponding status. Use extract_order_id tool, if order ID is not known.
 
     :param issue_type: It is the issue that the user is facing with their current order
     :return: A dictionary that would have the order ID, status of the order delivery
     """
-    order_id = tool_context.state.get("order_id")
-    issue = tool_context.state.get(f"order:{order_id}:issue_type")
-
+    session = SessionState(tool_context.state)
+    order_id = session.current_order_id
+    recorded_issue = session.order(order_id).issue
+    issue = recorded_issue.label if recorded_issue else None
 
     if order_id is None or issue is None:
         return {"status" : "error", "message": "Please provide the missing information."}
@@ -36,11 +43,27 @@ def map_issue_to_valid_status(tool_context: ToolContext, issue_type: str) -> dic
             "message": f"Unknown or unsupported issue type: {issue_type}",
         }
 
+    # Cached per order id; concurrent lookups are coalesced into one batched fetch
+    order_status = await order_status_service.get_status(order_id)
+    if order_status is None:
+        return {"status": "error", "message": f"Order {order_id} was not found. Please confirm the order ID with the customer."}
+
+    # Statuses outside OrderStatus are reported but not recorded; no workflow accepts them
+    if OrderStatus.parse(order_status):
+        session.update(order_id, status=OrderStatus.parse(order_status))
 
-    tool_context.state[f"order:{tool_context.state.get("order_id")}:order_status"] = valid_statuses[0]
+    if order_status not in valid_statuses:
+        return {
+            "status": "mismatch",
+            "issue_type": issue,
+            "order_status": order_status,
+            "valid_statuses": valid_statuses,
+            "message": f"The order is currently '{order_status}', which does not match a '{issue}' issue. "
+                       f"Explain the current status to the customer.",
+        }
 
     return {
         "status": "success",
         "issue_type": issue_type,
-        "valid_statuses": valid_statuses[0],
+        "valid_statuses": order_status,
     }
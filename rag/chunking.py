@@ -0,0 +1,127 @@
+import os
+import re
+from dataclasses import dataclass
+from itertools import islice
+from typing import Iterable, Iterator
+
+SECTION_RE = re.compile(r"^\s*(\d+)\.\s+(.+?)\s*:?\s*$")
+BULLET_RE = re.compile(r"^\s*[•*]\s+(.*\S)\s*$")
+YEAR_RE = re.compile(r"\b(?:19|20)\d{2}\b")
+
+
+@dataclass(frozen=True)
+class PolicyChunk:
+    id: str
+    text: str
+    source: str
+    section: str
+    revision_year: int | None
+
+    @property
+    def metadata(self) -> dict:
+        # Chroma metadata values must be str / int / float / bool, never None.
+        return {
+            "source": self.source,
+            "section": self.section,
+            "revision_year": self.revision_year or 0,
+        }
+
+
+def _split_long(body: str, max_chars: int) -> list[str]:
+    """Splits an oversized block on line boundaries so no chunk exceeds max_chars."""
+    if len(body) <= max_chars:
+        return [body]
+    parts, current = [], ""
+    for line in body.splitlines():
+        if current and len(current) + len(line) + 1 > max_chars:
+            parts.append(current)
+            current = ""
+        current = f"{current}\n{line}" if current else line
+    if current:
+        parts.append(current)
+    return parts
+
+
+def split_policy(source: str, text: str, max_chars: int = 800) -> list[PolicyChunk]:
+    """
+    Splits one policy document into retrieval-sized chunks.
+
+    The first non-empty line is treated as the document title. Numbered lines
+    ("2. Resolutions:") open a new section and every top-level bullet ("•")
+    together with its indented sub-lines becomes one chunk. Documents without
+    that structure fall back to one chunk per paragraph.
+
+    Args:
+        source: File name the text came from, used for ids and metadata.
+        text: Full policy text.
+        max_chars: Upper bound on a single chunk's body.
+
+    Returns:
+        list[PolicyChunk] in document order.
+    """
+    lines = text.splitlines()
+    title = next((line.strip() for line in lines if line.strip()), source)
+    year_match = YEAR_RE.search(title)
+    revision_year = int(year_match.group(0)) if year_match else None
+
+    blocks: list[tuple[str, list[str]]] = []   # (section, body lines)
+    section = ""
+    current: list[str] | None = None
+    seen_title = False
+
+    def flush():
+        if current:
+            blocks.append((section, current))
+
+    for line in lines:
+        if not seen_title and line.strip():
+            seen_title = True
+            continue
+        section_match = SECTION_RE.match(line)
+        if section_match:
+            flush()
+            section, current = f"{section_match.group(1)}. {section_match.group(2)}", None
+            continue
+        bullet_match = BULLET_RE.match(line)
+        if bullet_match:
+            flush()
+            current = [f"• {bullet_match.group(1)}"]
+            continue
+        if not line.strip():
+            # Blank lines only separate chunks in unstructured documents.
+            if current and not current[0].startswith("•"):
+                flush()
+                current = None
+            continue
+        if current is None:
+            current = []
+        current.append(line.strip())
+    flush()
+
+    chunks = []
+    for section_name, body_lines in blocks:
+        prefix = f"{title} / {section_name}" if section_name else title
+        for body in _split_long("\n".join(body_lines), max_chars):
+            chunks.append(PolicyChunk(
+                id=f"{source}#{len(chunks)}",
+                text=f"{prefix}\n{body}",
+                source=source,
+                section=section_name,
+                revision_year=revision_year,
+            ))
+    return chunks
+
+
+def iter_policy_chunks(folder_path: str, filenames: Iterable[str], max_chars: int = 800) -> Iterator[PolicyChunk]:
+    """Lazily reads and splits the given policy files, one file in memory at a time."""
+    for filename in filenames:
+        with open(os.path.join(folder_path, filename), "r", encoding="utf-8") as f:
+            text = f.read()
+        yield from split_policy(filename, text, max_chars=max_chars)
+
+
+def batched(items: Iterable, size: int) -> Iterator[list]:
+    """Yields lists of at most `size` items from any iterable."""
+    iterator = iter(items)
+    while batch := list(islice(iterator, size)):
+        yield batch
@@ -0,0 +1,144 @@
+import re
+import zlib
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict
+
+import numpy as np
+from chromadb import Documents, EmbeddingFunction, Embeddings
+from chromadb.utils import embedding_functions
+
+TOKEN_RE = re.compile(r"[a-z0-9$]+(?:[.'][a-z0-9]+)*")
+
+
+class EmbeddingProvider(EmbeddingFunction[Documents], ABC):
+    """
+    Base class for the embedding backends used by the policy index.
+
+    Providers are Chroma embedding functions, so they can be handed straight to
+    a collection, and additionally expose `dimension` and `embed_query` for
+    callers that work with vectors directly (caches, in-process indexes).
+    """
+
+    dimension: int | None = None
+
+    @abstractmethod
+    def __call__(self, input: Documents) -> Embeddings:
+        """Embeds a batch of documents."""
+
+    def embed_query(self, input: Documents) -> Embeddings:
+        return self(input)
+
+    @staticmethod
+    @abstractmethod
+    def name() -> str:
+        """Stable identifier Chroma stores with the collection."""
+
+    def get_config(self) -> Dict[str, Any]:
+        return {}
+
+    @staticmethod
+    @abstractmethod
+    def build_from_config(config: Dict[str, Any]) -> "EmbeddingProvider":
+        """Recreates the provider from get_config() output."""
+
+
+class LocalHashingEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministic, network-free embeddings for policy text.
+
+    Uses the hashing trick over word unigrams and bigrams: every feature is
+    mapped to a column with crc32 (stable across processes, unlike hash()),
+    given a +/-1 sign from a second hash bit to cancel collisions, weighted
+    with sublinear term frequency and L2-normalised. No vocabulary is fitted,
+    so a query is embedded in microseconds with no state besides `dimension`.
+    """
+
+    def __init__(self, dimension: int = 1024, ngram_range: tuple[int, int] = (1, 2)):
+        self.dimension = dimension
+        self.ngram_range = tuple(ngram_range)
+
+    def _features(self, text: str) -> list[str]:
+        tokens = TOKEN_RE.findall(text.lower())
+        low, high = self.ngram_range
+        features = []
+        for n in range(low, high + 1):
+            features.extend(" ".join(tokens[i:i + n]) for i in range(len(tokens) - n + 1))
+        return features
+
+    def __call__(self, input: Documents) -> Embeddings:
+        rows, cols, signs = [], [], []
+        for row, text in enumerate(input):
+            for feature in self._features(text or ""):
+                h = zlib.crc32(feature.encode("utf-8"))
+                rows.append(row)
+                cols.append(h % self.dimension)
+                signs.append(1.0 if (h >> 31) & 1 else -1.0)
+
+        matrix = np.zeros((len(input), self.dimension), dtype=np.float32)
+        if rows:
+            np.add.at(matrix, (np.asarray(rows), np.asarray(cols)), np.asarray(signs, dtype=np.float32))
+        matrix = np.sign(matrix) * np.log1p(np.abs(matrix))
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        np.divide(matrix, norms, out=matrix, where=norms > 0)
+        return list(matrix)
+
+    @staticmethod
+    def name() -> str:
+        return "local_hashing"
+
+    def get_config(self) -> Dict[str, Any]:
+        return {"dimension": self.dimension, "ngram_range": list(self.ngram_range)}
+
+    @staticmethod
+    def build_from_config(config: Dict[str, Any]) -> "LocalHashingEmbeddingProvider":
+        return LocalHashingEmbeddingProvider(**config)
+
+
+class GoogleEmbeddingProvider(EmbeddingProvider):
+    """Google text-embedding models through Chroma's Gemini embedding function (network call per batch)."""
+
+    def __init__(self, api_key: str | None = None, model_name: str = "models/text-embedding-004"):
+        # Shares the Gemini quota (requests/min, tokens/min, concurrency) with the agents
+        from runtime.rate_limit import gemini_limiter
+
+        self.model_name = model_name
+        self._limiter = gemini_limiter
+        self._fn = embedding_functions.google_embedding_function.GoogleGenerativeAiEmbeddingFunction(
+            api_key=api_key,
+            model_name=model_name,
+        )
+
+    def __call__(self, input: Documents) -> Embeddings:
+        estimated_tokens = sum(len(text) for text in input) // 4
+        return self._limiter.run_sync(lambda: self._fn(input), estimated_tokens=estimated_tokens, target="embedding")
+
+    @staticmethod
+    def name() -> str:
+        return "google_generative_ai"
+
+    def get_config(self) -> Dict[str, Any]:
+        return {"model_name": self.model_name}
+
+    @staticmethod
+    def build_from_config(config: Dict[str, Any]) -> "GoogleEmbeddingProvider":
+        from config import GOOGLE_API_KEY
+        return GoogleEmbeddingProvider(api_key=GOOGLE_API_KEY, **config)
+
+
+PROVIDERS: Dict[str, Callable[..., EmbeddingProvider]] = {
+    "local": LocalHashingEmbeddingProvider,
+    "google": GoogleEmbeddingProvider,
+}
+
+
+def register_provider(key: str, factory: Callable[..., EmbeddingProvider]) -> None:
+    """Makes an additional backend (e.g. an ONNX model) selectable through EMBEDDING_PROVIDER."""
+    PROVIDERS[key] = factory
+
+
+def get_embedding_provider(key: str, **kwargs) -> EmbeddingProvider:
+    try:
+        factory = PROVIDERS[key]
+    except KeyError:
+        raise ValueError(f"Unknown embedding provider '{key}'. Available: {sorted(PROVIDERS)}") from None
+    return factory(**kwargs)
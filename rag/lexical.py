@@ -0,0 +1,55 @@
+import math
+from collections import Counter, defaultdict
+
+from rag.embeddings import TOKEN_RE
+
+
+def lexical_terms(text: str) -> list[str]:
+    """Word unigrams plus bigrams, so phrases like "7 days" or "premium customers" match as units."""
+    tokens = TOKEN_RE.findall(text.lower())
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+class BM25Index:
+    """
+    In-process inverted index with Okapi BM25 scoring over policy chunks.
+
+    Built once per index version from the chunk texts; a query only touches
+    the posting lists of its own terms.
+    """
+
+    def __init__(self, ids: list[str], documents: list[str], metadatas: list[dict], k1: float = 1.5, b: float = 0.75):
+        self.ids = ids
+        self.documents = documents
+        self.metadatas = metadatas
+        self.k1 = k1
+        self.b = b
+        self.postings: dict[str, list[tuple[int, int]]] = defaultdict(list)
+        self.doc_lengths = []
+        for doc_index, document in enumerate(documents):
+            terms = Counter(lexical_terms(document))
+            self.doc_lengths.append(sum(terms.values()))
+            for term, tf in terms.items():
+                self.postings[term].append((doc_index, tf))
+        self.avg_length = (sum(self.doc_lengths) / len(self.doc_lengths)) if self.doc_lengths else 0.0
+        n_docs = len(documents)
+        self.idf = {
+            term: math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+            for term, postings in self.postings.items()
+        }
+
+    def search(self, text: str, n_results: int = 10) -> list[dict]:
+        scores: dict[int, float] = defaultdict(float)
+        for term in set(lexical_terms(text)):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self.idf[term]
+            for doc_index, tf in postings:
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_index] / self.avg_length)
+                scores[doc_index] += idf * tf * (self.k1 + 1) / (tf + norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:n_results]
+        return [
+            {"id": self.ids[i], "document": self.documents[i], "metadata": self.metadatas[i], "bm25": score}
+            for i, score in ranked
+        ]
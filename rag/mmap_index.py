@@ -0,0 +1,179 @@
+"""
+Read-only, memory-mapped vector index for the policy corpus.
+
+Embeddings live in one contiguous int8 (per-row scaled) or float16 matrix
+saved as .npy and opened with mmap_mode="r", so every worker process maps the
+same file and shares its pages through the OS page cache instead of holding
+its own copy. Ids, documents and metadata sit in a JSON sidecar next to it.
+Queries are one blocked matrix-vector product plus argpartition top-k.
+
+A build writes a new version directory and then swaps the `CURRENT` pointer,
+so readers never see a half-written index:
+
+    <root>/CURRENT            -> "v1718000000123"
+    <root>/v1718000000123/vectors.npy, scales.npy (int8 only), meta.json
+
+The query/get/count methods mirror the subset of Chroma's Collection API that
+rag.retrieval uses, so the index can stand in for the collection.
+"""
+import fcntl
+import json
+import os
+import shutil
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+import numpy as np
+
+DTYPES = ("float16", "int8")
+# Rows converted to float32 per step of a query; 1024 x 1024 dims is a 4 MB, cache-friendly buffer.
+BLOCK_ROWS = 1024
+FORMAT = 1
+
+
+def quantize_int8(matrix: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """Symmetric per-row int8 quantization; returns (codes, scales) with row ~= codes * scale."""
+    scales = np.abs(matrix).max(axis=1) / 127.0
+    scales[scales == 0] = 1.0
+    codes = np.rint(matrix / scales[:, None]).clip(-127, 127).astype(np.int8)
+    return codes, scales.astype(np.float32)
+
+
+class MmapVectorIndex:
+    """Shared, memory-mapped policy vectors with a Chroma-like query interface."""
+
+    def __init__(self, root: str, dtype: str = "int8"):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unknown index dtype '{dtype}', expected one of {DTYPES}")
+        self.root = root
+        self.dtype = dtype
+        self.version: str | None = None
+        self.files: dict = {}
+        self.ids: list[str] = []
+        self.documents: list[str] = []
+        self.metadatas: list[dict] = []
+        self._vectors: np.ndarray | None = None
+        self._scales: np.ndarray | None = None
+        os.makedirs(root, exist_ok=True)
+        self.reload()
+
+    def reload(self) -> None:
+        """Maps the version CURRENT points at; an index that was never built (or has another format) is empty."""
+        try:
+            with open(os.path.join(self.root, "CURRENT"), encoding="utf-8") as f:
+                version = f.read().strip()
+            with open(os.path.join(self.root, version, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            version, meta = None, {}
+        if meta.get("format") != FORMAT or meta.get("dtype") != self.dtype:
+            version, meta = None, {}
+
+        self.version = version
+        self.files = meta.get("files", {})
+        self.ids = meta.get("ids", [])
+        self.documents = meta.get("documents", [])
+        self.metadatas = meta.get("metadatas", [])
+        self._vectors = self._scales = None
+        if version and self.ids:
+            directory = os.path.join(self.root, version)
+            self._vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r")
+            if self.dtype == "int8":
+                self._scales = np.load(os.path.join(directory, "scales.npy"))
+
+    @contextmanager
+    def write_lock(self) -> Iterator[None]:
+        """Serializes builds across processes (e.g. several workers starting at once)."""
+        with open(os.path.join(self.root, ".lock"), "w") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def write(self, ids: list[str], documents: list[str], metadatas: list[dict], embeddings, files: dict) -> None:
+        """Writes a new version, points CURRENT at it, drops older versions and maps it."""
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        if not ids:
+            matrix = np.zeros((0, 0), dtype=np.float32)
+        version = f"v{time.time_ns() // 1_000_000}"
+        directory = os.path.join(self.root, version)
+        os.makedirs(directory)
+        if self.dtype == "int8":
+            codes, scales = quantize_int8(matrix)
+            np.save(os.path.join(directory, "vectors.npy"), codes)
+            np.save(os.path.join(directory, "scales.npy"), scales)
+        else:
+            np.save(os.path.join(directory, "vectors.npy"), matrix.astype(np.float16))
+        meta = {
+            "format": FORMAT, "dtype": self.dtype, "files": files,
+            "ids": ids, "documents": documents, "metadatas": metadatas,
+        }
+        with open(os.path.join(directory, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+
+        pointer = os.path.join(self.root, "CURRENT")
+        with open(pointer + ".tmp", "w", encoding="utf-8") as f:
+            f.write(version)
+        os.replace(pointer + ".tmp", pointer)
+        # Processes still mapping an old version keep their pages until they unmap it (POSIX unlink semantics).
+        for name in os.listdir(self.root):
+            if name.startswith("v") and name != version:
+                shutil.rmtree(os.path.join(self.root, name), ignore_errors=True)
+        self.reload()
+
+    def vectors(self, rows: list[int] | None = None) -> np.ndarray:
+        """Stored vectors as float32 (dequantized for int8), for all rows or the given ones."""
+        if self._vectors is None:
+            return np.zeros((0, 0), dtype=np.float32)
+        rows = slice(None) if rows is None else np.asarray(rows, dtype=np.int64)
+        matrix = np.asarray(self._vectors[rows], dtype=np.float32)
+        if self._scales is not None:
+            matrix *= self._scales[rows][:, None]
+        return matrix
+
+    def scores(self, query) -> np.ndarray:
+        """Dot product of `query` with every stored vector (cosine for normalized embeddings)."""
+        query = np.asarray(query, dtype=np.float32)
+        scores = np.empty(len(self.ids), dtype=np.float32)
+        buffer = np.empty((min(BLOCK_ROWS, len(self.ids)), self._vectors.shape[1]), dtype=np.float32)
+        for start in range(0, len(self.ids), BLOCK_ROWS):
+            block = self._vectors[start:start + BLOCK_ROWS]
+            converted = buffer[:len(block)]
+            converted[...] = block   # widen into the reused buffer instead of allocating a float32 copy
+            scores[start:start + len(block)] = converted @ query
+        if self._scales is not None:
+            scores *= self._scales
+        return scores
+
+    def search(self, query, k: int) -> list[tuple[int, float]]:
+        """(row, score) of the k best rows, best first."""
+        k = min(k, len(self.ids))
+        if k <= 0:
+            return []
+        scores = self.scores(query)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(row), float(scores[row])) for row in top]
+
+    # --- Chroma Collection subset used by rag.retrieval ---
+
+    def count(self) -> int:
+        return len(self.ids)
+
+    def query(self, query_embeddings, n_results: int = 10, include=("documents", "metadatas", "distances")) -> dict:
+        result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+        for query in query_embeddings:
+            hits = self.search(query, n_results)
+            result["ids"].append([self.ids[row] for row, _ in hits])
+            result["documents"].append([self.documents[row] for row, _ in hits])
+            result["metadatas"].append([self.metadatas[row] for row, _ in hits])
+            result["distances"].append([1.0 - score for _, score in hits])
+        return result
+
+    def get(self, include=("documents", "metadatas")) -> dict:
+        result = {"ids": list(self.ids), "documents": list(self.documents), "metadatas": list(self.metadatas)}
+        if "embeddings" in include:
+            result["embeddings"] = self.vectors()
+        return result
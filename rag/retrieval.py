@@ -0,0 +1,122 @@
+import threading
+
+from config import POLICY_CACHE_SIZE, POLICY_CACHE_TTL_SECONDS, POLICY_RRF_K, POLICY_CANDIDATES
+from rag import vectorstore
+from rag.cache import TTLCache, normalize_query
+from rag.lexical import BM25Index
+
+# Embeddings depend only on the text and the provider, so they survive index rebuilds.
+embedding_cache = TTLCache(maxsize=POLICY_CACHE_SIZE, ttl=POLICY_CACHE_TTL_SECONDS)
+# Results are keyed on the index version, so a rebuilt index never serves stale hits.
+result_cache = TTLCache(maxsize=POLICY_CACHE_SIZE, ttl=POLICY_CACHE_TTL_SECONDS)
+
+
+def embed_query(text: str):
+    """Returns the query embedding for already-normalized text, from cache when possible."""
+    key = (vectorstore.INDEX_KEY, text)
+    embedding = embedding_cache.get(key)
+    if embedding is None:
+        embedding = vectorstore.embedding_fn([text])[0]
+        embedding_cache.put(key, embedding)
+    return embedding
+
+
+def query_policy(text: str, n_results: int = 3) -> list[dict]:
+    """
+    Top-k policy chunks for a single query text.
+
+    Returns:
+        list of {"id", "document", "metadata", "distance"}, best match first;
+        an empty list for blank queries (nothing is embedded for them).
+    """
+    normalized = normalize_query(text)
+    if not normalized:
+        return []
+
+    key = (vectorstore.get_index_version(), normalized, n_results)
+    cached = result_cache.get(key)
+    if cached is not None:
+        return cached
+
+    results = vectorstore.collection.query(
+        query_embeddings=[embed_query(normalized)],
+        n_results=n_results,
+        include=["documents", "metadatas", "distances"],
+    )
+    hits = [
+        {"id": chunk_id, "document": document, "metadata": metadata, "distance": distance}
+        for chunk_id, document, metadata, distance in zip(
+            results["ids"][0], results["documents"][0], results["metadatas"][0], results["distances"][0]
+        )
+    ]
+    result_cache.put(key, hits)
+    return hits
+
+
+_lexical_index: BM25Index | None = None
+_lexical_version = None
+_lexical_lock = threading.Lock()
+
+
+def get_lexical_index() -> BM25Index:
+    """BM25 index over the chunks currently in the collection, rebuilt when the index version changes."""
+    global _lexical_index, _lexical_version
+    version = vectorstore.get_index_version()
+    if _lexical_index is None or _lexical_version != version:
+        with _lexical_lock:
+            if _lexical_index is None or _lexical_version != version:
+                stored = vectorstore.collection.get(include=["documents", "metadatas"])
+                _lexical_index = BM25Index(stored["ids"], stored["documents"], stored["metadatas"])
+                _lexical_version = version
+    return _lexical_index
+
+
+def hybrid_search(texts: list[str], top_k: int = 3) -> list[dict]:
+    """
+    Ranks policy chunks for one or more query texts with reciprocal rank fusion.
+
+    Every non-blank text contributes a vector ranking and a BM25 ranking of
+    POLICY_CANDIDATES chunks each; a chunk scores sum(1 / (POLICY_RRF_K + rank))
+    over all of those rankings, so chunks found by several queries or by both
+    retrievers rise to the top. Results are deduplicated by chunk id.
+
+    Args:
+        texts: Query strings, e.g. the customer's question and the damage analysis.
+        top_k: Number of chunks to return.
+
+    Returns:
+        list of {"id", "document", "metadata", "score"}, best first.
+    """
+    normalized = tuple(dict.fromkeys(t for t in (normalize_query(text) for text in texts) if t))
+    if not normalized:
+        return []
+
+    key = ("hybrid", vectorstore.get_index_version(), normalized, top_k)
+    cached = result_cache.get(key)
+    if cached is not None:
+        return cached
+
+    lexical_index = get_lexical_index()
+    # Asking Chroma for more neighbours than it holds only produces warnings.
+    n_candidates = min(POLICY_CANDIDATES, len(lexical_index.ids))
+    if not n_candidates:
+        return []
+    fused: dict[str, dict] = {}
+    for text in normalized:
+        rankings = (query_policy(text, n_results=n_candidates), lexical_index.search(text, n_results=n_candidates))
+        for ranking in rankings:
+            for rank, hit in enumerate(ranking, start=1):
+                entry = fused.setdefault(hit["id"], {
+                    "id": hit["id"], "document": hit["document"], "metadata": hit["metadata"], "score": 0.0,
+                })
+                entry["score"] += 1.0 / (POLICY_RRF_K + rank)
+
+    ranked = sorted(fused.values(), key=lambda entry: entry["score"], reverse=True)[:top_k]
+    for entry in ranked:
+        entry["score"] = round(entry["score"], 6)
+    result_cache.put(key, ranked)
+    return ranked
+
+
+def cache_stats() -> dict:
+    return {"embedding": embedding_cache.stats(), "results": result_cache.stats()}
@@ -1,32 +1,192 @@
-import chromadb
-from chromadb.utils import embedding_functions
+import hashlib
+import json
 import os
 
-from config import GOOGLE_API_KEY
-
-client = chromadb.Client(chromadb.config.Settings(
-    persist_directory="./chroma_db"
-))
-
-embedding_fn = embedding_functions.google_embedding_function.GoogleGenerativeAiEmbeddingFunction(model_name="models/text-embedding-004")
+import chromadb
 
-collection = client.create_collection(
-    name="damage_policy",
-    embedding_function=embedding_fn
+from config import (
+    GOOGLE_API_KEY,
+    POLICY_INDEX_DIR,
+    POLICY_CHUNK_MAX_CHARS,
+    POLICY_EMBED_BATCH_SIZE,
+    EMBEDDING_PROVIDER,
+    LOCAL_EMBEDDING_DIM,
+    VECTOR_BACKEND,
+    MMAP_INDEX_DTYPE,
 )
+from rag.chunking import batched, iter_policy_chunks
+from rag.embeddings import get_embedding_provider
+from rag.mmap_index import MmapVectorIndex
 
+# Bump whenever the id scheme or chunking changes so stale indexes are rebuilt.
+INDEX_FORMAT = 2
 
 project_root = os.path.dirname(os.path.abspath(__file__))
 folder_path = os.path.join(project_root, "policies")
 
-for filename in os.listdir(folder_path):
-    file_path = os.path.join(folder_path, filename)
+if EMBEDDING_PROVIDER == "google":
+    embedding_fn = get_embedding_provider("google", api_key=GOOGLE_API_KEY)
+elif EMBEDDING_PROVIDER == "local":
+    embedding_fn = get_embedding_provider("local", dimension=LOCAL_EMBEDDING_DIM)
+else:
+    embedding_fn = get_embedding_provider(EMBEDDING_PROVIDER)
+
+# Vectors from different providers live in different spaces (and dimensions),
+# so each provider gets its own collection and manifest.
+INDEX_KEY = embedding_fn.name() + (f"_{embedding_fn.dimension}" if embedding_fn.dimension else "")
+COLLECTION_NAME = f"damage_policy__{INDEX_KEY}"
+MANIFEST_FILE = f"manifest__{INDEX_KEY}.json"
+
+if VECTOR_BACKEND == "mmap":
+    # No Chroma client in this process: every worker maps the same vector file read-only.
+    client = None
+    collection = MmapVectorIndex(
+        os.path.join(POLICY_INDEX_DIR, f"mmap__{INDEX_KEY}__{INDEX_FORMAT}"), dtype=MMAP_INDEX_DTYPE,
+    )
+else:
+    client = chromadb.PersistentClient(path=POLICY_INDEX_DIR)
+    # get_or_create only opens the stored collection; nothing is embedded here.
+    collection = client.get_or_create_collection(
+        name=COLLECTION_NAME,
+        embedding_function=embedding_fn
+    )
+
+
+# Fingerprint of the indexed corpus; changes whenever sync_policy_index alters the index.
+index_version = ""
+
+
+def get_index_version() -> str:
+    return index_version
+
+
+def _manifest_path() -> str:
+    return os.path.join(POLICY_INDEX_DIR, MANIFEST_FILE)
+
+
+def _load_manifest() -> dict | None:
+    """
+    Returns {filename: sha256} for the documents currently in the index,
+    or None when there is no manifest in the current INDEX_FORMAT.
+    """
+    try:
+        with open(_manifest_path(), "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    if manifest.get("format") != INDEX_FORMAT:
+        return None
+    return manifest.get("files", {})
+
+
+def _save_manifest(files: dict) -> None:
+    # Write-then-rename so a crash mid-write never leaves a truncated manifest.
+    tmp_path = _manifest_path() + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump({"format": INDEX_FORMAT, "files": files}, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, _manifest_path())
+
+
+def _hash_policies() -> dict:
+    """Returns {filename: sha256} for every policy file on disk without keeping the text around."""
+    digests = {}
+    for filename in sorted(os.listdir(folder_path)):
+        file_path = os.path.join(folder_path, filename)
+        if not os.path.isfile(file_path):
+            continue
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 16), b""):
+                digest.update(block)
+        digests[filename] = digest.hexdigest()
+    return digests
+
+
+def _diff(indexed: dict, policies: dict) -> tuple[list, list, list]:
+    added = [name for name in policies if name not in indexed]
+    updated = [name for name in policies if name in indexed and indexed[name] != policies[name]]
+    removed = [name for name in indexed if name not in policies]
+    return added, updated, removed
+
+
+def _sync_chroma_index(policies: dict) -> tuple[list, list, list]:
+    manifest = _load_manifest()
+    # A missing/outdated manifest, or a manifest without vectors (e.g. the index
+    # directory was partially wiped), cannot be trusted; rebuild from scratch.
+    if manifest is None or (manifest and collection.count() == 0):
+        stale_ids = collection.get(include=[])["ids"]
+        if stale_ids:
+            collection.delete(ids=stale_ids)
+        manifest = {}
+
+    added, updated, removed = _diff(manifest, policies)
+
+    # Chunks are keyed "<file>#<n>", so a file's old chunks are dropped by source.
+    for name in removed + updated:
+        collection.delete(where={"source": name})
+
+    to_embed = added + updated
+    chunks = iter_policy_chunks(folder_path, to_embed, max_chars=POLICY_CHUNK_MAX_CHARS)
+    for batch in batched(chunks, POLICY_EMBED_BATCH_SIZE):
+        collection.add(
+            ids=[chunk.id for chunk in batch],
+            documents=[chunk.text for chunk in batch],
+            metadatas=[chunk.metadata for chunk in batch],
+        )
+
+    if to_embed or removed or not os.path.exists(_manifest_path()):
+        _save_manifest(policies)
+    return added, updated, removed
+
+
+def _sync_mmap_index(policies: dict) -> tuple[list, list, list]:
+    # The file list lives in the index's own sidecar; unchanged files keep their stored vectors.
+    with collection.write_lock():
+        collection.reload()   # another worker may have rebuilt it while we waited
+        indexed = collection.files if collection.count() else {}
+        added, updated, removed = _diff(indexed, policies)
+        if not (added or updated or removed) and collection.version:
+            return added, updated, removed
+
+        kept = [row for row, meta in enumerate(collection.metadatas) if meta["source"] in policies
+                and meta["source"] not in updated]
+        ids = [collection.ids[row] for row in kept]
+        documents = [collection.documents[row] for row in kept]
+        metadatas = [collection.metadatas[row] for row in kept]
+        vectors = list(collection.vectors(kept)) if kept else []
+        chunks = iter_policy_chunks(folder_path, added + updated, max_chars=POLICY_CHUNK_MAX_CHARS)
+        for batch in batched(chunks, POLICY_EMBED_BATCH_SIZE):
+            ids.extend(chunk.id for chunk in batch)
+            documents.extend(chunk.text for chunk in batch)
+            metadatas.extend(chunk.metadata for chunk in batch)
+            vectors.extend(embedding_fn([chunk.text for chunk in batch]))
+        collection.write(ids, documents, metadatas, vectors, files=policies)
+    return added, updated, removed
+
+
+def sync_policy_index() -> dict:
+    """
+    Brings the persisted index (Chroma collection, or the memory-mapped index
+    when VECTOR_BACKEND is "mmap") in line with the files in rag/policies.
+
+    Only new or changed files are embedded, deleted files are removed from the
+    index, and when the manifest matches the files on disk no embedding
+    call is made at all. Files are split into section/bullet chunks and sent
+    to the embedding function in batches of POLICY_EMBED_BATCH_SIZE, so memory
+    use stays flat regardless of corpus size.
+
+    Returns:
+        dict: {"added": [...], "updated": [...], "removed": [...]}
+    """
+    policies = _hash_policies()
+    sync = _sync_mmap_index if VECTOR_BACKEND == "mmap" else _sync_chroma_index
+    added, updated, removed = sync(policies)
+
+    global index_version
+    fingerprint = json.dumps([INDEX_FORMAT, INDEX_KEY, policies], sort_keys=True)
+    index_version = hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:16]
+
+    return {"added": added, "updated": updated, "removed": removed}
 
-    with open(file_path, "r", encoding="utf-8") as f:
-        text = f.read()
 
-    collection.add(
-        ids=[filename],                # unique id for each document
-        documents=[text],              # the document contents
-        metadatas=[{"source": filename}],
-    )
\ No newline at end of file
+sync_policy_index()
@@ -0,0 +1,211 @@
+"""
+Event compaction and archival for the SQLite session store.
+
+Completed workflows keep only their last few events plus a one-line summary
+in session state; sessions idle for longer than the archive cutoff have all
+their events moved out. Moved rows go to an `events_archive` table as
+zlib-compressed JSON, so they can be restored but are never loaded on resume.
+
+    python -m runtime.compaction --db my_agent_data.db --dry-run
+    python -m runtime.compaction --db my_agent_data.db --interval 3600
+"""
+import argparse
+import base64
+import json
+import sqlite3
+import time
+import zlib
+from contextlib import closing
+
+from order_support_agent.session_state import SessionState, WorkflowStatus
+
+ARCHIVE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events_archive (
+    id VARCHAR(128) NOT NULL,
+    app_name VARCHAR(128) NOT NULL,
+    user_id VARCHAR(128) NOT NULL,
+    session_id VARCHAR(128) NOT NULL,
+    timestamp DATETIME NOT NULL,
+    archived_at DATETIME NOT NULL,
+    reason VARCHAR(32) NOT NULL,
+    payload BLOB NOT NULL,
+    PRIMARY KEY (id, app_name, user_id, session_id)
+);
+CREATE INDEX IF NOT EXISTS ix_events_archive_session
+    ON events_archive (app_name, user_id, session_id, timestamp);
+"""
+
+SUMMARY_KEY = "history_summary"
+
+
+def _is_completed(state: dict) -> bool:
+    return any(order.workflow is WorkflowStatus.COMPLETED for order in SessionState(state).orders().values())
+
+
+def summarize_state(state: dict) -> str:
+    """One line per order, built from state only (no model call): id, issue, status and outcome."""
+    lines = []
+    for order_id, order in SessionState(state).orders().items():
+        if not order.issue:
+            continue
+        status = order.status.label if order.status else "unknown"
+        resolution = order.vars.get("resolution") or "none recorded"
+        lines.append(f"Order {order_id}: {order.issue.label} (status {status}); resolution: {resolution}.")
+    return " ".join(lines)
+
+
+def _encode_row(row: sqlite3.Row) -> bytes:
+    record = {}
+    for key in row.keys():
+        value = row[key]
+        record[key] = {"b64": base64.b64encode(value).decode("ascii")} if isinstance(value, bytes) else value
+    return zlib.compress(json.dumps(record).encode("utf-8"), 6)
+
+
+def _decode_payload(payload: bytes) -> dict:
+    record = json.loads(zlib.decompress(payload))
+    return {k: base64.b64decode(v["b64"]) if isinstance(v, dict) and "b64" in v else v for k, v in record.items()}
+
+
+def _archive_events(connection: sqlite3.Connection, events: list[sqlite3.Row], reason: str) -> int:
+    connection.executemany(
+        "INSERT OR REPLACE INTO events_archive "
+        "(id, app_name, user_id, session_id, timestamp, archived_at, reason, payload) "
+        "VALUES (?, ?, ?, ?, ?, datetime('now'), ?, ?)",
+        [
+            (e["id"], e["app_name"], e["user_id"], e["session_id"], e["timestamp"], reason, _encode_row(e))
+            for e in events
+        ],
+    )
+    connection.executemany(
+        "DELETE FROM events WHERE id = ? AND app_name = ? AND user_id = ? AND session_id = ?",
+        [(e["id"], e["app_name"], e["user_id"], e["session_id"]) for e in events],
+    )
+    return len(events)
+
+
+def _events_to_drop(events: list[sqlite3.Row], keep_last: int) -> list[sqlite3.Row]:
+    """
+    Everything before the kept tail. The tail is extended back to a user
+    message so a function call is never separated from its response.
+    """
+    cut = len(events) - keep_last
+    while cut > 0 and events[cut]["author"] != "user":
+        cut -= 1
+    return events[:max(cut, 0)]
+
+
+def compact(
+    db_path: str,
+    keep_last: int = 2,
+    archive_after_days: float = 30.0,
+    min_idle_minutes: float = 30.0,
+    dry_run: bool = False,
+) -> dict:
+    """
+    Runs one compaction pass over the session database.
+
+    Args:
+        db_path: SQLite file used by the session service.
+        keep_last: Events kept (at least) for sessions whose workflow completed.
+        archive_after_days: Sessions not updated for this long have all events archived.
+        min_idle_minutes: Sessions updated more recently than this are never touched.
+        dry_run: Report what would move without changing anything.
+
+    Returns:
+        dict with counts of compacted/archived sessions and moved events.
+    """
+    report = {"compacted_sessions": 0, "archived_sessions": 0, "events_moved": 0}
+    with closing(sqlite3.connect(db_path, timeout=30)) as connection:
+        connection.row_factory = sqlite3.Row
+        connection.executescript(ARCHIVE_SCHEMA)
+        sessions = connection.execute(
+            "SELECT app_name, user_id, id, state, update_time, "
+            "update_time < datetime('now', ?) AS is_old "
+            "FROM sessions WHERE update_time < datetime('now', ?)",
+            (f"-{archive_after_days * 24 * 60} minutes", f"-{min_idle_minutes} minutes"),
+        ).fetchall()
+
+        for session in sessions:
+            state = json.loads(session["state"] or "{}")
+            if not (session["is_old"] or _is_completed(state)):
+                continue
+            events = connection.execute(
+                "SELECT * FROM events WHERE app_name = ? AND user_id = ? AND session_id = ? ORDER BY timestamp",
+                (session["app_name"], session["user_id"], session["id"]),
+            ).fetchall()
+            if session["is_old"]:
+                to_move, reason = events, "archived"
+            else:
+                to_move, reason = _events_to_drop(events, keep_last), "compacted"
+            if not to_move:
+                continue
+
+            report["archived_sessions" if reason == "archived" else "compacted_sessions"] += 1
+            report["events_moved"] += len(to_move)
+            if dry_run:
+                continue
+            # One transaction per session: a crash never loses or duplicates events.
+            with connection:
+                _archive_events(connection, to_move, reason)
+                summary = summarize_state(state)
+                if summary and state.get(SUMMARY_KEY) != summary:
+                    state[SUMMARY_KEY] = summary
+                    connection.execute(
+                        "UPDATE sessions SET state = ? WHERE app_name = ? AND user_id = ? AND id = ?",
+                        (json.dumps(state), session["app_name"], session["user_id"], session["id"]),
+                    )
+        if not dry_run:
+            connection.execute("PRAGMA wal_checkpoint(PASSIVE)")
+    return report
+
+
+def restore_session(db_path: str, app_name: str, user_id: str, session_id: str) -> int:
+    """Moves a session's archived events back into the events table. Returns the number restored."""
+    with closing(sqlite3.connect(db_path, timeout=30)) as connection:
+        connection.executescript(ARCHIVE_SCHEMA)
+        rows = connection.execute(
+            "SELECT payload FROM events_archive WHERE app_name = ? AND user_id = ? AND session_id = ?",
+            (app_name, user_id, session_id),
+        ).fetchall()
+        with connection:
+            for (payload,) in rows:
+                record = _decode_payload(payload)
+                columns = ", ".join(record)
+                connection.execute(
+                    f"INSERT OR REPLACE INTO events ({columns}) VALUES ({', '.join('?' * len(record))})",
+                    list(record.values()),
+                )
+            connection.execute(
+                "DELETE FROM events_archive WHERE app_name = ? AND user_id = ? AND session_id = ?",
+                (app_name, user_id, session_id),
+            )
+    return len(rows)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="my_agent_data.db")
+    parser.add_argument("--keep-last", type=int, default=2)
+    parser.add_argument("--archive-after-days", type=float, default=30.0)
+    parser.add_argument("--min-idle-minutes", type=float, default=30.0)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--interval", type=float, default=0, help="repeat every N seconds (background job mode)")
+    args = parser.parse_args()
+
+    while True:
+        report = compact(
+            args.db,
+            keep_last=args.keep_last,
+            archive_after_days=args.archive_after_days,
+            min_idle_minutes=args.min_idle_minutes,
+            dry_run=args.dry_run,
+        )
+        print(json.dumps(report))
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,404 @@
+"""
+Incremental analytics export of the session store.
+
+Tails the `events` table by rowid and the `sessions` table by update_time
+from a checkpoint kept next to the output, reading in bounded batches over a
+read-only connection (one short read transaction per batch, so WAL writers
+are never held up). Each event is flattened into one row: author, text
+size, tool calls and responses, tokens, time since the previous event and
+since the start of its invocation, and the order id / issue type / workflow
+step found in its state delta. Sessions export one row per order record
+with the current issue, status, workflow outcome and resolution.
+
+Output is gzip-compressed JSONL (or Parquet with --format parquet, which
+needs pyarrow) partitioned by day:
+
+    exports/events/date=2025-11-16/part-000000000001-000000001000.jsonl.gz
+    exports/sessions/date=2025-11-16/part-<first>-<last update_time>-<digest>.jsonl.gz
+    exports/_checkpoint.json
+
+Part names derive from the rows they hold and the checkpoint is only
+advanced after a part is written, so a crashed run re-exports into the same
+files. ADK stores sessions.update_time with one-second precision, so the
+session checkpoint is a second plus the state digest of every session
+exported at that second: the next pass re-reads that whole second and skips
+only sessions whose state is unchanged. Events re-inserted by `runtime.compaction.restore_session` get new
+rowids and are exported again; deduplicate on `event_id`.
+
+    python -m runtime.export_events --db my_agent_data.db --out exports
+    python -m runtime.export_events --db my_agent_data.db --out exports --interval 300
+"""
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import os
+import pickle
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime
+from typing import Iterator
+
+from order_support_agent.session_state import (
+    CURRENT_ORDER_KEY,
+    ORDER_KEY_PREFIX,
+    OrderState,
+    SessionState,
+)
+from runtime.invocation_map import MAX_TRACKED_INVOCATIONS, InvocationMap
+from runtime.migrate_state import migrate_state
+
+CHECKPOINT_FILE = "_checkpoint.json"
+EVENT_COLUMNS = (
+    "rowid, id, app_name, user_id, session_id, invocation_id, author, actions, "
+    "timestamp, content, usage_metadata, error_code, partial"
+)
+ORDER_FIELDS = (
+    "order_id", "issue_type", "order_status", "workflow", "workflow_step", "resolution", "damage_severity", "policy_refs",
+)
+
+
+class _Record:
+    """Stand-in for any class referenced by a pickled EventActions; keeps only its state."""
+
+    def __init__(self, *args, **kwargs):
+        self.__dict__["_state"] = {}
+
+    def __setstate__(self, state):
+        self.__dict__["_state"] = state
+
+
+class _ActionsUnpickler(pickle.Unpickler):
+    # Never resolves real classes: nothing from the blob is imported or called, and ADK is not needed.
+    def find_class(self, module, name):
+        return _Record
+
+
+def _plain(value):
+    if isinstance(value, _Record):
+        state = value._state
+        if isinstance(state, tuple):   # (__dict__, slots) form
+            state = state[0] or {}
+        if isinstance(state, dict) and "__dict__" in state:   # pydantic models
+            state = state["__dict__"]
+        return _plain(state)
+    if isinstance(value, dict):
+        return {key: _plain(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_plain(item) for item in value]
+    return value
+
+
+def decode_actions(blob: bytes | None) -> dict:
+    """EventActions pickle -> plain dict (state_delta, transfer_to_agent, escalate, ...)."""
+    if not blob:
+        return {}
+    try:
+        actions = _plain(_ActionsUnpickler(io.BytesIO(blob)).load())
+    except Exception:
+        return {}
+    return actions if isinstance(actions, dict) else {}
+
+
+def _parse_time(value: str | None) -> datetime | None:
+    return datetime.fromisoformat(value) if value else None
+
+
+def _part_field(part: dict, name: str) -> dict | None:
+    # ADK stores content with snake_case keys; accept camelCase from older dumps too
+    camel = name.split("_")[0] + "".join(word.title() for word in name.split("_")[1:])
+    return part.get(name) or part.get(camel)
+
+
+def _order_columns(state_delta: dict) -> dict:
+    """Order id and typed order fields written by this event, if any."""
+    columns = {}
+    for key, value in state_delta.items():
+        if key.startswith(ORDER_KEY_PREFIX) and isinstance(value, dict):
+            order = OrderState.from_compact(value)
+            columns = {
+                "order_id": key[len(ORDER_KEY_PREFIX):],
+                "issue_type": order.issue.label if order.issue else None,
+                "workflow": order.workflow.label if order.workflow else None,
+                "workflow_step": order.substep,
+                "resolution": order.vars.get("resolution"),
+            }
+    if state_delta.get(CURRENT_ORDER_KEY):
+        columns["order_id"] = state_delta[CURRENT_ORDER_KEY]
+    return columns
+
+
+class InvocationClock:
+    """Remembers the first and last event time of recent invocations, across batches."""
+
+    def __init__(self, capacity: int = MAX_TRACKED_INVOCATIONS):
+        # Ages here are event times, not wall time, so only the count is bounded
+        self._times: InvocationMap[str, tuple[datetime, datetime]] = InvocationMap(max_age_s=None, capacity=capacity)
+
+    def observe(self, invocation_id: str, at: datetime) -> tuple[float | None, float | None]:
+        """Returns (ms since the previous event, ms since the invocation's first event)."""
+        if invocation_id not in self._times:
+            self._times.set(invocation_id, (at, at))
+            return None, None
+        first, previous = self._times.get(invocation_id)
+        self._times.set(invocation_id, (first, at))
+        return (at - previous).total_seconds() * 1000, (at - first).total_seconds() * 1000
+
+
+def flatten_event(row: sqlite3.Row, clock: InvocationClock) -> dict:
+    content = json.loads(row["content"]) if row["content"] else {}
+    usage = json.loads(row["usage_metadata"]) if row["usage_metadata"] else {}
+    actions = decode_actions(row["actions"])
+    # Events written before the typed schema carry flat order:<id>:<field> keys
+    state_delta = migrate_state(actions.get("state_delta") or {})
+    parts = content.get("parts") or []
+    at = _parse_time(row["timestamp"])
+    since_previous_ms, since_start_ms = clock.observe(row["invocation_id"], at)
+
+    return {
+        "rowid": row["rowid"],
+        "event_id": row["id"],
+        "app_name": row["app_name"],
+        "user_id": row["user_id"],
+        "session_id": row["session_id"],
+        "invocation_id": row["invocation_id"],
+        "author": row["author"],
+        "timestamp": at.isoformat(),
+        "role": content.get("role"),
+        "text_chars": sum(len(part.get("text") or "") for part in parts if not part.get("thought")),
+        "tool_calls": [call["name"] for call in (_part_field(p, "function_call") for p in parts) if call],
+        "tool_responses": [resp["name"] for resp in (_part_field(p, "function_response") for p in parts) if resp],
+        "prompt_tokens": usage.get("prompt_token_count"),
+        "completion_tokens": usage.get("candidates_token_count"),
+        "since_previous_ms": since_previous_ms,
+        "since_invocation_start_ms": since_start_ms,
+        "transfer_to_agent": actions.get("transfer_to_agent"),
+        "state_keys": sorted(state_delta),
+        "error_code": row["error_code"],
+        "partial": bool(row["partial"]),
+        "order_id": None, "issue_type": None, "workflow": None, "workflow_step": None, "resolution": None,
+        **_order_columns(state_delta),
+    }
+
+
+def flatten_session(row: sqlite3.Row) -> list[dict]:
+    """One row per order record in the session's state (a single row without order id if there is none)."""
+    session = SessionState(migrate_state(json.loads(row["state"] or "{}")))
+    base = {
+        "app_name": row["app_name"],
+        "user_id": row["user_id"],
+        "session_id": row["id"],
+        "create_time": row["create_time"],
+        "update_time": row["update_time"],
+        "current_order_id": session.current_order_id,
+    }
+    orders = session.orders()
+    if not orders:
+        return [{**base, **dict.fromkeys(ORDER_FIELDS)}]
+    return [
+        {
+            **base,
+            "order_id": order_id,
+            "issue_type": order.issue.label if order.issue else None,
+            "order_status": order.status.label if order.status else None,
+            "workflow": order.workflow.label if order.workflow else None,
+            "workflow_step": order.substep,
+            "resolution": order.vars.get("resolution"),
+            "damage_severity": order.damage.image_severity.label if order.damage.image_severity else None,
+            "policy_refs": list(order.policy_refs),
+        }
+        for order_id, order in orders.items()
+    ]
+
+
+def _connect_readonly(db_path: str) -> sqlite3.Connection:
+    connection = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True, timeout=30)
+    connection.row_factory = sqlite3.Row
+    return connection
+
+
+def iter_event_batches(db_path: str, after_rowid: int = 0, batch_size: int = 1000) -> Iterator[list[sqlite3.Row]]:
+    """Yields events with rowid > after_rowid in rowid order, batch_size rows at a time."""
+    with closing(_connect_readonly(db_path)) as connection:
+        while True:
+            # A single statement per batch: its read snapshot ends before the batch is processed
+            rows = connection.execute(
+                f"SELECT {EVENT_COLUMNS} FROM events WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                (after_rowid, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            yield rows
+            after_rowid = rows[-1]["rowid"]
+
+
+def iter_session_batches(
+    db_path: str, since: str = "", batch_size: int = 1000,
+) -> Iterator[list[sqlite3.Row]]:
+    """Yields sessions with update_time >= `since`, ordered by (update_time, app_name, user_id, id)."""
+    after = (since, "", "", "")
+    with closing(_connect_readonly(db_path)) as connection:
+        while True:
+            rows = connection.execute(
+                "SELECT app_name, user_id, id, state, create_time, update_time FROM sessions "
+                "WHERE (update_time, app_name, user_id, id) > (?, ?, ?, ?) "
+                "ORDER BY update_time, app_name, user_id, id LIMIT ?",
+                (*after, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            yield rows
+            last = rows[-1]
+            after = (last["update_time"], last["app_name"], last["user_id"], last["id"])
+
+
+def _write_jsonl(path: str, records: list[dict]) -> None:
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        for record in records:
+            file.write(json.dumps(record, ensure_ascii=False, default=str) + "\n")
+
+
+def _write_parquet(path: str, records: list[dict]) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    pq.write_table(pa.Table.from_pylist(records), path, compression="zstd")
+
+
+WRITERS = {"jsonl": (_write_jsonl, ".jsonl.gz"), "parquet": (_write_parquet, ".parquet")}
+
+
+def write_partitioned(out_dir: str, table: str, name: str, records: list[dict], date_field: str, fmt: str) -> int:
+    """Writes records under <out_dir>/<table>/date=YYYY-MM-DD/<name><ext>; returns the number of files."""
+    writer, extension = WRITERS[fmt]
+    by_date: dict[str, list[dict]] = {}
+    for record in records:
+        by_date.setdefault(str(record[date_field])[:10], []).append(record)
+    for date, group in by_date.items():
+        directory = os.path.join(out_dir, table, f"date={date}")
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, name + extension)
+        writer(path + ".tmp", group)
+        os.replace(path + ".tmp", path)
+    return len(by_date)
+
+
+def _session_key(row: sqlite3.Row) -> str:
+    return f"{row['app_name']}/{row['user_id']}/{row['id']}"
+
+
+def _state_digest(row: sqlite3.Row) -> str:
+    state = row["state"] if isinstance(row["state"], bytes) else str(row["state"]).encode("utf-8")
+    return hashlib.blake2b(state, digest_size=8).hexdigest()
+
+
+def _session_part_name(rows: list[sqlite3.Row]) -> str:
+    # Several passes may write the same second; the digest keeps their parts apart (and a re-run's identical)
+    digest = hashlib.blake2b(
+        "\n".join(f"{_session_key(row)}:{_state_digest(row)}" for row in rows).encode("utf-8"), digest_size=6,
+    ).hexdigest()
+    first, last = (row["update_time"].replace(" ", "T").replace(":", "") for row in (rows[0], rows[-1]))
+    return f"part-{first}-{last}-{digest}"
+
+
+def _session_checkpoint(checkpoint: dict) -> tuple[str, dict[str, str]]:
+    """(second to resume from, {session key: state digest} already exported at that second)."""
+    since = checkpoint.get("sessions_after") or ""
+    if isinstance(since, list):   # older checkpoints stored the last (update_time, app, user, id) key
+        since = since[0]
+    return since, dict(checkpoint.get("sessions_boundary") or {})
+
+
+def load_checkpoint(out_dir: str) -> dict:
+    path = os.path.join(out_dir, CHECKPOINT_FILE)
+    if not os.path.exists(path):
+        return {"events_rowid": 0, "sessions_after": None}
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_checkpoint(out_dir: str, checkpoint: dict) -> None:
+    path = os.path.join(out_dir, CHECKPOINT_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(checkpoint, file)
+    os.replace(path + ".tmp", path)
+
+
+def export(db_path: str, out_dir: str, batch_size: int = 1000, fmt: str = "jsonl", max_batches: int | None = None) -> dict:
+    """
+    Runs one incremental export pass.
+
+    Args:
+        db_path: SQLite file used by the session service (opened read-only).
+        out_dir: Export root; holds the partitions and the checkpoint.
+        batch_size: Rows read, flattened and written per batch.
+        fmt: "jsonl" (gzip) or "parquet".
+        max_batches: Stop after this many batches per table (None = until caught up).
+
+    Returns:
+        dict with the rows and files written and the new checkpoint.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"Unknown export format '{fmt}', expected one of {tuple(WRITERS)}")
+    os.makedirs(out_dir, exist_ok=True)
+    checkpoint = load_checkpoint(out_dir)
+    report = {"events": 0, "sessions": 0, "files": 0}
+
+    clock = InvocationClock()
+    for count, rows in enumerate(iter_event_batches(db_path, checkpoint["events_rowid"], batch_size), 1):
+        records = [flatten_event(row, clock) for row in rows]
+        name = f"part-{rows[0]['rowid']:012d}-{rows[-1]['rowid']:012d}"
+        report["files"] += write_partitioned(out_dir, "events", name, records, "timestamp", fmt)
+        report["events"] += len(records)
+        checkpoint["events_rowid"] = rows[-1]["rowid"]
+        save_checkpoint(out_dir, checkpoint)
+        if max_batches and count >= max_batches:
+            break
+
+    since, boundary = _session_checkpoint(checkpoint)
+    for count, rows in enumerate(iter_session_batches(db_path, since, batch_size), 1):
+        fresh = []
+        for row in rows:
+            key, digest = _session_key(row), _state_digest(row)
+            if row["update_time"] == since and boundary.get(key) == digest:
+                continue   # exported by an earlier pass and unchanged since
+            if row["update_time"] != since:
+                since, boundary = row["update_time"], {}
+            boundary[key] = digest
+            fresh.append(row)
+        if fresh:
+            records = [record for row in fresh for record in flatten_session(row)]
+            report["files"] += write_partitioned(out_dir, "sessions", _session_part_name(fresh), records, "update_time", fmt)
+            report["sessions"] += len(fresh)
+        checkpoint["sessions_after"] = since
+        checkpoint["sessions_boundary"] = boundary
+        save_checkpoint(out_dir, checkpoint)
+        if max_batches and count >= max_batches:
+            break
+
+    report["checkpoint"] = checkpoint
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="my_agent_data.db")
+    parser.add_argument("--out", default="exports", help="export root (partitions and checkpoint)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--format", choices=sorted(WRITERS), default="jsonl")
+    parser.add_argument("--max-batches", type=int, default=None, help="per table, per pass")
+    parser.add_argument("--interval", type=float, default=0, help="repeat every N seconds (background job mode)")
+    args = parser.parse_args()
+
+    while True:
+        report = export(args.db, args.out, batch_size=args.batch_size, fmt=args.format, max_batches=args.max_batches)
+        print(json.dumps(report))
+        if not args.interval:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,210 @@
+import json
+import threading
+import time
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.sessions import BaseSessionService, Session
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+
+from config import METRICS_PROM_FILE, METRICS_TURN_LOG
+from runtime.invocation_map import InvocationMap
+from runtime.metrics import MetricsRegistry, metrics
+
+# Invocation whose model call runs in the current task, so retry loops can attribute retries to a turn.
+current_invocation_id: ContextVar[str | None] = ContextVar("current_invocation_id", default=None)
+
+
+class MetricsPlugin(BasePlugin):
+    """
+    Records per-turn hot-path timings for every agent in the app.
+
+    Tools (FunctionTools and AgentTool sub-agent calls alike) and model calls
+    are timed through ADK's plugin callbacks; each finished turn is observed
+    in the registry and, when `turn_log_path` is set, appended as one JSON
+    line with its span breakdown and token counts.
+    """
+
+    def __init__(
+        self,
+        registry: MetricsRegistry = metrics,
+        turn_log_path: str | None = None,
+        prometheus_file: str | None = None,
+        prometheus_file_interval_s: float = 10.0,
+    ):
+        super().__init__(name="metrics")
+        self.registry = registry
+        self.turn_log_path = turn_log_path
+        self.prometheus_file = prometheus_file
+        self.prometheus_file_interval_s = prometheus_file_interval_s
+        self._last_prometheus_write = 0.0
+        self._turns: InvocationMap[str, dict] = InvocationMap()
+        self._open_spans: InvocationMap[tuple, float] = InvocationMap()
+        self._log_lock = threading.Lock()
+
+    def _turn(self, invocation_id: str) -> dict:
+        return self._turns.setdefault(invocation_id, lambda: {
+            "started": time.perf_counter(), "spans": [], "model_calls": 0, "tool_calls": 0,
+            "prompt_tokens": 0, "completion_tokens": 0, "errors": 0, "retries": 0,
+        })
+
+    def record_retry(self, invocation_id: str | None, target: str) -> None:
+        """Called by retry loops (e.g. the rate limiter) so retries show up per turn."""
+        self.registry.inc("retries_total", help="Retried calls by target", target=target)
+        turn = self._turns.get(invocation_id)
+        if turn is not None:
+            turn["retries"] += 1
+
+    async def before_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        self._turn(invocation_context.invocation_id)
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        turn = self._turns.pop(invocation_context.invocation_id, None)
+        if turn is None:
+            return
+        elapsed = time.perf_counter() - turn["started"]
+        agent = invocation_context.agent.name
+        self.registry.observe("turn_seconds", elapsed, help="Wall time per turn", agent=agent)
+        self.registry.observe("turn_model_calls", turn["model_calls"], help="Model calls per turn",
+                              buckets=(1, 2, 3, 4, 6, 8, 12, 16), agent=agent)
+        self.registry.observe("turn_tool_calls", turn["tool_calls"], help="Tool calls per turn",
+                              buckets=(0, 1, 2, 3, 4, 6, 8, 12), agent=agent)
+        self._write_turn(invocation_context, turn, elapsed)
+        self._maybe_write_prometheus_file()
+
+    async def before_model_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        key = ("model", callback_context.invocation_id, callback_context.agent_name)
+        self._open_spans.set(key, time.perf_counter())
+        current_invocation_id.set(callback_context.invocation_id)
+        return None
+
+    def _close_model_span(self, callback_context: CallbackContext, model: str, outcome: str) -> float | None:
+        started = self._open_spans.pop(("model", callback_context.invocation_id, callback_context.agent_name), None)
+        if started is None:
+            return None
+        elapsed = time.perf_counter() - started
+        self.registry.observe("llm_seconds", elapsed, help="Model call latency", agent=callback_context.agent_name,
+                              model=model, outcome=outcome)
+        turn = self._turn(callback_context.invocation_id)
+        turn["model_calls"] += 1
+        turn["spans"].append({"kind": "model", "name": callback_context.agent_name, "seconds": round(elapsed, 6), "outcome": outcome})
+        return elapsed
+
+    async def after_model_callback(self, *, callback_context: CallbackContext, llm_response: LlmResponse) -> Optional[LlmResponse]:
+        if llm_response.partial:
+            return None   # streamed chunks; the span closes on the final response
+        model = getattr(llm_response, "model_version", None) or "unknown"
+        self._close_model_span(callback_context, model, "error" if llm_response.error_code else "ok")
+        usage = llm_response.usage_metadata
+        if usage:
+            prompt, completion = usage.prompt_token_count or 0, usage.candidates_token_count or 0
+            self.registry.inc("llm_tokens_total", prompt, help="Tokens by kind", agent=callback_context.agent_name, kind="prompt")
+            self.registry.inc("llm_tokens_total", completion, agent=callback_context.agent_name, kind="completion")
+            turn = self._turn(callback_context.invocation_id)
+            turn["prompt_tokens"] += prompt
+            turn["completion_tokens"] += completion
+        return None
+
+    async def on_model_error_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest, error: Exception) -> Optional[LlmResponse]:
+        self._close_model_span(callback_context, llm_request.model or "unknown", "error")
+        code = getattr(error, "code", None) or type(error).__name__
+        self.registry.inc("llm_errors_total", help="Failed model calls by error code", agent=callback_context.agent_name, code=code)
+        self._turn(callback_context.invocation_id)["errors"] += 1
+        return None
+
+    async def before_tool_callback(self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext) -> Optional[dict]:
+        self._open_spans.set(("tool", tool_context.function_call_id), time.perf_counter())
+        return None
+
+    def _close_tool_span(self, tool: BaseTool, tool_context: ToolContext, outcome: str) -> None:
+        started = self._open_spans.pop(("tool", tool_context.function_call_id), None)
+        if started is None:
+            return
+        elapsed = time.perf_counter() - started
+        self.registry.observe("tool_seconds", elapsed, help="Tool latency (including AgentTool sub-agents)",
+                              tool=tool.name, outcome=outcome)
+        turn = self._turn(tool_context.invocation_id)
+        turn["tool_calls"] += 1
+        turn["spans"].append({"kind": "tool", "name": tool.name, "seconds": round(elapsed, 6), "outcome": outcome})
+
+    async def after_tool_callback(self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext, result: dict) -> Optional[dict]:
+        outcome = "error" if isinstance(result, dict) and result.get("status") == "error" else "ok"
+        self._close_tool_span(tool, tool_context, outcome)
+        return None
+
+    async def on_tool_error_callback(self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext, error: Exception) -> Optional[dict]:
+        self._close_tool_span(tool, tool_context, "exception")
+        self._turn(tool_context.invocation_id)["errors"] += 1
+        return None
+
+    def _write_turn(self, invocation_context: InvocationContext, turn: dict, elapsed: float) -> None:
+        if not self.turn_log_path:
+            return
+        record = {
+            "ts": time.time(),
+            "invocation_id": invocation_context.invocation_id,
+            "session_id": invocation_context.session.id,
+            "agent": invocation_context.agent.name,
+            "seconds": round(elapsed, 6),
+            **{k: v for k, v in turn.items() if k != "started"},
+        }
+        with self._log_lock, open(self.turn_log_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def _maybe_write_prometheus_file(self) -> None:
+        now = time.monotonic()
+        if self.prometheus_file and now - self._last_prometheus_write >= self.prometheus_file_interval_s:
+            self._last_prometheus_write = now
+            self.registry.write_prometheus_file(self.prometheus_file)
+
+
+class InstrumentedSessionService(BaseSessionService):
+    """Times every call into the wrapped session service (SQLite reads and writes included)."""
+
+    def __init__(self, inner: BaseSessionService, registry: MetricsRegistry = metrics):
+        self.inner = inner
+        self.registry = registry
+
+    async def _timed(self, operation: str, coroutine):
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            return await coroutine
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            self.registry.observe("session_store_seconds", time.perf_counter() - started,
+                                  help="Session service latency", operation=operation, outcome=outcome)
+
+    async def create_session(self, **kwargs) -> Session:
+        return await self._timed("create_session", self.inner.create_session(**kwargs))
+
+    async def get_session(self, **kwargs) -> Optional[Session]:
+        return await self._timed("get_session", self.inner.get_session(**kwargs))
+
+    async def list_sessions(self, **kwargs):
+        return await self._timed("list_sessions", self.inner.list_sessions(**kwargs))
+
+    async def delete_session(self, **kwargs) -> None:
+        return await self._timed("delete_session", self.inner.delete_session(**kwargs))
+
+    async def append_event(self, session: Session, event):
+        return await self._timed("append_event", self.inner.append_event(session, event))
+
+    def __getattr__(self, name: str):
+        # Anything not timed (engine, max_events, ...) is served by the wrapped service.
+        return getattr(self.inner, name)
+
+
+# Shared by every app and runner in the process so all turns land in one registry.
+metrics_plugin = MetricsPlugin(
+    turn_log_path=METRICS_TURN_LOG or None,
+    prometheus_file=METRICS_PROM_FILE or None,
+)
@@ -0,0 +1,62 @@
+"""
+Bounded per-invocation records for plugins and exporters.
+
+Plugins keep a record per invocation from before_run_callback to
+after_run_callback, but ADK skips after_run_callback when a run raises, so
+records cannot rely on being removed. InvocationMap keeps entries in the
+order they were last set: each set() drops entries older than `max_age_s`
+and, past `capacity`, the least recently set ones, so a long-running
+process holds at most `capacity` of them whatever happens to its runs.
+"""
+import time
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+# Long past any turn's deadline; only records whose run never finished get this old.
+STALE_INVOCATION_SECONDS = 900
+MAX_TRACKED_INVOCATIONS = 10_000
+
+
+class InvocationMap(Generic[K, V]):
+    """Mapping that forgets entries older than `max_age_s` (None: never) and keeps at most `capacity`."""
+
+    def __init__(self, max_age_s: float | None = STALE_INVOCATION_SECONDS, capacity: int = MAX_TRACKED_INVOCATIONS):
+        self.max_age_s = max_age_s
+        self.capacity = capacity
+        self._items: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def __contains__(self, key: K) -> bool:
+        return key in self._items
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, key: K, default: V | None = None) -> V | None:
+        item = self._items.get(key)
+        return item[1] if item is not None else default
+
+    def set(self, key: K, value: V) -> V:
+        """Stores value as the most recent entry, then evicts stale and surplus ones."""
+        now = time.monotonic()
+        self._items[key] = (now, value)
+        self._items.move_to_end(key)
+        if self.max_age_s is not None:
+            # Entries are in set order, so stale ones are at the front
+            cutoff = now - self.max_age_s
+            while self._items and next(iter(self._items.values()))[0] < cutoff:
+                self._items.popitem(last=False)
+        while len(self._items) > self.capacity:
+            self._items.popitem(last=False)
+        return value
+
+    def setdefault(self, key: K, factory: Callable[[], V]) -> V:
+        """The entry for key, created with factory() if there is none (an existing entry keeps its age)."""
+        item = self._items.get(key)
+        return item[1] if item is not None else self.set(key, factory())
+
+    def pop(self, key: K, default: V | None = None) -> V | None:
+        item = self._items.pop(key, None)
+        return item[1] if item is not None else default
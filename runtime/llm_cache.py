@@ -0,0 +1,218 @@
+"""
+Content-addressed cache for model calls, usable as a record/replay backend.
+
+CachingLlm wraps any BaseLlm. Each request is normalized (system
+instruction, tool declarations, generation config and contents; per-run
+function-call ids dropped, inline images replaced by their sha256) and
+hashed; the key is looked up in a local SQLite store. Session state reaches
+the model only through the rendered instruction and tool results, so it is
+part of the key without being hashed separately.
+
+Modes:
+    "cache"  - serve hits, call the model and store the response on a miss
+    "record" - always call the model and overwrite the stored response
+    "replay" - serve hits only (TTL ignored); a miss raises LlmCacheMiss
+"""
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, AsyncGenerator
+
+from google.adk.agents import LlmAgent
+from google.adk.models import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.tools import AgentTool
+from pydantic import ConfigDict
+
+from config import LLM_CACHE_MAX_BYTES, LLM_CACHE_MODE, LLM_CACHE_PATH, LLM_CACHE_REPLAY_LATENCY, LLM_CACHE_TTL_SECONDS
+from runtime.metrics import metrics
+
+MODES = ("cache", "record", "replay")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_access REAL NOT NULL,
+    latency REAL NOT NULL,
+    size INTEGER NOT NULL,
+    payload BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ix_llm_cache_last_access ON llm_cache (last_access);
+"""
+
+
+class LlmCacheMiss(LookupError):
+    """Raised in replay mode when a request was never recorded."""
+
+
+def _normalize(value: Any) -> Any:
+    """JSON-ready copy of a dumped request with run-specific noise removed."""
+    if isinstance(value, dict):
+        if "data" in value and "mime_type" in value:   # inline blob: hash instead of embedding the bytes
+            data = value["data"]
+            digest = hashlib.sha256(data if isinstance(data, bytes) else str(data).encode()).hexdigest()
+            return {"mime_type": value["mime_type"], "sha256": digest}
+        return {
+            key: _normalize(item) for key, item in sorted(value.items())
+            if key not in ("id", "thought_signature", "http_options", "labels") and item is not None
+        }
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    if isinstance(value, str):
+        return value.strip()
+    return value
+
+
+def request_key(model: str, llm_request: LlmRequest) -> str:
+    config = llm_request.config.model_dump(exclude_none=True) if llm_request.config else {}
+    payload = {
+        "model": llm_request.model or model,
+        "config": _normalize(config),
+        "contents": _normalize([content.model_dump(exclude_none=True) for content in llm_request.contents]),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+class LlmResponseStore:
+    """SQLite store of zlib-compressed response lists with TTL and least-recently-used size eviction."""
+
+    def __init__(self, path: str = LLM_CACHE_PATH, ttl_s: float | None = LLM_CACHE_TTL_SECONDS,
+                 max_bytes: int = LLM_CACHE_MAX_BYTES):
+        self.path = path
+        self.ttl_s = ttl_s
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+
+    def get(self, key: str, ignore_ttl: bool = False) -> tuple[list[dict], float] | None:
+        """Returns (response dicts, recorded latency) or None."""
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT created, latency, payload FROM llm_cache WHERE key = ?", (key,),
+            ).fetchone()
+            if row is None:
+                return None
+            created, latency, payload = row
+            if not ignore_ttl and self.ttl_s is not None and created + self.ttl_s < now:
+                self._connection.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                return None
+            self._connection.execute("UPDATE llm_cache SET last_access = ? WHERE key = ?", (now, key))
+        return json.loads(zlib.decompress(payload)), latency
+
+    def put(self, key: str, model: str, responses: list[dict], latency: float) -> None:
+        payload = zlib.compress(json.dumps(responses).encode("utf-8"), 6)
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, model, created, last_access, latency, size, payload) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, now, now, latency, len(payload), payload),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        total = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM llm_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        freed = 0
+        victims = []
+        for key, size in self._connection.execute("SELECT key, size FROM llm_cache ORDER BY last_access"):
+            if total - freed <= self.max_bytes:
+                break
+            victims.append((key,))
+            freed += size
+        self._connection.executemany("DELETE FROM llm_cache WHERE key = ?", victims)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, size = self._connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache").fetchone()
+        return {"entries": entries, "bytes": size}
+
+    def close(self) -> None:
+        self._connection.close()
+
+
+class CachingLlm(BaseLlm):
+    """BaseLlm wrapper that serves repeated requests from an LlmResponseStore."""
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    inner: BaseLlm
+    store: LlmResponseStore
+    mode: str = "cache"
+    replay_latency: bool = False   # replay hits sleep for the latency recorded with them
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        key = request_key(self.inner.model, llm_request)
+        if self.mode != "record":
+            hit = await asyncio.to_thread(self.store.get, key, self.mode == "replay")
+            if hit is not None:
+                responses, latency = hit
+                metrics.inc("llm_cache_requests_total", help="Model requests by cache result", result="hit")
+                if self.mode == "replay" and self.replay_latency and latency:
+                    await asyncio.sleep(latency)
+                for data in responses:
+                    response = LlmResponse.model_validate_json(json.dumps(data))
+                    response.usage_metadata = None   # nothing was spent on this call
+                    response.custom_metadata = {**(response.custom_metadata or {}), "llm_cache": "hit"}
+                    yield response
+                return
+            if self.mode == "replay":
+                metrics.inc("llm_cache_requests_total", result="replay_miss")
+                raise LlmCacheMiss(f"No recorded response for request {key[:12]} (model {self.inner.model})")
+
+        metrics.inc("llm_cache_requests_total", result="miss")
+        started = time.perf_counter()
+        final: list[dict] = []
+        cacheable = True
+        async for response in self.inner.generate_content_async(llm_request, stream=stream):
+            if response.error_code:
+                cacheable = False
+            if not response.partial:
+                data = response.model_dump(mode="json", exclude_none=True, exclude={"usage_metadata", "custom_metadata"})
+                # ADK assigns fresh ids to function calls that arrive without one; never replay old ids
+                for part in data.get("content", {}).get("parts", []):
+                    part.get("function_call", {}).pop("id", None)
+                final.append(data)
+            yield response
+        if cacheable and final:
+            await asyncio.to_thread(self.store.put, key, self.inner.model, final, time.perf_counter() - started)
+
+
+def use_cached_models(agent: LlmAgent, store: LlmResponseStore, mode: str = "cache", replay_latency: bool = False) -> None:
+    """Wraps the model of `agent`, its sub-agents and any AgentTool agents in CachingLlm, in place."""
+    if mode not in MODES:
+        raise ValueError(f"Unknown LLM cache mode '{mode}', expected one of {MODES}")
+    if not isinstance(agent.model, CachingLlm):
+        agent.model = CachingLlm(
+            model=agent.canonical_model.model, inner=agent.canonical_model, store=store,
+            mode=mode, replay_latency=replay_latency,
+        )
+    for sub_agent in agent.sub_agents:
+        if isinstance(sub_agent, LlmAgent):
+            use_cached_models(sub_agent, store, mode, replay_latency)
+    for tool in agent.tools:
+        if isinstance(tool, AgentTool) and isinstance(tool.agent, LlmAgent):
+            use_cached_models(tool.agent, store, mode, replay_latency)
+
+
+def configure_llm_cache(*agents: LlmAgent) -> LlmResponseStore | None:
+    """Applies LLM_CACHE_MODE from config to `agents` (one shared store); returns the store, or None when caching is off."""
+    if LLM_CACHE_MODE == "off":
+        return None
+    store = LlmResponseStore()
+    for agent in agents:
+        use_cached_models(agent, store, LLM_CACHE_MODE, replay_latency=LLM_CACHE_REPLAY_LATENCY)
+    return store
@@ -0,0 +1,138 @@
+import bisect
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Seconds; covers in-process tools (sub-ms) up to slow model calls with retries.
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted(labels.items()))
+
+
+def _format_labels(key: tuple, extra: dict | None = None) -> str:
+    items = list(key) + list((extra or {}).items())
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v)}"' for k, v in items) + "}"
+
+
+class _Histogram:
+    def __init__(self, buckets: tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.n += 1
+
+
+class MetricsRegistry:
+    """
+    Minimal in-process counters and histograms with labels, rendered in the
+    Prometheus text format. Thread-safe, since tools also run on worker threads.
+    """
+
+    def __init__(self, namespace: str = "order_support"):
+        self.namespace = namespace
+        self._counters: dict[str, dict[tuple, float]] = {}
+        self._histograms: dict[str, dict[tuple, _Histogram]] = {}
+        self._help: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _name(self, name: str) -> str:
+        return f"{self.namespace}_{name}"
+
+    def inc(self, name: str, value: float = 1.0, help: str = "", **labels) -> None:
+        with self._lock:
+            series = self._counters.setdefault(self._name(name), {})
+            key = _label_key(labels)
+            series[key] = series.get(key, 0.0) + value
+            if help:
+                self._help.setdefault(self._name(name), help)
+
+    def observe(self, name: str, value: float, help: str = "", buckets: tuple[float, ...] = DEFAULT_BUCKETS, **labels) -> None:
+        with self._lock:
+            series = self._histograms.setdefault(self._name(name), {})
+            key = _label_key(labels)
+            if key not in series:
+                series[key] = _Histogram(buckets)
+            series[key].observe(value)
+            if help:
+                self._help.setdefault(self._name(name), help)
+
+    def snapshot(self) -> dict:
+        """Plain-dict view: counters by label set, histograms as count/sum."""
+        with self._lock:
+            return {
+                "counters": {n: {str(dict(k)): v for k, v in s.items()} for n, s in self._counters.items()},
+                "histograms": {
+                    n: {str(dict(k)): {"count": h.n, "sum": round(h.total, 6)} for k, h in s.items()}
+                    for n, s in self._histograms.items()
+                },
+            }
+
+    def render_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            for name, series in sorted(self._counters.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} counter")
+                for key, value in series.items():
+                    lines.append(f"{name}{_format_labels(key)} {value}")
+            for name, series in sorted(self._histograms.items()):
+                if name in self._help:
+                    lines.append(f"# HELP {name} {self._help[name]}")
+                lines.append(f"# TYPE {name} histogram")
+                for key, histogram in series.items():
+                    cumulative = 0
+                    for bound, count in zip(histogram.buckets, histogram.counts):
+                        cumulative += count
+                        lines.append(f"{name}_bucket{_format_labels(key, {'le': bound})} {cumulative}")
+                    lines.append(f"{name}_bucket{_format_labels(key, {'le': '+Inf'})} {histogram.n}")
+                    lines.append(f"{name}_sum{_format_labels(key)} {histogram.total}")
+                    lines.append(f"{name}_count{_format_labels(key)} {histogram.n}")
+        return "\n".join(lines) + "\n"
+
+    def write_prometheus_file(self, path: str) -> None:
+        """Writes the text exposition atomically, e.g. for node_exporter's textfile collector."""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render_prometheus())
+        os.replace(tmp_path, path)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def start_http_server(registry: "MetricsRegistry", port: int, host: str = "0.0.0.0") -> ThreadingHTTPServer:
+    """Serves GET /metrics in Prometheus text format from a daemon thread."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            body = registry.render_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+metrics = MetricsRegistry()
@@ -0,0 +1,151 @@
+"""
+Migrates session state written before the typed schema (flat keys such as
+`order:<id>:issue_type`, `substep`, `workflow`, `damage:severity`,
+`policy_info`) into the compact per-order records of
+order_support_agent.session_state.
+
+Only the `sessions` table is rewritten: ADK rebuilds state from that row on
+resume, and state deltas in past events are history. Run it with the agent
+stopped; `--dry-run` prints the before/after sizes without writing.
+
+    python -m runtime.migrate_state --db my_agent_data.db --dry-run
+    python -m runtime.migrate_state --db my_agent_data.db
+"""
+import argparse
+import json
+import sqlite3
+from contextlib import closing
+
+from flows.registry import WORKFLOWS_BY_ISSUE
+from order_support_agent.session_state import (
+    CURRENT_ORDER_KEY,
+    ORDER_KEY_PREFIX,
+    DamageInfo,
+    Issue,
+    OrderState,
+    OrderStatus,
+    SessionState,
+    Severity,
+    WorkflowStatus,
+    order_key,
+)
+
+# Unscoped keys from the original hand-written flows, attached to the conversation's order.
+# order:<id>:<field> keys without a typed field of their own become workflow variables.
+UNSCOPED_RENAMES = {"resolution_confirmed": "resolution", "preferred_resolution": "resolution"}
+DROPPED_KEYS = {"policy_info", "pending_issues", "substep", "workflow", "damage", "damage:severity"}
+LEGACY_UNSCOPED = {"check_with_neighbourhood", "investigation", *UNSCOPED_RENAMES}
+
+
+def _legacy_fields(state: dict) -> dict[str, dict]:
+    """{order_id: {field: value}} from order:<id>:<field> keys."""
+    orders: dict[str, dict] = {}
+    for key, value in state.items():
+        parts = key.split(":", 2)
+        if len(parts) == 3 and parts[0] + ":" == ORDER_KEY_PREFIX:
+            orders.setdefault(parts[1], {})[parts[2]] = value
+    return orders
+
+
+def _terminal_substep(issue: Issue | None, resolution: str | None) -> str | None:
+    """Old states only recorded substep "completed"; map it onto the matching terminal step."""
+    workflow = WORKFLOWS_BY_ISSUE.get(issue.label) if issue else None
+    step = workflow.steps.get(f"{resolution}_confirmed") if workflow and resolution else None
+    return step.name if step and step.terminal else None
+
+
+def migrate_state(state: dict) -> dict:
+    """
+    Returns the state converted to the typed schema. Already-migrated
+    records and keys the schema does not own (history_summary, app:/user:
+    scopes, ...) are kept as they are, so running it twice is harmless.
+    """
+    legacy = _legacy_fields(state)
+    current = state.get(CURRENT_ORDER_KEY)
+    # Unscoped keys belong to the current order, or to the only order with a record.
+    owner = current if current in legacy or len(legacy) != 1 else next(iter(legacy))
+
+    migrated = {
+        key: value for key, value in state.items()
+        if key not in DROPPED_KEYS and key not in LEGACY_UNSCOPED and key not in (
+            f"{ORDER_KEY_PREFIX}{order_id}:{name}" for order_id, fields in legacy.items() for name in fields
+        )
+    }
+    session = SessionState(migrated, budget_bytes=2**31)
+    if state.get("pending_issues"):
+        session.pending_issue = Issue.parse(state["pending_issues"])
+
+    order_ids = set(legacy) | ({owner} if owner and any(k in state for k in LEGACY_UNSCOPED | DROPPED_KEYS) else set())
+    for order_id in order_ids:
+        fields = dict(legacy.get(order_id, {}))
+        if order_id == owner:
+            for key in LEGACY_UNSCOPED:
+                if key in state:
+                    fields.setdefault(UNSCOPED_RENAMES.get(key, key), state[key])
+            for key in ("workflow", "substep"):
+                if key in state:
+                    fields.setdefault(key, state[key])
+
+        existing = OrderState.from_compact(migrated.get(order_key(order_id)))
+        issue = Issue.parse(fields.pop("issue_type", None)) or existing.issue
+        damage = DamageInfo(
+            image_severity=Severity.parse(fields.pop("damage_severity", None)),
+            damage_type=fields.pop("damage_type", None),
+            affected_area=fields.pop("affected_area", None),
+            summary=fields.pop("damage_summary", None),
+            policy_severity=Severity.parse(state.get("damage:severity")) if order_id == owner else None,
+            detail=state.get("damage") if order_id == owner else None,
+        )
+        status = OrderStatus.parse(fields.pop("order_status", None)) or existing.status
+        workflow = WorkflowStatus.parse(fields.pop("workflow", None)) or existing.workflow
+        substep = fields.pop("substep", None)
+        variables = {**existing.vars, **fields}
+        known_steps = WORKFLOWS_BY_ISSUE[issue.label].steps if issue and issue.label in WORKFLOWS_BY_ISSUE else {}
+        if substep and substep not in known_steps:
+            substep = _terminal_substep(issue, variables.get("resolution"))
+        order = OrderState(
+            issue=issue,
+            status=status,
+            workflow=workflow,
+            substep=substep or existing.substep,
+            damage=damage if damage.to_compact() else existing.damage,
+            policy_refs=existing.policy_refs,   # policy_info held text, not chunk ids; it is dropped
+            vars=variables,
+        )
+        session.save(order_id, order)
+    return migrated
+
+
+def migrate_database(db_path: str, dry_run: bool = False) -> dict:
+    stats = {"sessions": 0, "migrated": 0, "bytes_before": 0, "bytes_after": 0}
+    with closing(sqlite3.connect(db_path)) as connection:
+        connection.row_factory = sqlite3.Row
+        rows = connection.execute("SELECT app_name, user_id, id, state FROM sessions").fetchall()
+        updates = []
+        for row in rows:
+            state = json.loads(row["state"] or "{}")
+            new_state = migrate_state(state)
+            stats["sessions"] += 1
+            stats["bytes_before"] += len(json.dumps(state))
+            stats["bytes_after"] += len(json.dumps(new_state))
+            if new_state != state:
+                stats["migrated"] += 1
+                updates.append((json.dumps(new_state), row["app_name"], row["user_id"], row["id"]))
+        if updates and not dry_run:
+            with connection:
+                connection.executemany(
+                    "UPDATE sessions SET state = ? WHERE app_name = ? AND user_id = ? AND id = ?", updates,
+                )
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default="my_agent_data.db", help="SQLite session store file")
+    parser.add_argument("--dry-run", action="store_true", help="report what would change without writing")
+    args = parser.parse_args()
+    print(json.dumps(migrate_database(args.db, dry_run=args.dry_run), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Bounded thread pool for blocking I/O called from async tools.
+
+Tools run on the event loop that runner.run_async drives, which every
+session served by the process shares; a blocking client call there (Chroma
+query, embedding request, SQLite lookup) stalls all of them. run_blocking()
+moves such a call onto a process-wide pool of TOOL_IO_THREADS threads and
+awaits it, so the loop keeps serving other sessions. The pool is bounded:
+when every thread is busy, further calls queue instead of spawning threads,
+and the time they wait is recorded in tool_io_wait_seconds.
+
+CPU-only tools (regex extraction, workflow steps) stay inline: they finish
+in microseconds and a thread hop would cost more than it saves.
+"""
+import asyncio
+import contextvars
+import functools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from config import TOOL_IO_THREADS
+from runtime.metrics import metrics
+
+T = TypeVar("T")
+
+_executor: ThreadPoolExecutor | None = None
+_executor_lock = threading.Lock()
+
+
+def io_executor() -> ThreadPoolExecutor:
+    """The shared pool, created on first use (so spawned workers each start their own)."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=TOOL_IO_THREADS, thread_name_prefix="tool-io")
+        return _executor
+
+
+async def run_blocking(func: Callable[..., T], *args, **kwargs) -> T:
+    """Runs func(*args, **kwargs) on the I/O pool, with the caller's context variables, and awaits its result."""
+    queued = time.perf_counter()
+    name = getattr(func, "__qualname__", type(func).__name__)
+
+    def call() -> T:
+        metrics.observe("tool_io_wait_seconds", time.perf_counter() - queued,
+                        help="Time blocking tool calls waited for an I/O thread", call=name)
+        return func(*args, **kwargs)
+
+    # Copied like asyncio.to_thread does, so e.g. retry attribution to the current turn still works
+    context = contextvars.copy_context()
+    return await asyncio.get_running_loop().run_in_executor(io_executor(), functools.partial(context.run, call))
@@ -0,0 +1,330 @@
+"""
+Process-wide client-side rate limiting for Gemini (chat and embeddings).
+
+One GeminiRateLimiter is shared by every agent and the embedding client:
+    - two token buckets, requests/min and tokens/min, sized to the quota;
+    - an AIMD concurrency limit: +1 slot per window of successful calls,
+      halved (at most once per cooldown) when 429/503s come back;
+    - full-jitter exponential backoff, bounded by a per-call deadline.
+
+Waiting happens before the request is sent, so a burst queues at the quota
+ceiling instead of turning into a retry storm. All state sits behind a
+threading.Lock, so the same limiter serves coroutines on any event loop and
+blocking callers on worker threads (Chroma calls embeddings synchronously).
+"""
+import asyncio
+import random
+import threading
+import time
+from collections import deque
+from typing import AsyncGenerator, Awaitable, Callable, TypeVar
+
+from google.adk.agents import LlmAgent
+from google.adk.models import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.tools import AgentTool
+from pydantic import ConfigDict
+
+from config import (
+    GEMINI_MAX_CONCURRENCY,
+    GEMINI_MIN_CONCURRENCY,
+    GEMINI_RPM,
+    GEMINI_TPM,
+    LLM_RETRY_BASE_DELAY_SECONDS,
+    LLM_RETRY_DEADLINE_SECONDS,
+    LLM_RETRY_MAX_DELAY_SECONDS,
+)
+from runtime.instrumentation import current_invocation_id, metrics_plugin
+from runtime.metrics import metrics
+
+T = TypeVar("T")
+
+THROTTLE_STATUS_CODES = {429, 503}
+RETRYABLE_STATUS_CODES = {429, 500, 503, 504}
+
+
+def status_code(error: BaseException) -> int | None:
+    """HTTP status of a google-genai / google-api-core error, if it carries one."""
+    for attribute in ("code", "status_code"):
+        value = getattr(error, attribute, None)
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            continue
+    return None
+
+
+class TokenBucket:
+    """
+    Refills at `rate_per_s` up to `capacity`. reserve() always succeeds and
+    returns how long the caller must wait; the balance may go negative, so
+    concurrent callers queue in arrival order instead of racing.
+    """
+
+    def __init__(self, rate_per_s: float, capacity: float):
+        self.rate_per_s = rate_per_s
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_s)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= amount
+            return 0.0 if self._tokens >= 0 else -self._tokens / self.rate_per_s
+
+    def adjust(self, delta: float) -> None:
+        """Corrects an earlier reservation once the real cost is known (positive = more was used)."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens - delta)
+
+
+class AdaptiveConcurrencyLimiter:
+    """AIMD limit on in-flight calls; waiters are served first come, first served."""
+
+    def __init__(self, initial: int, minimum: int, maximum: int, decrease_factor: float = 0.5, cooldown_s: float = 2.0):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.cooldown_s = cooldown_s
+        self._limit = float(initial)
+        self._in_flight = 0
+        self._last_decrease = 0.0
+        self._waiters: deque[dict] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def _grant_waiters(self) -> None:
+        while self._waiters and self._in_flight < int(self._limit):
+            waiter = self._waiters.popleft()
+            waiter["granted"] = True
+            self._in_flight += 1
+            if "event" in waiter:
+                waiter["event"].set()
+            else:
+                waiter["loop"].call_soon_threadsafe(_resolve, waiter["future"])
+
+    def _try_acquire(self, waiter: dict) -> bool:
+        if not self._waiters and self._in_flight < int(self._limit):
+            self._in_flight += 1
+            return True
+        self._waiters.append(waiter)
+        return False
+
+    async def acquire(self) -> None:
+        loop = asyncio.get_running_loop()
+        waiter = {"loop": loop, "future": loop.create_future(), "granted": False}
+        with self._lock:
+            if self._try_acquire(waiter):
+                return
+        try:
+            await waiter["future"]
+        except asyncio.CancelledError:
+            with self._lock:
+                if waiter["granted"]:
+                    self._in_flight -= 1
+                    self._grant_waiters()
+                else:
+                    self._waiters.remove(waiter)
+            raise
+
+    def acquire_sync(self) -> None:
+        waiter = {"event": threading.Event(), "granted": False}
+        with self._lock:
+            if self._try_acquire(waiter):
+                return
+        waiter["event"].wait()
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+            self._grant_waiters()
+
+    def on_success(self) -> None:
+        # Additive increase: about +1 slot after `limit` consecutive successes
+        with self._lock:
+            self._limit = min(self.maximum, self._limit + 1.0 / self._limit)
+            self._grant_waiters()
+
+    def on_throttle(self) -> None:
+        # Multiplicative decrease, once per cooldown so one burst of 429s halves the limit only once
+        with self._lock:
+            now = time.monotonic()
+            if now - self._last_decrease >= self.cooldown_s:
+                self._limit = max(self.minimum, self._limit * self.decrease_factor)
+                self._last_decrease = now
+
+
+def _resolve(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class GeminiRateLimiter:
+    """Requests/min and tokens/min buckets plus adaptive concurrency and jittered retries."""
+
+    def __init__(
+        self,
+        rpm: float = GEMINI_RPM,
+        tpm: float = GEMINI_TPM,
+        min_concurrency: int = GEMINI_MIN_CONCURRENCY,
+        max_concurrency: int = GEMINI_MAX_CONCURRENCY,
+        deadline_s: float = LLM_RETRY_DEADLINE_SECONDS,
+        base_delay_s: float = LLM_RETRY_BASE_DELAY_SECONDS,
+        max_delay_s: float = LLM_RETRY_MAX_DELAY_SECONDS,
+    ):
+        self.requests = TokenBucket(rpm / 60.0, capacity=max(1.0, rpm / 60.0 * 5))   # up to 5 s of burst
+        self.tokens = TokenBucket(tpm / 60.0, capacity=tpm / 60.0 * 5)
+        self.concurrency = AdaptiveConcurrencyLimiter(
+            initial=min_concurrency, minimum=min_concurrency, maximum=max_concurrency,
+        )
+        self.deadline_s = deadline_s
+        self.base_delay_s = base_delay_s
+        self.max_delay_s = max_delay_s
+
+    def quota_delay(self, estimated_tokens: int) -> float:
+        return max(self.requests.reserve(1), self.tokens.reserve(estimated_tokens))
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: uniform(0, min(max_delay, base * 2**attempt))."""
+        return random.uniform(0, min(self.max_delay_s, self.base_delay_s * 2 ** attempt))
+
+    def retry_delay(self, error: BaseException, target: str, attempt: int, started: float) -> float | None:
+        """Delay before the next attempt, or None when the error must be raised."""
+        code = status_code(error)
+        if code in THROTTLE_STATUS_CODES:
+            self.concurrency.on_throttle()
+            metrics.inc("llm_throttled_total", help="Throttled (429/503) Gemini calls", target=target, code=code)
+        if code not in RETRYABLE_STATUS_CODES:
+            return None
+        delay = self.backoff(attempt)
+        if time.monotonic() + delay - started > self.deadline_s:
+            metrics.inc("llm_retry_deadline_exceeded_total", help="Calls abandoned at the retry deadline", target=target)
+            return None
+        metrics_plugin.record_retry(current_invocation_id.get(), target)
+        return delay
+
+    async def run(self, call: Callable[[], Awaitable[T]], estimated_tokens: int = 0, target: str = "llm") -> T:
+        """Awaits call() under the limits, retrying retryable errors until the deadline."""
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            await asyncio.sleep(self.quota_delay(estimated_tokens))
+            await self.concurrency.acquire()
+            try:
+                result = await call()
+            except Exception as error:
+                delay = self.retry_delay(error, target, attempt, started)
+                if delay is None:
+                    raise
+            else:
+                self.concurrency.on_success()
+                return result
+            finally:
+                self.concurrency.release()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def run_sync(self, call: Callable[[], T], estimated_tokens: int = 0, target: str = "embedding") -> T:
+        """Blocking counterpart of run() for synchronous clients."""
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            time.sleep(self.quota_delay(estimated_tokens))
+            self.concurrency.acquire_sync()
+            try:
+                result = call()
+            except Exception as error:
+                delay = self.retry_delay(error, target, attempt, started)
+                if delay is None:
+                    raise
+            else:
+                self.concurrency.on_success()
+                return result
+            finally:
+                self.concurrency.release()
+            attempt += 1
+            time.sleep(delay)
+
+
+def estimate_tokens(llm_request: LlmRequest) -> int:
+    """Rough prompt size (4 characters per token) used to reserve tokens/min before the call."""
+    chars = len(str(llm_request.config.system_instruction or "")) if llm_request.config else 0
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            chars += len(part.text or "") + (1000 if part.inline_data else 0)   # images cost ~258 tokens each
+    return chars // 4
+
+
+class RateLimitedLlm(BaseLlm):
+    """
+    BaseLlm wrapper that sends every request through the shared limiter.
+
+    A streamed call is only retried while nothing has been yielded yet;
+    after the first chunk an error is passed through to the caller.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    inner: BaseLlm
+    limiter: GeminiRateLimiter
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        limiter = self.limiter
+        estimated = estimate_tokens(llm_request)
+        started = time.monotonic()
+        attempt = 0
+        while True:
+            await asyncio.sleep(limiter.quota_delay(estimated))
+            await limiter.concurrency.acquire()
+            yielded = False
+            used_tokens = 0
+            try:
+                async for response in self.inner.generate_content_async(llm_request, stream=stream):
+                    if response.usage_metadata and response.usage_metadata.total_token_count:
+                        used_tokens = response.usage_metadata.total_token_count
+                    yielded = True
+                    yield response
+            except Exception as error:
+                delay = None if yielded else limiter.retry_delay(error, "llm", attempt, started)
+                if delay is None:
+                    raise
+            else:
+                limiter.concurrency.on_success()
+                if used_tokens:
+                    limiter.tokens.adjust(used_tokens - estimated)
+                return
+            finally:
+                limiter.concurrency.release()
+            attempt += 1
+            await asyncio.sleep(delay)
+
+
+def use_rate_limited_models(agent: LlmAgent, limiter: GeminiRateLimiter | None = None) -> None:
+    """Routes the model of `agent`, its sub-agents and any AgentTool agents through the shared limiter, in place."""
+    limiter = limiter or gemini_limiter
+    if not isinstance(agent.model, RateLimitedLlm):
+        agent.model = RateLimitedLlm(model=agent.canonical_model.model, inner=agent.canonical_model, limiter=limiter)
+    for sub_agent in agent.sub_agents:
+        if isinstance(sub_agent, LlmAgent):
+            use_rate_limited_models(sub_agent, limiter)
+    for tool in agent.tools:
+        if isinstance(tool, AgentTool) and isinstance(tool.agent, LlmAgent):
+            use_rate_limited_models(tool.agent, limiter)
+
+
+gemini_limiter = GeminiRateLimiter()
@@ -0,0 +1,236 @@
+"""
+Serving layer: turns within a session run strictly one at a time, sessions
+run in parallel across worker processes.
+
+Inside a process, SessionLocks hands out one FIFO asyncio.Lock per
+(app, user, session); run_turn() and stream_turn() hold it for the whole
+turn (fast path included), so two messages for the same session never read
+and write its workflow state concurrently.
+
+Across processes, ShardedTurnRouter spawns N workers that share one session
+store and routes every session id to the same worker through a consistent
+hash ring. Locks therefore never need to cross processes, and changing N
+moves only about 1/N of the sessions.
+
+    router = ShardedTurnRouter(workers=4, db_url="sqlite:///my_agent_data.db")
+    reply = await router.submit("Amina", "session1", "Where is my order ORDER-240240")
+    router.close()
+"""
+import asyncio
+import bisect
+import hashlib
+import importlib
+import itertools
+import multiprocessing
+import threading
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable
+
+from google.adk.runners import Runner
+from google.genai import types
+
+from config import FAST_PATH_ENABLED, SERVING_WORKER_CONCURRENCY, SERVING_WORKERS, SESSION_DB_URL
+from order_support_agent.fast_path import try_fast_path
+from runtime.metrics import metrics
+
+# Points per worker on the hash ring; more points give a more even spread.
+RING_VNODES = 512
+
+
+class SessionLocks:
+    """One lock per session, created on first use and dropped when nobody holds or waits for it."""
+
+    def __init__(self):
+        self._locks: dict[tuple, asyncio.Lock] = {}
+        self._users: dict[tuple, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    @asynccontextmanager
+    async def hold(self, app_name: str, user_id: str, session_id: str) -> AsyncIterator[None]:
+        key = (app_name, user_id, session_id)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        self._users[key] = self._users.get(key, 0) + 1
+        if lock.locked():
+            metrics.inc("session_turns_queued_total", help="Turns that waited for an earlier turn of the same session")
+        try:
+            async with lock:
+                yield
+        finally:
+            self._users[key] -= 1
+            if not self._users[key]:
+                del self._users[key], self._locks[key]
+
+
+session_locks = SessionLocks()
+
+
+async def run_turn(
+    runner: Runner,
+    user_id: str,
+    session_id: str,
+    user_message: str,
+    fast_path: bool = FAST_PATH_ENABLED,
+) -> str:
+    """Runs one turn under the session's lock (creating the session if needed) and returns the reply text."""
+    session_service = runner.session_service
+    async with session_locks.hold(runner.app_name, user_id, session_id):
+        session = await session_service.get_session(app_name=runner.app_name, user_id=user_id, session_id=session_id)
+        if session is None:
+            await session_service.create_session(app_name=runner.app_name, user_id=user_id, session_id=session_id)
+        if fast_path:
+            routed = await try_fast_path(
+                session_service, runner.app_name, user_id, session_id, user_message, author=runner.agent.name,
+            )
+            if routed:
+                metrics.inc("fast_path_turns_total", help="Turns answered without a model call", route=routed.route)
+                return routed.reply
+
+        message = types.Content(role="user", parts=[types.Part(text=user_message)])
+        replies = []
+        async for event in runner.run_async(user_id=user_id, session_id=session_id, new_message=message):
+            if event.content and event.content.parts and not event.partial:
+                replies.extend(part.text for part in event.content.parts if part.text and not part.thought)
+        return "\n".join(replies)
+
+
+def _hash(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    """Consistent hashing of session ids onto `nodes` worker indexes."""
+
+    def __init__(self, nodes: int, vnodes: int = RING_VNODES):
+        self.nodes = nodes
+        points = sorted((_hash(f"{node}#{replica}"), node) for node in range(nodes) for replica in range(vnodes))
+        self._keys = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node_for(self, session_id: str) -> int:
+        index = bisect.bisect(self._keys, _hash(session_id)) % len(self._keys)
+        return self._nodes[index]
+
+
+def _load(path: str):
+    module, _, attribute = path.partition(":")
+    return getattr(importlib.import_module(module), attribute)
+
+
+async def _serve(inbox, outbox, app_path: str, db_url: str, concurrency: int, setup: Callable | None) -> None:
+    from runtime.instrumentation import InstrumentedSessionService
+    from runtime.session_store import create_session_service
+
+    app = _load(app_path)
+    if setup:
+        setup(app)
+    runner = Runner(app=app, session_service=InstrumentedSessionService(create_session_service(db_url=db_url)))
+    slots = asyncio.Semaphore(concurrency)
+    loop = asyncio.get_running_loop()
+    tasks = set()
+
+    async def handle(request_id, user_id, session_id, text, fast_path):
+        try:
+            outbox.put((request_id, await run_turn(runner, user_id, session_id, text, fast_path), None))
+        except Exception as error:   # reported to the caller, the worker keeps serving
+            outbox.put((request_id, None, f"{type(error).__name__}: {error}"))
+        finally:
+            slots.release()
+
+    while True:
+        request = await loop.run_in_executor(None, inbox.get)
+        if request is None:
+            break
+        await slots.acquire()
+        # Tasks reach the session lock in arrival order, and the lock is FIFO, so a session's turns stay ordered
+        task = asyncio.create_task(handle(*request))
+        tasks.add(task)
+        task.add_done_callback(tasks.discard)
+    await asyncio.gather(*tasks)
+
+
+def _worker_main(inbox, outbox, app_path: str, db_url: str, concurrency: int, setup: Callable | None) -> None:
+    asyncio.run(_serve(inbox, outbox, app_path, db_url, concurrency, setup))
+
+
+class ShardedTurnRouter:
+    """
+    Spawns `workers` processes, each with its own Runner over the shared
+    session store, and sends each session's turns to the worker chosen by
+    the hash ring. submit() may be awaited from any number of tasks.
+
+    `setup`, if given, must be a module-level function; it is called with
+    the app in every worker before serving (e.g. to swap in stub models).
+    """
+
+    def __init__(
+        self,
+        workers: int = SERVING_WORKERS,
+        db_url: str = SESSION_DB_URL,
+        app_path: str = "order_support_agent.agent:order_support_app",
+        concurrency: int = SERVING_WORKER_CONCURRENCY,
+        setup: Callable | None = None,
+    ):
+        if db_url == "memory" or ":memory:" in db_url:
+            raise ValueError("Workers must share a persistent session store, not an in-memory one")
+        context = multiprocessing.get_context("spawn")   # fresh interpreters: no forked gRPC or SQLite handles
+        self.ring = HashRing(workers)
+        self._outbox = context.Queue()
+        self._inboxes = [context.Queue() for _ in range(workers)]
+        self._processes = [
+            context.Process(
+                target=_worker_main, args=(inbox, self._outbox, app_path, db_url, concurrency, setup),
+                name=f"turn-worker-{index}", daemon=True,
+            )
+            for index, inbox in enumerate(self._inboxes)
+        ]
+        for process in self._processes:
+            process.start()
+        self._ids = itertools.count()
+        self._pending: dict[int, tuple[asyncio.AbstractEventLoop, asyncio.Future]] = {}
+        self._lock = threading.Lock()
+        self._collector = threading.Thread(target=self._collect, name="turn-results", daemon=True)
+        self._collector.start()
+
+    def _collect(self) -> None:
+        while True:
+            result = self._outbox.get()
+            if result is None:
+                return
+            request_id, reply, error = result
+            with self._lock:
+                loop, future = self._pending.pop(request_id)
+            loop.call_soon_threadsafe(_settle, future, reply, error)
+
+    def worker_for(self, session_id: str) -> int:
+        return self.ring.node_for(session_id)
+
+    async def submit(self, user_id: str, session_id: str, text: str, fast_path: bool = FAST_PATH_ENABLED) -> str:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        request_id = next(self._ids)
+        with self._lock:
+            self._pending[request_id] = (loop, future)
+        self._inboxes[self.worker_for(session_id)].put((request_id, user_id, session_id, text, fast_path))
+        return await future
+
+    def close(self, timeout: float = 30.0) -> None:
+        """Lets each worker finish its queued turns, then stops it."""
+        for inbox in self._inboxes:
+            inbox.put(None)
+        for process in self._processes:
+            process.join(timeout)
+            if process.is_alive():
+                process.terminate()
+        self._outbox.put(None)
+        self._collector.join(timeout)
+
+
+def _settle(future: asyncio.Future, reply: str | None, error: str | None) -> None:
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(RuntimeError(error))
+    else:
+        future.set_result(reply)
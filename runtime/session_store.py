@@ -0,0 +1,95 @@
+from typing import Any, Optional
+
+from google.adk.sessions import DatabaseSessionService, Session
+from google.adk.sessions.base_session_service import GetSessionConfig
+from sqlalchemy import event
+
+from config import (
+    SESSION_DB_URL,
+    SESSION_MAX_EVENTS,
+    SESSION_POOL_SIZE,
+    SQLITE_BUSY_TIMEOUT_MS,
+)
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",        # readers no longer block the writer (and vice versa)
+    "synchronous": "NORMAL",      # fsync at checkpoints only; safe with WAL
+    "temp_store": "MEMORY",
+    "cache_size": -16000,         # ~16 MB page cache per connection
+}
+
+SQLITE_INDEXES = [
+    # get_session filters events by session and orders them by timestamp.
+    "CREATE INDEX IF NOT EXISTS ix_events_session_timestamp "
+    "ON events (app_name, user_id, session_id, timestamp)",
+    # list_sessions filters by app and user.
+    "CREATE INDEX IF NOT EXISTS ix_sessions_app_user_update "
+    "ON sessions (app_name, user_id, update_time)",
+]
+
+
+class TunedDatabaseSessionService(DatabaseSessionService):
+    """
+    DatabaseSessionService with SQLite tuned for many concurrent sessions.
+
+    Every pooled connection gets the WAL / synchronous / busy-timeout pragmas,
+    the events and sessions tables get indexes matching the session lookups,
+    and get_session loads at most `max_events` recent events unless the caller
+    passes its own GetSessionConfig.
+    """
+
+    def __init__(
+        self,
+        db_url: str,
+        max_events: int | None = None,
+        pool_size: int = 5,
+        busy_timeout_ms: int = 5000,
+        **kwargs: Any,
+    ):
+        self.max_events = max_events or None
+        self.busy_timeout_ms = busy_timeout_ms
+        is_sqlite = db_url.startswith("sqlite")
+        if is_sqlite and ":memory:" not in db_url and db_url != "sqlite://":
+            kwargs.setdefault("pool_size", pool_size)
+            kwargs.setdefault("max_overflow", pool_size * 2)
+            kwargs.setdefault("pool_pre_ping", True)
+            kwargs.setdefault("connect_args", {"timeout": busy_timeout_ms / 1000, "check_same_thread": False})
+        super().__init__(db_url=db_url, **kwargs)
+
+        if is_sqlite:
+            event.listen(self.db_engine, "connect", self._apply_pragmas)
+            # Connections opened while the base class created the schema predate
+            # the listener; drop them so every pooled connection is tuned.
+            self.db_engine.dispose()
+            with self.db_engine.begin() as connection:
+                for statement in SQLITE_INDEXES:
+                    connection.exec_driver_sql(statement)
+
+    def _apply_pragmas(self, dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for pragma, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f"PRAGMA {pragma}={value}")
+        cursor.execute(f"PRAGMA busy_timeout={int(self.busy_timeout_ms)}")
+        cursor.close()
+
+    async def get_session(
+        self,
+        *,
+        app_name: str,
+        user_id: str,
+        session_id: str,
+        config: Optional[GetSessionConfig] = None,
+    ) -> Optional[Session]:
+        if config is None and self.max_events:
+            config = GetSessionConfig(num_recent_events=self.max_events)
+        return await super().get_session(
+            app_name=app_name, user_id=user_id, session_id=session_id, config=config
+        )
+
+
+def create_session_service(db_url: str = SESSION_DB_URL, **kwargs: Any) -> TunedDatabaseSessionService:
+    """Session service configured from config.py; keyword arguments override the defaults."""
+    kwargs.setdefault("max_events", SESSION_MAX_EVENTS)
+    kwargs.setdefault("pool_size", SESSION_POOL_SIZE)
+    kwargs.setdefault("busy_timeout_ms", SQLITE_BUSY_TIMEOUT_MS)
+    return TunedDatabaseSessionService(db_url=db_url, **kwargs)
@@ -0,0 +1,120 @@
+import time
+from dataclasses import dataclass, field
+from typing import AsyncIterator
+
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.runners import Runner
+from google.genai import types
+
+from config import FAST_PATH_ENABLED
+from order_support_agent.fast_path import try_fast_path
+from runtime.metrics import metrics
+from runtime.serving import session_locks
+
+# Shown to the customer while a tool runs; tools not listed get DEFAULT_PROGRESS.
+TOOL_PROGRESS = {
+    "extract_order_id": "Reading your order number…",
+    "detect_issue_type": "Understanding the issue…",
+    "map_issue_to_valid_status": "Looking up your order…",
+    "handle_workflows": "Working on your request…",
+    "classify_damage": "Assessing the damage…",
+    "search_damage_policy": "Checking policy…",
+    "image_detector_tool": "Analyzing your photos…",
+}
+DEFAULT_PROGRESS = "One moment…"
+
+STREAMING_RUN_CONFIG = RunConfig(streaming_mode=StreamingMode.SSE)
+
+
+@dataclass
+class StreamChunk:
+    """
+    One item of a streamed turn.
+
+    kind is one of:
+        "text"          - a text delta to append to the reply
+        "tool_progress" - a tool started; `text` is a customer-facing status line
+        "tool_done"     - that tool returned
+        "done"          - end of turn; `text` is the complete reply
+    """
+    kind: str
+    text: str = ""
+    tool: str | None = None
+    author: str | None = None
+    extra: dict = field(default_factory=dict)
+
+
+def _text_of(content: types.Content | None) -> str:
+    if not content or not content.parts:
+        return ""
+    return "".join(part.text for part in content.parts if part.text and not part.thought)
+
+
+async def stream_turn(
+    runner: Runner,
+    user_id: str,
+    session_id: str,
+    user_message: str,
+    fast_path: bool = FAST_PATH_ENABLED,
+) -> AsyncIterator[StreamChunk]:
+    """
+    Runs one turn with SSE streaming enabled and yields text deltas as the
+    model produces them, plus a progress chunk whenever a tool starts.
+
+    With SSE the runner emits partial events carrying only the new text,
+    followed by one aggregated, non-partial event for the same response; the
+    aggregate is only forwarded when no deltas preceded it (e.g. a model
+    backend that does not stream). The session's turn lock is held until
+    the generator finishes.
+    """
+    started = time.perf_counter()
+    first_chunk_seen = False
+
+    def first_chunk():
+        nonlocal first_chunk_seen
+        if not first_chunk_seen:
+            first_chunk_seen = True
+            metrics.observe("time_to_first_chunk_seconds", time.perf_counter() - started,
+                            help="Time until the first text or progress chunk of a streamed turn")
+
+    # Held for the whole turn: a second message for this session waits until this one is done
+    async with session_locks.hold(runner.app_name, user_id, session_id):
+        if fast_path:
+            routed = await try_fast_path(
+                runner.session_service, runner.app_name, user_id, session_id, user_message, author=runner.agent.name,
+            )
+            if routed:
+                first_chunk()
+                yield StreamChunk("text", routed.reply, author=runner.agent.name)
+                yield StreamChunk("done", routed.reply, author=runner.agent.name, extra={"route": routed.route})
+                return
+
+        message = types.Content(role="user", parts=[types.Part(text=user_message)])
+        responses: list[str] = []   # complete text of each model response in the turn
+        streamed_partial = False
+        async for event in runner.run_async(
+            user_id=user_id, session_id=session_id, new_message=message, run_config=STREAMING_RUN_CONFIG,
+        ):
+            text = _text_of(event.content)
+            if event.partial:
+                if text:
+                    streamed_partial = True
+                    first_chunk()
+                    yield StreamChunk("text", text, author=event.author)
+                continue
+
+            # Function calls are reported from the aggregated event only, so each tool is announced once
+            for call in event.get_function_calls():
+                first_chunk()
+                yield StreamChunk("tool_progress", TOOL_PROGRESS.get(call.name, DEFAULT_PROGRESS),
+                                  tool=call.name, author=event.author)
+            for response in event.get_function_responses():
+                yield StreamChunk("tool_done", tool=response.name, author=event.author)
+            if text:
+                responses.append(text)
+                if not streamed_partial:
+                    first_chunk()
+                    yield StreamChunk("text", text, author=event.author)
+            streamed_partial = False
+
+        yield StreamChunk("done", "\n".join(responses), author=runner.agent.name)
@@ -0,0 +1,75 @@
+import asyncio
+import random
+from typing import AsyncGenerator
+
+from google.adk.agents import LlmAgent
+from google.adk.models import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.tools import AgentTool
+from google.genai import types
+
+from order_support_agent.tools.intent_matcher import analyze_message
+
+
+class StubLlm(BaseLlm):
+    """
+    Offline stand-in for Gemini used by the load driver and benchmarks.
+
+    Mimics the shape of a real turn: a user message with an order id or an
+    issue yields the matching function call, a function response yields a
+    short text reply. Latency is simulated with `latency_s` +/- `jitter_s`,
+    and token counts are estimated from the request size.
+    """
+
+    model: str = "stub-llm"
+    latency_s: float = 0.05
+    jitter_s: float = 0.02
+
+    @classmethod
+    def supported_models(cls) -> list[str]:
+        return [r"stub-.*"]
+
+    def _next_part(self, llm_request: LlmRequest) -> types.Part:
+        last = llm_request.contents[-1] if llm_request.contents else None
+        parts = last.parts if last and last.parts else []
+
+        responses = [p.function_response for p in parts if p.function_response]
+        if responses:
+            return types.Part(text=f"Done: {responses[0].name} returned {responses[0].response}")
+
+        text = " ".join(p.text for p in parts if p.text)
+        analysis = analyze_message(text)
+        tools = llm_request.tools_dict or {}
+        if analysis.order_id and "extract_order_id" in tools:
+            return types.Part(function_call=types.FunctionCall(name="extract_order_id", args={"user_query": text}))
+        if analysis.issue_type and "detect_issue_type" in tools:
+            return types.Part(function_call=types.FunctionCall(name="detect_issue_type", args={"user_query": text}))
+        return types.Part(text="Could you tell me a little more about the problem with your order?")
+
+    async def generate_content_async(
+        self, llm_request: LlmRequest, stream: bool = False
+    ) -> AsyncGenerator[LlmResponse, None]:
+        await asyncio.sleep(max(0.0, self.latency_s + random.uniform(-self.jitter_s, self.jitter_s)))
+        part = self._next_part(llm_request)
+        prompt_tokens = sum(len(p.text or "") for c in llm_request.contents for p in (c.parts or [])) // 4
+        completion_tokens = len(part.text or "") // 4 + (8 if part.function_call else 0)
+        yield LlmResponse(
+            content=types.Content(role="model", parts=[part]),
+            usage_metadata=types.GenerateContentResponseUsageMetadata(
+                prompt_token_count=prompt_tokens,
+                candidates_token_count=completion_tokens,
+                total_token_count=prompt_tokens + completion_tokens,
+            ),
+        )
+
+
+def use_stub_models(agent: LlmAgent, **stub_kwargs) -> None:
+    """Swaps the model of `agent`, its sub-agents and any AgentTool agents for StubLlm, in place."""
+    agent.model = StubLlm(**stub_kwargs)
+    for sub_agent in agent.sub_agents:
+        if isinstance(sub_agent, LlmAgent):
+            use_stub_models(sub_agent, **stub_kwargs)
+    for tool in agent.tools:
+        if isinstance(tool, AgentTool) and isinstance(tool.agent, LlmAgent):
+            use_stub_models(tool.agent, **stub_kwargs)
@@ -0,0 +1,308 @@
+"""
+Bulk offline triage of email / web-form tickets.
+
+Streams a JSONL file of tickets ({"id"|"ticket_id"|"request_id", "text"} or
+{"title", "body"}, as in request exports) and runs the deterministic tools -
+extract_order_id, detect_issue_type, classify_damage and, for damaged
+items, search_damage_policy - in a process pool, TRIAGE_CHUNK_SIZE tickets
+per work unit. A ticket is triaged when it names exactly one order and one
+issue (and, for damage, a clear severity); only the rest are escalated to
+the LLM agent, at most TRIAGE_ESCALATION_CONCURRENCY at a time.
+
+Results are appended to the output JSONL as they complete. The checkpoint
+(<output>.checkpoint.json) holds the input byte offset up to which every
+ticket has been written; a rerun seeks there and skips ticket ids already in
+the output, so an interrupted run resumes without duplicates.
+
+    python -m runtime.triage tickets.jsonl --out triage.jsonl
+    python -m runtime.triage tickets.jsonl --out triage.jsonl --no-escalate --workers 8
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import time
+from collections import deque
+from typing import Iterator
+
+from config import (
+    TRIAGE_CHUNK_SIZE,
+    TRIAGE_ESCALATION_CONCURRENCY,
+    TRIAGE_WORKERS,
+)
+from order_support_agent.fast_path import _StateContext
+from order_support_agent.session_state import Issue, SessionState
+# Importing the damage tools opens (and, in the parent, syncs) the policy index, once per process
+from order_support_agent.tools.damage_item_tools import classify_damage, search_damage_policy_sync
+from order_support_agent.tools.extract_information import detect_issue_type, extract_order_id
+from order_support_agent.tools.intent_matcher import analyze_message
+
+TRIAGED = "triaged"
+ESCALATED = "escalated"
+UNRESOLVED = "unresolved"          # needs the model, but escalation is disabled
+ESCALATION_FAILED = "escalation_failed"
+
+
+def ticket_text(record: dict) -> str:
+    return record.get("text") or "\n".join(value for value in (record.get("title"), record.get("body")) if value)
+
+
+def ticket_id(record: dict, offset: int) -> str:
+    return str(record.get("id") or record.get("ticket_id") or record.get("request_id") or f"offset-{offset}")
+
+
+def iter_ticket_chunks(path: str, offset: int, chunk_size: int) -> Iterator[dict]:
+    """
+    Yields work units {"start", "end", "tickets": [(id, offset, text)]} from `offset` on.
+    `end` is the byte offset just past the unit's last line.
+    """
+    with open(path, "rb") as file:
+        file.seek(offset)
+        tickets: list[tuple[str, int, str]] = []
+        start = offset
+        for raw in iter(file.readline, b""):
+            if raw.strip():
+                record = json.loads(raw)
+                tickets.append((ticket_id(record, offset), offset, ticket_text(record)))
+            offset += len(raw)
+            if len(tickets) >= chunk_size:
+                yield {"start": start, "end": offset, "tickets": tickets}
+                tickets, start = [], offset
+        if tickets or start != offset:
+            yield {"start": start, "end": offset, "tickets": tickets}
+
+
+def triage_ticket(text: str) -> dict:
+    """Runs the deterministic tools over one ticket on a scratch state; no model call."""
+    context = _StateContext({})
+    session = SessionState(context.state)
+    analysis = analyze_message(text)
+    order_id, order_confidence = analysis.best("order_id")
+    issue_type, issue_confidence = analysis.best("issue")
+    reasons = []
+    if not order_id:
+        reasons.append("missing_order_id")
+    elif order_confidence < 1.0:
+        reasons.append("several_order_ids")
+    if not issue_type:
+        reasons.append("missing_issue")
+    elif issue_confidence < 1.0:
+        reasons.append("several_issues")
+
+    extract_order_id(context, text)
+    detect_issue_type(context, text)
+    severity = None
+    if session.order().issue is Issue.DAMAGED_ITEM:
+        severity = classify_damage(context, text)["severity"]
+        if severity == "unsure":
+            reasons.append("damage_unsure")
+        else:
+            search_damage_policy_sync(text, context)
+
+    order = session.order()
+    return {
+        "status": ESCALATED if reasons else TRIAGED,
+        "reasons": reasons,
+        "order_id": session.current_order_id,
+        "issue_type": order.issue.label if order.issue else issue_type,
+        "issue_confidence": round(issue_confidence, 3),
+        "damage_severity": severity,
+        "policy_refs": list(order.policy_refs),
+        "state": dict(context.state),
+    }
+
+
+def triage_chunk(unit: dict) -> dict:
+    """Pool task: triages every ticket of a work unit."""
+    results = []
+    for ticket, offset, text in unit["tickets"]:
+        try:
+            result = triage_ticket(text)
+        except Exception as error:   # a bad ticket must not sink its whole unit
+            result = {"status": ESCALATED, "reasons": [f"triage_error: {type(error).__name__}: {error}"], "state": {}}
+        results.append({"ticket_id": ticket, "offset": offset, "text": text, **result})
+    return {"start": unit["start"], "end": unit["end"], "results": results}
+
+
+def load_checkpoint(path: str) -> dict:
+    if not os.path.exists(path):
+        return {"offset": 0}
+    with open(path, encoding="utf-8") as file:
+        return json.load(file)
+
+
+def save_checkpoint(path: str, checkpoint: dict) -> None:
+    with open(path + ".tmp", "w", encoding="utf-8") as file:
+        json.dump(checkpoint, file)
+    os.replace(path + ".tmp", path)
+
+
+def written_ticket_ids(output_path: str) -> set[str]:
+    """Ticket ids already in the output (written past the checkpoint before a crash)."""
+    if not os.path.exists(output_path):
+        return set()
+    with open(output_path, encoding="utf-8") as file:
+        return {json.loads(line)["ticket_id"] for line in file if line.strip()}
+
+
+class _Escalator:
+    """Sends unresolved tickets to the LLM agent, each in a fresh session seeded with the triage state."""
+
+    def __init__(self, db_url: str):
+        from google.adk.runners import Runner
+        from google.adk.sessions import InMemorySessionService
+
+        from order_support_agent.agent import order_support_app
+        from runtime.session_store import create_session_service
+
+        session_service = InMemorySessionService() if db_url == "memory" else create_session_service(db_url=db_url)
+        self.runner = Runner(app=order_support_app, session_service=session_service)
+
+    async def escalate(self, result: dict) -> dict:
+        from runtime.serving import run_turn
+
+        session_service = self.runner.session_service
+        app_name = self.runner.app_name
+        session_id = f"triage-{result['ticket_id']}"
+        try:
+            # Left over from an interrupted run when escalating into a persistent store
+            if not await session_service.get_session(app_name=app_name, user_id="triage", session_id=session_id):
+                await session_service.create_session(
+                    app_name=app_name, user_id="triage", session_id=session_id, state=result["state"],
+                )
+            reply = await run_turn(self.runner, "triage", session_id, result["text"], fast_path=False)
+        except Exception as error:
+            return {**result, "status": ESCALATION_FAILED, "error": f"{type(error).__name__}: {error}"}
+        return {**result, "reply": reply}
+
+
+class _TriageRun:
+    """Output file, checkpoint and escalation bookkeeping of one triage_file() call."""
+
+    def __init__(self, output_path: str, escalator: "_Escalator | None", escalation_concurrency: int):
+        self.checkpoint_path = output_path + ".checkpoint.json"
+        self.checkpoint = load_checkpoint(self.checkpoint_path)
+        self.done_ids = written_ticket_ids(output_path)
+        self.output = open(output_path, "a", encoding="utf-8")
+        self.escalator = escalator
+        self.slots = asyncio.Semaphore(escalation_concurrency)
+        self.tasks: set[asyncio.Task] = set()
+        # Units finish escalating out of order; the checkpoint only moves past a contiguous finished prefix.
+        self.open_units: deque[dict] = deque()
+        self.report = {TRIAGED: 0, ESCALATED: 0, UNRESOLVED: 0, ESCALATION_FAILED: 0, "skipped": 0}
+
+    def write(self, result: dict) -> None:
+        result.pop("text", None)
+        self.output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        self.report[result["status"]] += 1
+
+    def advance_checkpoint(self) -> None:
+        moved = False
+        while self.open_units and self.open_units[0]["pending"] == 0:
+            self.checkpoint["offset"] = self.open_units.popleft()["end"]
+            moved = True
+        if moved:
+            self.output.flush()
+            save_checkpoint(self.checkpoint_path, self.checkpoint)
+
+    async def accept(self, done: dict) -> None:
+        """Writes a finished unit's triaged tickets and schedules its escalations."""
+        unit = {"end": done["end"], "pending": 0}
+        self.open_units.append(unit)
+        for result in done["results"]:
+            if result["ticket_id"] in self.done_ids:
+                self.report["skipped"] += 1
+            elif result["status"] == TRIAGED:
+                self.write(result)
+            elif self.escalator is None:
+                self.write({**result, "status": UNRESOLVED})
+            else:
+                await self.slots.acquire()   # back-pressure: stop taking units while the agent is saturated
+                unit["pending"] += 1
+                task = asyncio.create_task(self._escalate(result, unit))
+                self.tasks.add(task)
+                task.add_done_callback(self.tasks.discard)
+        self.advance_checkpoint()
+
+    async def _escalate(self, result: dict, unit: dict) -> None:
+        try:
+            self.write(await self.escalator.escalate(result))
+        finally:
+            self.slots.release()
+            unit["pending"] -= 1
+            self.advance_checkpoint()
+
+    async def finish(self) -> dict:
+        await asyncio.gather(*self.tasks)
+        self.advance_checkpoint()
+        self.output.close()
+        return {**self.report, "offset": self.checkpoint["offset"]}
+
+
+async def triage_file(
+    input_path: str,
+    output_path: str,
+    workers: int = TRIAGE_WORKERS,
+    chunk_size: int = TRIAGE_CHUNK_SIZE,
+    escalation_concurrency: int = TRIAGE_ESCALATION_CONCURRENCY,
+    escalate: bool = True,
+    db_url: str = "memory",
+) -> dict:
+    """
+    Triages (and escalates) every ticket after the checkpoint.
+
+    Args:
+        input_path: JSONL file of tickets.
+        output_path: JSONL results file, appended to.
+        workers: Processes running the deterministic tools.
+        chunk_size: Tickets per work unit.
+        escalation_concurrency: Agent turns in flight at once.
+        escalate: False to record unresolved tickets without calling the model.
+        db_url: Session store for escalated conversations ("memory" by default).
+
+    Returns:
+        dict with counts per status, elapsed seconds and the final offset.
+    """
+    started = time.perf_counter()
+    run = _TriageRun(output_path, _Escalator(db_url) if escalate else None, escalation_concurrency)
+    loop = asyncio.get_running_loop()
+    with multiprocessing.get_context("spawn").Pool(workers) as pool:
+        in_flight: deque = deque()
+        for unit in iter_ticket_chunks(input_path, run.checkpoint["offset"], chunk_size):
+            in_flight.append(pool.apply_async(triage_chunk, (unit,)))
+            # Bounded read-ahead: at most two units per worker are queued; results are taken in input order
+            if len(in_flight) >= workers * 2:
+                await run.accept(await loop.run_in_executor(None, in_flight.popleft().get))
+        while in_flight:
+            await run.accept(await loop.run_in_executor(None, in_flight.popleft().get))
+    report = await run.finish()
+    report["elapsed_s"] = round(time.perf_counter() - started, 2)
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("input", help="JSONL file of tickets")
+    parser.add_argument("--out", default="triage.jsonl", help="results file (appended; checkpoint stored next to it)")
+    parser.add_argument("--workers", type=int, default=TRIAGE_WORKERS)
+    parser.add_argument("--chunk-size", type=int, default=TRIAGE_CHUNK_SIZE)
+    parser.add_argument("--escalation-concurrency", type=int, default=TRIAGE_ESCALATION_CONCURRENCY)
+    parser.add_argument("--no-escalate", action="store_true", help="record unresolved tickets without calling the model")
+    parser.add_argument("--db-url", default="memory", help="session store for escalated tickets")
+    args = parser.parse_args()
+
+    report = asyncio.run(triage_file(
+        args.input,
+        args.out,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        escalation_concurrency=args.escalation_concurrency,
+        escalate=not args.no_escalate,
+        db_url=args.db_url,
+    ))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
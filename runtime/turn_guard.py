@@ -0,0 +1,152 @@
+"""
+Per-turn guard rails for the order support agent.
+
+The agent instruction asks the model not to repeat or chain tool calls, but
+nothing enforced it: a model that re-calls extract_order_id or
+map_issue_to_valid_status with the same arguments loops, and every loop
+iteration is another model round trip. TurnGuardPlugin enforces it at
+runtime, per invocation (one user turn; an AgentTool sub-agent run gets its
+own budget):
+
+    - memoization: a FunctionTool call whose name, arguments and session
+      state match an earlier call in the same turn is answered from that
+      call's result instead of running the tool again;
+    - budgets: at most `max_model_calls` model steps, `max_tool_calls` tool
+      executions and `deadline_s` of wall time per turn. Past the tool
+      budget, tool calls get an error result telling the model to answer;
+      past the model budget or the deadline, the next model step is replaced
+      by a canned reply with no function calls, which ends the turn.
+
+Each budget hit is counted once per turn in turn_budget_exceeded_total{kind},
+and memo hits in tool_memo_hits_total{tool}. Checks happen between steps, so
+the worst case is the deadline plus one model call (itself bounded by
+LLM_RETRY_DEADLINE_SECONDS) and one tool call.
+"""
+import copy
+import hashlib
+import json
+import time
+from typing import Any, Optional
+
+from google.adk.agents.callback_context import CallbackContext
+from google.adk.agents.invocation_context import InvocationContext
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.adk.plugins.base_plugin import BasePlugin
+from google.adk.tools import FunctionTool
+from google.adk.tools.base_tool import BaseTool
+from google.adk.tools.tool_context import ToolContext
+from google.genai import types
+
+from config import TOOL_MEMOIZATION_ENABLED, TURN_DEADLINE_SECONDS, TURN_MAX_MODEL_CALLS, TURN_MAX_TOOL_CALLS
+from runtime.invocation_map import STALE_INVOCATION_SECONDS, InvocationMap
+from runtime.metrics import MetricsRegistry, metrics
+
+BUDGET_REPLY = (
+    "I'm sorry, this is taking longer than it should. Here is where things stand so far; "
+    "please send your next message and I'll continue from here."
+)
+TOOL_BUDGET_RESULT = {
+    "status": "error",
+    "message": "Tool call budget for this turn is used up. Do not call more tools; answer the user with what you know.",
+}
+
+
+def _fingerprint(value: Any) -> str:
+    return json.dumps(value, sort_keys=True, default=str)
+
+
+def _state_digest(tool_context: ToolContext) -> str:
+    return hashlib.blake2b(_fingerprint(tool_context.state.to_dict()).encode("utf-8"), digest_size=16).hexdigest()
+
+
+class TurnGuardPlugin(BasePlugin):
+    """Memoizes repeated tool calls and enforces model-step, tool-call and wall-time budgets per turn."""
+
+    def __init__(
+        self,
+        registry: MetricsRegistry = metrics,
+        max_model_calls: int = TURN_MAX_MODEL_CALLS,
+        max_tool_calls: int = TURN_MAX_TOOL_CALLS,
+        deadline_s: float = TURN_DEADLINE_SECONDS,
+        memoize: bool = TOOL_MEMOIZATION_ENABLED,
+    ):
+        super().__init__(name="turn_guard")
+        self.registry = registry
+        self.max_model_calls = max_model_calls
+        self.max_tool_calls = max_tool_calls
+        self.deadline_s = deadline_s
+        self.memoize = memoize
+        self._turns: InvocationMap[str, dict] = InvocationMap(max_age_s=max(STALE_INVOCATION_SECONDS, 2 * deadline_s))
+
+    def _turn(self, invocation_id: str) -> dict:
+        return self._turns.setdefault(invocation_id, lambda: {
+            "started": time.monotonic(), "model_calls": 0, "tool_calls": 0,
+            "memo": {}, "pending": {}, "exceeded": set(),
+        })
+
+    def _exceeded(self, turn: dict, kind: str, agent: str) -> None:
+        if kind not in turn["exceeded"]:
+            turn["exceeded"].add(kind)
+            self.registry.inc("turn_budget_exceeded_total", help="Turns that hit a per-turn budget", kind=kind, agent=agent)
+
+    async def before_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        self._turn(invocation_context.invocation_id)
+
+    async def after_run_callback(self, *, invocation_context: InvocationContext) -> None:
+        self._turns.pop(invocation_context.invocation_id, None)
+
+    async def before_model_callback(self, *, callback_context: CallbackContext, llm_request: LlmRequest) -> Optional[LlmResponse]:
+        turn = self._turn(callback_context.invocation_id)
+        turn["model_calls"] += 1
+        if turn["model_calls"] > self.max_model_calls:
+            kind = "model_calls"
+        elif time.monotonic() - turn["started"] > self.deadline_s:
+            kind = "deadline"
+        else:
+            return None
+        self._exceeded(turn, kind, callback_context.agent_name)
+        # A final text reply without function calls ends the turn instead of starting another step
+        return LlmResponse(content=types.Content(role="model", parts=[types.Part(text=BUDGET_REPLY)]))
+
+    def _memo_key(self, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext) -> tuple | None:
+        # Only plain function tools: their result is determined by arguments and state (AgentTool runs a model)
+        if not self.memoize or not isinstance(tool, FunctionTool):
+            return None
+        return tool.name, _fingerprint(tool_args), _state_digest(tool_context)
+
+    async def before_tool_callback(self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext) -> Optional[dict]:
+        turn = self._turn(tool_context.invocation_id)
+        key = self._memo_key(tool, tool_args, tool_context)
+        if key is not None and key in turn["memo"]:
+            self.registry.inc("tool_memo_hits_total", help="Tool calls answered from an identical call in the same turn",
+                              tool=tool.name)
+            return copy.deepcopy(turn["memo"][key])
+        if turn["tool_calls"] >= self.max_tool_calls:
+            self._exceeded(turn, "tool_calls", tool_context.agent_name)
+            return dict(TOOL_BUDGET_RESULT)
+        turn["tool_calls"] += 1
+        if key is not None:
+            turn["pending"][tool_context.function_call_id] = key
+        return None
+
+    async def after_tool_callback(self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext, result: dict) -> Optional[dict]:
+        turn = self._turns.get(tool_context.invocation_id)
+        key = turn and turn["pending"].pop(tool_context.function_call_id, None)
+        if key is None:
+            return None   # memo hit, over budget or not memoizable
+        stored = copy.deepcopy(result)
+        turn["memo"][key] = stored
+        # Also under the state the call left behind: repeating it right away would only redo what it just did
+        turn["memo"][key[:2] + (_state_digest(tool_context),)] = stored
+        return None
+
+    async def on_tool_error_callback(self, *, tool: BaseTool, tool_args: dict[str, Any], tool_context: ToolContext, error: Exception) -> Optional[dict]:
+        turn = self._turns.get(tool_context.invocation_id)
+        if turn:
+            turn["pending"].pop(tool_context.function_call_id, None)
+        return None
+
+
+# Registered ahead of the metrics plugin, so short-circuited calls are not timed as real ones.
+turn_guard_plugin = TurnGuardPlugin()
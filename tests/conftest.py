@@ -0,0 +1,6 @@
+import os
+import tempfile
+
+# Must be set before config and rag.vectorstore are imported (the policy index is built at import time)
+os.environ.setdefault("EMBEDDING_PROVIDER", "local")
+os.environ.setdefault("POLICY_INDEX_DIR", os.path.join(tempfile.gettempdir(), "order_support_test_index"))
@@ -0,0 +1,37 @@
+import pytest
+
+from order_support_agent.tools.intent_matcher import analyze_message
+
+
+@pytest.mark.parametrize("message", [
+    "no",
+    "not yet",
+    "I did not check",
+    "I have not checked yet",
+    "I haven't checked",
+    "No, I did not",
+])
+def test_negations_are_not_read_as_confirmations(message):
+    assert analyze_message(message).best("confirmation") == ("no", 1.0)
+
+
+@pytest.mark.parametrize("message", ["yes", "Yes please start", "yes I checked", "I did", "already checked"])
+def test_affirmatives(message):
+    assert analyze_message(message).best("confirmation") == ("yes", 1.0)
+
+
+@pytest.mark.parametrize("message, resolution", [
+    ("I want a refund", "refund"),
+    ("I'd like to be refunded", "refund"),
+    ("please replace it", "replacement"),
+    ("can I get it replaced?", "replacement"),
+])
+def test_resolution_inflections(message, resolution):
+    assert analyze_message(message).best("resolution")[0] == resolution
+
+
+def test_issue_and_order_id_in_one_message():
+    analysis = analyze_message("my order ORDER-240240 was not delivered")
+    assert analysis.order_id == "240240"
+    assert analysis.issue_type == "not delivered"
+    assert analysis.labels("confirmation") == []
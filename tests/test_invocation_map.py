@@ -0,0 +1,37 @@
+from runtime import invocation_map
+from runtime.invocation_map import InvocationMap
+
+
+def test_stale_entries_are_dropped_on_the_next_set(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(invocation_map.time, "monotonic", lambda: now[0])
+    turns = InvocationMap(max_age_s=900)
+    turns.setdefault("failed-run", dict)
+    now[0] += 600
+    turns.set("recent", {})
+    now[0] += 400
+
+    turns.setdefault("next-run", dict)
+
+    assert "failed-run" not in turns
+    assert "recent" in turns and "next-run" in turns
+
+
+def test_capacity_drops_the_least_recently_set():
+    times = InvocationMap(max_age_s=None, capacity=2)
+    times.set("a", 1)
+    times.set("b", 2)
+    times.set("a", 3)
+    times.set("c", 4)
+
+    assert "b" not in times
+    assert (times.get("a"), times.get("c"), len(times)) == (3, 4, 2)
+
+
+def test_setdefault_keeps_existing_entries():
+    turns = InvocationMap()
+    first = turns.setdefault("run", dict)
+    first["model_calls"] = 1
+
+    assert turns.setdefault("run", dict) is first
+    assert turns.pop("run") is first and turns.pop("run") is None
@@ -0,0 +1,72 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from benchmarks.synthetic import FakeToolContext
+from order_support_agent.order_repository import OrderStatusService, SQLiteOrderRepository
+from order_support_agent.session_state import Issue, SessionState
+from order_support_agent.tools import damage_item_tools, order_details
+
+SLOW_QUERY = "my parcel arrived crushed and soaking wet"
+SLOW_TIMEOUT_SECONDS = 10
+HIT = {"id": "damaged_product_policy.txt#1", "metadata": {"source": "damaged_product_policy.txt"},
+       "document": "Damaged items can be replaced or refunded.", "score": 1.0}
+
+
+@pytest.fixture
+def slow_search(monkeypatch):
+    """hybrid_search that blocks its thread on SLOW_QUERY until the test releases it."""
+    release = threading.Event()
+
+    def hybrid_search(texts: list[str], top_k: int = 3) -> list[dict]:
+        if SLOW_QUERY in texts:
+            release.wait(SLOW_TIMEOUT_SECONDS)
+        return [HIT]
+
+    monkeypatch.setattr(damage_item_tools, "hybrid_search", hybrid_search)
+    yield release
+    release.set()
+
+
+@pytest.fixture
+def orders(tmp_path, monkeypatch):
+    repository = SQLiteOrderRepository(str(tmp_path / "orders.db"), pool_size=2)
+    monkeypatch.setattr(order_details, "order_status_service", OrderStatusService(repository, batch_window_s=0))
+    yield
+    asyncio.run(repository.close())
+
+
+async def _policy_lookup(query: str) -> dict:
+    return await damage_item_tools.search_damage_policy(query, FakeToolContext({"order_id": "240240"}))
+
+
+async def _status_lookup(order_id: str) -> dict:
+    context = FakeToolContext({"order_id": order_id})
+    SessionState(context.state).update(issue=Issue.DAMAGED_ITEM)
+    return await order_details.map_issue_to_valid_status(context, Issue.DAMAGED_ITEM.label)
+
+
+def test_slow_policy_lookup_does_not_hold_up_other_sessions(slow_search, orders):
+    async def scenario():
+        started = time.perf_counter()
+        slow = asyncio.create_task(_policy_lookup(SLOW_QUERY))
+        await asyncio.sleep(0.01)   # the slow lookup is now blocking its I/O thread
+        others = await asyncio.wait_for(asyncio.gather(
+            *(_policy_lookup(f"the item arrived broken {i}") for i in range(10)),
+            *(_status_lookup(order_id) for order_id in ("123456", "98765", "55501", "234232")),
+        ), timeout=SLOW_TIMEOUT_SECONDS / 2)
+        others_done = time.perf_counter() - started
+        assert not slow.done()
+
+        slow_search.set()
+        await slow
+        return others, others_done, time.perf_counter() - started
+
+    others, others_done, total = asyncio.run(scenario())
+
+    assert all(result["matches"][0]["id"] == HIT["id"] for result in others[:10])
+    assert [result["status"] for result in others[10:]] == ["success", "success", "success", "mismatch"]
+    assert others_done < total
+    assert others_done < 1.0
@@ -0,0 +1,47 @@
+import asyncio
+
+import pytest
+
+from benchmarks.synthetic import FakeToolContext
+from order_support_agent.order_repository import OrderRepository, OrderStatusService, SQLiteOrderRepository
+from order_support_agent.session_state import Issue, SessionState
+from order_support_agent.tools import order_details
+
+
+@pytest.fixture
+def repository(tmp_path, monkeypatch):
+    repository = SQLiteOrderRepository(str(tmp_path / "orders.db"), pool_size=1)
+    monkeypatch.setattr(order_details, "order_status_service", OrderStatusService(repository, batch_window_s=0))
+    yield repository
+    asyncio.run(repository.close())
+
+
+def _check(order_id: str, issue: Issue) -> dict:
+    context = FakeToolContext({"order_id": order_id})
+    SessionState(context.state).update(issue=issue)
+    return asyncio.run(order_details.map_issue_to_valid_status(context, issue.label))
+
+
+def test_mismatch_lists_the_valid_statuses(repository):
+    result = _check("234232", Issue.DAMAGED_ITEM)   # in transit
+    assert result["status"] == "mismatch"
+    assert result["order_status"] == "in_transit"
+    assert result["valid_statuses"] == ["delivered"]
+
+
+def test_unknown_order_is_not_found(repository):
+    assert asyncio.run(repository.get_orders(["999999"])) == {}
+    result = _check("999999", Issue.DAMAGED_ITEM)
+    assert result["status"] == "error"
+    assert "was not found" in result["message"]
+
+
+def test_default_status_is_opt_in(tmp_path):
+    repository = SQLiteOrderRepository(str(tmp_path / "orders.db"), pool_size=1, default_status="delivered")
+    assert asyncio.run(repository.get_order("999999")).status == "delivered"
+    asyncio.run(repository.close())
+
+
+def test_repository_must_implement_get_orders():
+    with pytest.raises(TypeError):
+        OrderRepository()
@@ -0,0 +1,72 @@
+from flows.registry import WORKFLOWS_BY_ISSUE
+from order_support_agent.session_state import Issue, OrderStatus, SessionState
+
+ORDER_ID = "240240"
+
+
+def _session(issue: Issue) -> tuple[dict, SessionState]:
+    state = {"order_id": ORDER_ID}
+    session = SessionState(state)
+    session.update(issue=issue, status=OrderStatus.DELIVERED)
+    return state, session
+
+
+def _run(state: dict, issue: str, message: str) -> dict:
+    return WORKFLOWS_BY_ISSUE[issue].run(state, ORDER_ID, message)
+
+
+def _finish_not_delivered(state: dict) -> None:
+    for message in ("hello", "yes I checked", "yes", "refund please"):
+        result = _run(state, "not delivered", message)
+    assert result["action"] == "workflow_completed"
+
+
+def test_not_delivered_refund():
+    state, session = _session(Issue.NOT_DELIVERED)
+    _finish_not_delivered(state)
+    order = session.order()
+    assert (order.substep, order.flow, order.vars["resolution"]) == ("refund_confirmed", "not_delivered", "refund")
+
+
+def test_switching_to_damaged_item_starts_its_own_workflow():
+    state, session = _session(Issue.NOT_DELIVERED)
+    _finish_not_delivered(state)
+
+    session.update(issue=Issue.DAMAGED_ITEM)
+    result = _run(state, "damaged item", "the screen is cracked")
+
+    assert result["action"] == "ask_user"
+    order = session.order()
+    assert (order.substep, order.flow) == ("describe_damage", "damaged_item")
+    assert "resolution" not in order.vars
+
+
+def test_switching_to_wrong_item_does_not_skip_describe_item():
+    state, session = _session(Issue.NOT_DELIVERED)
+    for message in ("hello", "yes I checked", "yes"):
+        _run(state, "not delivered", message)
+    assert session.order().substep == "choose_resolution"
+
+    session.update(issue=Issue.WRONG_ITEM)
+    _run(state, "wrong item", "you sent the wrong item")
+
+    assert session.order().substep == WORKFLOWS_BY_ISSUE["wrong item"].initial == "describe_item"
+
+
+def test_resumes_records_without_workflow_name():
+    state, session = _session(Issue.DAMAGED_ITEM)
+    session.update(substep="request_photo")
+    _run(state, "damaged item", "here is the photo")
+    assert session.order().substep == "policy_retrieval"
+
+
+def test_new_issue_clears_workflow_progress():
+    state, session = _session(Issue.NOT_DELIVERED)
+    _finish_not_delivered(state)
+
+    session.update(issue=Issue.NOT_DELIVERED)
+    assert session.order().substep == "refund_confirmed"   # same issue again: progress is kept
+
+    order = session.update(issue=Issue.DAMAGED_ITEM)
+    assert (order.workflow, order.substep, order.flow, order.vars) == (None, None, None, {})
+    assert order.status is OrderStatus.DELIVERED